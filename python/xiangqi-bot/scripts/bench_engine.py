@@ -0,0 +1,139 @@
+"""引擎往返基准：冷启动、ucinewgame、go 往返开销、崩溃/卡死后的恢复耗时、真引擎吞吐。
+
+默认对 scripts/fake_uci.py 替身引擎测量客户端（engine.py）自身的开销，任何机器都能跑、
+结果可复现；本机有可运行的 pikafish 时（或 --real）另测真引擎的启动与搜索吞吐。
+
+- 冷启动：Engine.start()（拉起进程 + uci/setoption/isready 往返）
+- newgame：ucinewgame + isready 往返
+- go 开销：best_move 总耗时 - movetime（position/go 写入 + bestmove 唤醒）
+- 恢复：引擎在 go 时崩溃 / 卡死，best_move 重建进程并重试成功的总耗时
+- 吞吐（真引擎）：固定局面逐个搜索的 nps 与单步耗时
+
+用法: uv run python scripts/bench_engine.py [-n 20] [--movetime 50] [--real]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from xiangqi_bot import book, config
+from xiangqi_bot.engine import Engine, EngineError
+
+FAKE_UCI = Path(__file__).resolve().parent / "fake_uci.py"
+POSITIONS = (
+    book.START_FEN,
+    "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/9/RNBAKABNR b - - 1 1",
+    "r1bakabnr/9/1cn4c1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C1N2/9/RNBAKAB1R b - - 3 2",
+    "3akab2/9/4b4/p3p3p/2p6/6P2/P3P3P/4B4/4A4/2BAK4 w - - 0 30",
+)
+
+
+def fake_engine(*extra: str) -> Engine:
+    engine = Engine([sys.executable, str(FAKE_UCI), *extra], cwd=FAKE_UCI.parent)
+    engine.cache = None  # 基准只测往返，不读写搜索缓存
+    return engine
+
+
+def _stats(costs: list[float]) -> str:
+    return f"中位 {statistics.median(costs):8.2f} ms  最大 {max(costs):8.2f} ms"
+
+
+def _time_ms(fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_start(make: Callable[[], Engine], n: int) -> None:
+    costs = []
+    for _ in range(n):
+        engine = make()
+        costs.append(_time_ms(engine.start))
+        engine.close()
+    print(f"冷启动        {_stats(costs)}")
+
+
+def bench_newgame(engine: Engine, n: int) -> None:
+    engine.start()
+    print(f"newgame       {_stats([_time_ms(engine.newgame) for _ in range(n)])}")
+
+
+def bench_go(engine: Engine, n: int, movetime_ms: int) -> None:
+    engine.start()
+    costs = [
+        _time_ms(lambda: engine.best_move(book.START_FEN, movetime_ms)) - movetime_ms
+        for _ in range(n)
+    ]
+    print(f"go 开销       {_stats(costs)}（movetime {movetime_ms} ms 之外）")
+
+
+def bench_recovery(label: str, engine: Engine, movetime_ms: int) -> None:
+    engine.start()
+    engine.best_move(book.START_FEN, movetime_ms)  # 第一次正常，第二次 go 触发故障
+    try:
+        cost = _time_ms(lambda: engine.best_move(book.START_FEN, movetime_ms))
+    except EngineError as exc:
+        print(f"{label}恢复失败：{exc}")
+        return
+    print(f"{label}恢复  {cost:7.1f} ms（含 movetime {movetime_ms} ms）")
+
+
+def bench_real(n: int, movetime_ms: int) -> None:
+    print(f"== 真引擎（{config.PIKAFISH_EXE.name}）==")
+    make = Engine
+    try:
+        bench_start(make, min(n, 5))
+    except EngineError as exc:
+        print(f"无法启动：{exc}")
+        return
+    engine = make()
+    engine.cache = None
+    try:
+        bench_newgame(engine, n)
+        costs, nps = [], []
+        for i in range(n):
+            fen = POSITIONS[i % len(POSITIONS)]
+            costs.append(_time_ms(lambda fen=fen: engine.best_move(fen, movetime_ms)))
+            if engine.last_result is not None and engine.last_result.infos:
+                nps.append(engine.last_result.infos[0].nps)
+        print(f"单步搜索      {_stats(costs)}（movetime {movetime_ms} ms）")
+        if nps:
+            print(f"nps           中位 {statistics.median(nps):,.0f}")
+    finally:
+        engine.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=20, help="每项重复次数")
+    parser.add_argument("--movetime", type=int, default=50, help="go movetime（毫秒）")
+    parser.add_argument("--real", action="store_true", help="强制测真引擎（默认存在时才测）")
+    args = parser.parse_args()
+
+    print("== 替身引擎（fake_uci.py）==")
+    bench_start(fake_engine, args.n)
+    for run in (bench_newgame, lambda e, n: bench_go(e, n, args.movetime)):
+        engine = fake_engine()
+        try:
+            run(engine, args.n)
+        finally:
+            engine.close()
+    for label, flag in (("崩溃", "--crash-after"), ("卡死", "--hang-after")):
+        engine = fake_engine(flag, "1")
+        try:
+            bench_recovery(label, engine, args.movetime)
+        finally:
+            engine.close()
+
+    if args.real or config.PIKAFISH_EXE.exists():
+        bench_real(args.n, max(args.movetime, 1000))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
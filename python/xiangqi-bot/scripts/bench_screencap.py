@@ -0,0 +1,77 @@
+"""截图路径基准：PNG（screencap -p + imdecode）vs 原始帧缓冲（screencap + frombuffer）。
+
+不带参数时只做离线解码基准（用 raw_screenshots 模拟两种传输数据，不含设备端编码耗时）；
+带 --serial 时对在线设备逐路径连续截图，统计端到端单帧耗时（含设备端 PNG 编码与传输）。
+
+用法: uv run python scripts/bench_screencap.py [--serial 192.168.1.5:5555] [-n 20]
+"""
+
+import argparse
+import statistics
+import struct
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from xiangqi_bot import adb_client, config
+
+SHOTS = ("木_红_1080x2400.png", "木_红_1440x3200.jpg")
+
+
+def _timeit(fn: Callable[[], object], n: int) -> tuple[float, float]:
+    """运行 n 次，返回 (中位数, 最大值) 毫秒"""
+    costs = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        costs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(costs), max(costs)
+
+
+def bench_decode(n: int) -> None:
+    print("== 离线解码（主机端）==")
+    for name in SHOTS:
+        img = cv2.imdecode(
+            np.fromfile(str(config.PROJECT_ROOT / "raw_screenshots" / name), np.uint8), 1
+        )
+        h, w = img.shape[:2]
+        png = cv2.imencode(".png", img)[1].tobytes()
+        raw = struct.pack("<4I", w, h, 1, 0) + cv2.cvtColor(img, cv2.COLOR_BGR2RGBA).tobytes()
+        png_med, png_max = _timeit(lambda png=png: cv2.imdecode(np.frombuffer(png, np.uint8), 1), n)
+        raw_med, raw_max = _timeit(lambda raw=raw: adb_client.decode_raw(raw), n)
+        print(
+            f"{w}x{h}  PNG {len(png) / 1e6:5.1f} MB  解码 中位 {png_med:6.1f} ms  最大 {png_max:6.1f} ms"
+        )
+        print(
+            f"{w}x{h}  RAW {len(raw) / 1e6:5.1f} MB  解码 中位 {raw_med:6.1f} ms  最大 {raw_max:6.1f} ms"
+        )
+
+
+def bench_device(serial: str, n: int) -> None:
+    print(f"== 设备端到端（{serial}）==")
+    device = adb_client.get_device(serial)
+    for label, raw in (("PNG", False), ("RAW", True)):
+        adb_client.screencap(device, raw=raw)  # 预热
+        med, worst = _timeit(lambda raw=raw: adb_client.screencap(device, raw=raw), n)
+        print(f"{label}  单帧 中位 {med:7.1f} ms  最大 {worst:7.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="截图路径基准（PNG vs 原始帧缓冲）")
+    parser.add_argument("--serial", help="在线设备 serial；不传则只做离线解码基准")
+    parser.add_argument("-n", type=int, default=20, help="每条路径重复次数")
+    args = parser.parse_args()
+    bench_decode(args.n)
+    if args.serial:
+        bench_device(args.serial, args.n)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""整盘识别基准：逐格 cv2.matchTemplate vs 批量 fft / ncc 后端，附一致性校验。
+
+对 raw_screenshots 下每张截图（先矫正）：
+- 逐格：analyze_cell 扫 90 格 x 14 模板（约 1260 次 cv2.matchTemplate）
+- fft / ncc：analyze_codes 单帧耗时（分别在关闭 / 开启颜色预分类时测）
+- 校验：两种批量后端 90x14 最大分的最大差，以及识别结果是否与逐格完全一致
+
+用法: uv run python scripts/bench_vision.py [-n 5] [--skip-cells]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from xiangqi_bot import config, vision
+from xiangqi_bot.board import COLS, ROWS, encode
+
+BACKENDS = ("fft", "ncc")
+
+
+def _median_ms(fn: Callable[[], object], n: int) -> float:
+    costs = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        costs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(costs)
+
+
+def _per_cell(corrected: np.ndarray, templates: vision.Templates) -> np.ndarray:
+    board = [
+        [vision.analyze_cell(corrected, r, c, templates) for c in range(COLS)] for r in range(ROWS)
+    ]
+    return encode(board)
+
+
+def bench(path: Path, templates: vision.Templates, n: int, cells: bool) -> bool:
+    img = cv2.imdecode(np.fromfile(str(path), np.uint8), cv2.IMREAD_COLOR)
+    corrected = vision.correct_board(img)
+    scores, codes, costs = {}, {}, []
+    for backend in BACKENDS:
+        config.MATCH_BACKEND = backend
+        scores[backend] = vision.match_scores(corrected, templates)
+        for preclassify in (False, True):
+            config.COLOR_PRECLASSIFY = preclassify
+            codes[backend, preclassify] = vision.analyze_codes(corrected, templates)
+            costs.append(_median_ms(lambda: vision.analyze_codes(corrected, templates), n))
+    diff = float(np.abs(scores["fft"] - scores["ncc"]).max())
+    same = all(np.array_equal(v, codes["fft", False]) for v in codes.values())
+    line = f"{path.name:<28} " + " ".join(f"{c:7.1f}" for c in costs)
+    if cells:
+        reference = _per_cell(corrected, templates)
+        same = same and np.array_equal(reference, codes["fft", False])
+        line += f" {_median_ms(lambda: _per_cell(corrected, templates), 1):8.1f}"
+    print(f"{line}  最大分差 {diff:.1e}  {'一致' if same else '不一致'}")
+    return same
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=5, help="每项重复次数（取中位数）")
+    parser.add_argument("--skip-cells", action="store_true", help="不测逐格 matchTemplate（较慢）")
+    args = parser.parse_args()
+
+    templates = vision.load_templates()
+    header = " ".join(f"{b}{'+色' if p else '':<3}" for b in BACKENDS for p in (False, True))
+    print(f"{'截图':<26} {header}{'' if args.skip_cells else '   逐格'}（单帧毫秒）")
+    ok = True
+    for path in sorted((config.PROJECT_ROOT / "raw_screenshots").glob("*.*")):
+        ok = bench(path, templates, args.n, not args.skip_cells) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
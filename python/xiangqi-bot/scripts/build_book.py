@@ -0,0 +1,92 @@
+"""构建开局库（book/opening.bin）：对局记录 + 可选的离线引擎分析。
+
+对局记录为文本文件，每行一盘棋，UCI 着法以空格分隔（默认从标准开局走起）；
+行首可写 `fen <FEN> moves` 指定起始局面。每盘棋前 --max-ply 步逐步计入库，
+同一局面同一着法每出现一次权重 +1。
+
+--engine-ms 开启离线引擎分析：对库中每个局面（及标准开局）用 pikafish 思考，
+引擎着法额外加 --engine-weight 权重；--engine-line N 另从标准开局沿引擎主变展开 N 步。
+
+用法: uv run python scripts/build_book.py games.txt [more.txt] [--max-ply 16] [--engine-ms 2000]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from xiangqi_bot import book, config
+from xiangqi_bot.engine import Engine, EngineError
+
+
+def read_games(paths: list[Path], max_ply: int) -> list[tuple[str, str]]:
+    """对局文件 -> 逐步 (FEN, 着法) 记录"""
+    entries: list[tuple[str, str]] = []
+    for path in paths:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            start = book.START_FEN
+            if line.startswith("fen "):
+                head, _, tail = line[4:].partition(" moves")
+                start, line = head.strip(), tail
+            entries.extend(book.game_entries(line.split(), start, max_ply))
+    return entries
+
+
+def engine_entries(fens: list[str], movetime_ms: int, line_plies: int) -> list[tuple[str, str]]:
+    """离线引擎分析：各局面的引擎着法 + 从标准开局展开的引擎主变"""
+    engine = Engine()
+    engine.cache = None  # 构建库要求真实搜索，不读写搜索缓存
+    entries: list[tuple[str, str]] = []
+    try:
+        fen = book.START_FEN
+        for _ in range(line_plies):
+            move, _score = engine.best_move(fen, movetime_ms)
+            if move is None:
+                break
+            entries.append((fen, move))
+            fen = book.play(fen, move)
+        for i, fen in enumerate(fens, 1):
+            move, _score = engine.best_move(fen, movetime_ms)
+            if move is not None:
+                entries.append((fen, move))
+            print(f"\r引擎分析 {i}/{len(fens)}", end="", flush=True)
+        print()
+    finally:
+        engine.close()
+    return entries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("games", nargs="*", type=Path, help="对局记录文件")
+    parser.add_argument("--out", type=Path, default=config.BOOK_PATH)
+    parser.add_argument("--max-ply", type=int, default=config.BOOK_MAX_PLY)
+    parser.add_argument("--engine-ms", type=int, default=0, help="每局面引擎思考时间，0 不分析")
+    parser.add_argument("--engine-weight", type=int, default=2)
+    parser.add_argument("--engine-line", type=int, default=0, help="沿引擎主变展开的半回合数")
+    args = parser.parse_args()
+
+    games = read_games(args.games, args.max_ply)
+    weighted = [(fen, move, 1) for fen, move in games]
+    if args.engine_ms > 0:
+        fens = list(dict.fromkeys([book.START_FEN, *(fen for fen, _ in games)]))
+        try:
+            analysed = engine_entries(fens, args.engine_ms, args.engine_line)
+        except EngineError as exc:
+            print(f"引擎分析失败：{exc}", file=sys.stderr)
+            return 1
+        weighted += [(fen, move, args.engine_weight) for fen, move in analysed]
+    if not weighted:
+        print("没有可写入的着法（请提供对局记录或 --engine-ms）", file=sys.stderr)
+        return 1
+    count = book.build(weighted, args.out)
+    print(f"已写入 {args.out}：{count} 条记录（对局着法 {len(games)} 步）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""可脚本化的 UCI 替身引擎（仅标准库），供 Linux CI 测试与引擎往返基准使用。
+
+支持 uci / isready / setoption / ucinewgame / position / go / stop / ponderhit / quit：
+go 按 movetime 模拟思考（期间每 --info-ms 输出一行 info，深度递增），到时或收到
+stop/ponderhit（ponder 时）后输出 bestmove；`go ponder` 等到 ponderhit 才开始计时，
+`go depth N` 输出到第 N 层即结束。MultiPV 选项生效时每层输出多条主变。
+
+故障注入：--crash-after N 第 N+1 次 go 时直接退出；--hang-after N 第 N+1 次 go 起不再响应。
+
+用法: python scripts/fake_uci.py [--move h2e2] [--score 30] [--latency-ms 5] [--crash-after 3]
+"""
+
+import argparse
+import itertools
+import sys
+import threading
+import time
+
+REPLIES = ("h9g7", "b9c7", "h7e7", "c6c5", "b7e7")  # MultiPV 次选着法（取前 N-1 个）
+
+
+class FakeEngine:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.gos = 0
+        self.multipv = 1
+        self.hung = False
+        self._out = threading.Lock()
+        self._stop = threading.Event()
+        self._hit = threading.Event()
+        self._search: threading.Thread | None = None
+
+    def send(self, line: str) -> None:
+        with self._out:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    def _think(self, movetime_ms: int, depth: int | None, ponder: bool) -> None:
+        if ponder:
+            while not (self._hit.is_set() or self._stop.is_set()):
+                self._hit.wait(0.01)
+        deadline = time.monotonic() + movetime_ms / 1000
+        level = 0
+        while not self._stop.is_set() and (depth is None or level < depth):
+            level += 1
+            for pv in range(1, self.multipv + 1):
+                move = self.args.move if pv == 1 else REPLIES[(pv - 2) % len(REPLIES)]
+                score = self.args.score - (pv - 1) * 10
+                self.send(
+                    f"info depth {level} multipv {pv} score cp {score} "
+                    f"nodes {level * 1000} nps {self.args.nps} time {level} pv {move}"
+                )
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._stop.wait(min(self.args.info_ms / 1000, remaining))
+        time.sleep(self.args.latency_ms / 1000)
+        self.send(f"bestmove {self.args.move} ponder {self.args.ponder}")
+
+    def go(self, tokens: list[str]) -> None:
+        self.gos += 1
+        if self.args.crash_after is not None and self.gos > self.args.crash_after:
+            sys.exit(3)
+        if self.args.hang_after is not None and self.gos > self.args.hang_after:
+            self.hung = True
+            return
+        movetime, depth = 1000, None
+        for key, value in itertools.pairwise(tokens):
+            if key == "movetime":
+                movetime = int(value)
+            elif key == "depth":
+                depth = int(value)
+        self._stop.clear()
+        self._hit.clear()
+        self._search = threading.Thread(
+            target=self._think, args=(movetime, depth, "ponder" in tokens), daemon=True
+        )
+        self._search.start()
+
+    def handle(self, line: str) -> bool:
+        """处理一条命令，返回是否继续运行"""
+        tokens = line.split()
+        if not tokens or self.hung:
+            return True
+        cmd = tokens[0]
+        if cmd == "uci":
+            time.sleep(self.args.startup_ms / 1000)
+            self.send(f"id name {self.args.name}")
+            self.send("uciok")
+        elif cmd == "isready":
+            self.send("readyok")
+        elif cmd == "setoption" and tokens[2:3] == ["MultiPV"] and len(tokens) > 4:
+            self.multipv = max(1, int(tokens[4]))
+        elif cmd == "go":
+            self.go(tokens)
+        elif cmd == "stop":
+            self._stop.set()
+            if self._search is not None:
+                self._search.join()
+        elif cmd == "ponderhit":
+            self._hit.set()
+        elif cmd == "quit":
+            return False
+        return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--name", default="FakeUCI 1.0")
+    parser.add_argument("--move", default="h2e2", help="bestmove")
+    parser.add_argument("--ponder", default="h9g7", help="bestmove 附带的 ponder 着法")
+    parser.add_argument("--score", type=int, default=0, help="score cp")
+    parser.add_argument("--nps", type=int, default=1_000_000)
+    parser.add_argument("--latency-ms", type=float, default=0, help="每次 bestmove 前的额外延迟")
+    parser.add_argument("--startup-ms", type=float, default=0, help="uci 到 uciok 的启动延迟")
+    parser.add_argument("--info-ms", type=float, default=20, help="info 行间隔")
+    parser.add_argument("--crash-after", type=int, help="第 N+1 次 go 时进程退出")
+    parser.add_argument("--hang-after", type=int, help="第 N+1 次 go 起不再响应")
+    engine = FakeEngine(parser.parse_args())
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
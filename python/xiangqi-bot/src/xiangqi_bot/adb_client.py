@@ -2,10 +2,22 @@
 
 列表/截图/点击走 ppadb（127.0.0.1:5037）；无线连接（`adb connect`）调用本机
 platform-tools 的 adb.exe（ppadb 不支持配对/连接）。只支持已配对的设备。
+
+截图默认走原始帧缓冲（`screencap` 不带 -p）：设备端省去 PNG 编码、主机端省去 PNG 解码，
+像素数据由 np.frombuffer 直接包装，只做一次 RGBA→BGR 通道转换。
+
+InputShell 维持一个常驻 shell 会话逐行写入输入命令（免去每次点击新建 shell 连接），
+整步走棋（点起子 → 停顿 → 点落子）作为一条命令下发、在设备端按时序执行；
+可选 sendevent 直接写触摸事件，跳过 `input` 命令每次启动的 JVM。
 """
 
+import contextlib
+import itertools
 import re
+import struct
 import subprocess
+import threading
+import time
 
 import cv2
 import numpy as np
@@ -19,6 +31,17 @@ class AdbError(RuntimeError):
 
 KEYCODE_BACK = 4  # Android 返回键
 
+# screencap 原始输出头：宽、高、像素格式（Android 8+ 另有 4 字节色彩空间）
+_RAW_HEADER = struct.Struct("<3I")
+_RAW_HEADER_SIZES = (12, 16)
+# 像素格式 (android.graphics.PixelFormat) -> 转 BGR 的 cvtColor 代码；均为 4 字节/像素
+_RAW_FORMATS = {
+    1: cv2.COLOR_RGBA2BGR,  # RGBA_8888
+    2: cv2.COLOR_RGBA2BGR,  # RGBX_8888（X 通道忽略）
+    5: cv2.COLOR_BGRA2BGR,  # BGRA_8888
+}
+_RECV_CHUNK = 1 << 20
+
 
 def _client() -> AdbClient:
     return AdbClient(host="127.0.0.1", port=5037)
@@ -61,8 +84,15 @@ def get_device(serial: str) -> Device:
     raise AdbError(f"设备 {serial} 不在线")
 
 
-def screencap(device: Device) -> np.ndarray | None:
-    """截图并解码为 BGR 图像，失败返回 None"""
+def screencap(device: Device, raw: bool = False) -> np.ndarray | None:
+    """截图并解码为 BGR 图像，失败返回 None。
+
+    raw=True 走原始帧缓冲；设备返回不支持的像素格式时回退 PNG 截图。
+    """
+    if raw:
+        img = screencap_raw(device)
+        if img is not None:
+            return img
     try:
         data = device.screencap()
     except (RuntimeError, OSError) as exc:
@@ -72,6 +102,160 @@ def screencap(device: Device) -> np.ndarray | None:
     return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
 
 
+def screencap_raw(device: Device) -> np.ndarray | None:
+    """`exec:screencap` 原始帧缓冲截图（exec 通道不经 pty，二进制不被改写），失败抛 AdbError"""
+    try:
+        conn = device.create_connection()
+        with conn:
+            conn.send("exec:screencap")
+            data = bytearray()
+            while chunk := conn.socket.recv(_RECV_CHUNK):
+                data += chunk
+    except (RuntimeError, OSError) as exc:
+        raise AdbError(f"截图失败：{exc}") from exc
+    return decode_raw(data)
+
+
+def decode_raw(data: bytes | bytearray) -> np.ndarray | None:
+    """解析 screencap 原始输出为 BGR 图像；数据不完整或像素格式不支持返回 None。
+
+    像素区按头部之后的 宽x高x4 字节用 np.frombuffer 零拷贝包装，
+    头部长度由总长度反推（兼容 12/16 字节两种头）。
+    """
+    if len(data) < _RAW_HEADER.size:
+        return None
+    w, h, fmt = _RAW_HEADER.unpack_from(data)
+    code = _RAW_FORMATS.get(fmt)
+    size = w * h * 4
+    offset = len(data) - size
+    if code is None or offset not in _RAW_HEADER_SIZES:
+        return None
+    pixels = np.frombuffer(data, np.uint8, count=size, offset=offset).reshape(h, w, 4)
+    return cv2.cvtColor(pixels, code)
+
+
+class InputShell:
+    """常驻 shell 输入通道（线程安全）。
+
+    每条命令后追加 `echo <标记>` 并读到标记为止：既同步等待设备执行完毕（调用返回即
+    输入已生效），也顺带排空输出。连接断开时自动重连一次，仍失败抛 AdbError。
+    sendevent=True 时点击改写触摸事件（按 `getevent -p` 探测触摸屏设备与坐标范围），
+    探测失败自动回退 `input tap`。
+    """
+
+    def __init__(self, device: Device, sendevent: bool = False, timeout: float = 10.0) -> None:
+        self._device = device
+        self._sendevent = sendevent
+        self._timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
+        self._markers = itertools.count(1)
+        self._touch: tuple[str, float, float] | None = None  # (设备节点, x 比例, y 比例)
+        self._touch_probed = False
+        self._tracking = itertools.count(1)
+
+    def tap(self, x: int, y: int) -> None:
+        self.run(self._tap_script(x, y))
+
+    def keyevent(self, keycode: int) -> None:
+        self.run(f"input keyevent {keycode}")
+
+    def move(self, x1: int, y1: int, x2: int, y2: int, hold_ms: int) -> None:
+        """整步走棋：点起子 → 设备端停顿 hold_ms → 点落子，一次往返"""
+        hold = f"sleep {hold_ms / 1000:.3f}"
+        self.run(f"{self._tap_script(x1, y1)}; {hold}; {self._tap_script(x2, y2)}")
+
+    def run(self, script: str) -> str:
+        """执行一行 shell 脚本并等待完成，返回其输出（不含完成标记）"""
+        with self._lock:
+            try:
+                return self._run(script)
+            except (RuntimeError, OSError) as exc:
+                self._close()
+                raise AdbError(f"输入通道失败：{exc}") from exc
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _send(self, line: bytes) -> None:
+        """写入一行；复用的连接已失效（设备重连等）时重开一次再写（命令尚未下发，不会重复执行）"""
+        if self._conn is not None:
+            try:
+                self._conn.socket.sendall(line)
+            except OSError:
+                self._close()
+            else:
+                return
+        conn = self._device.create_connection()
+        conn.send("exec:sh")
+        self._conn = conn
+        conn.socket.sendall(line)
+
+    def _run(self, script: str) -> str:
+        marker = f"__xqb_{next(self._markers)}__".encode()
+        self._send(script.encode() + b"; echo " + marker + b"\n")
+        sock = self._conn.socket
+        data = b""
+        deadline = time.monotonic() + self._timeout
+        while marker not in data:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise OSError("等待输入命令完成超时")
+            sock.settimeout(remaining)
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise OSError("连接已关闭")
+            data += chunk
+        return data.split(marker)[0].decode("utf-8", "replace")
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            with contextlib.suppress(OSError):
+                self._conn.close()
+            self._conn = None
+
+    def _tap_script(self, x: int, y: int) -> str:
+        touch = self._touch_device() if self._sendevent else None
+        if touch is None:
+            return f"input tap {x} {y}"
+        node, sx, sy = touch
+        tid = next(self._tracking)
+        events = (
+            (3, 57, tid),  # ABS_MT_TRACKING_ID
+            (3, 53, round(x * sx)),  # ABS_MT_POSITION_X
+            (3, 54, round(y * sy)),  # ABS_MT_POSITION_Y
+            (1, 330, 1),  # BTN_TOUCH 按下
+            (0, 0, 0),  # SYN_REPORT
+            (3, 57, 0xFFFFFFFF),  # 抬起（tracking id = -1）
+            (1, 330, 0),
+            (0, 0, 0),
+        )
+        return "; ".join(f"sendevent {node} {t} {c} {v}" for t, c, v in events)
+
+    def _touch_device(self) -> tuple[str, float, float] | None:
+        """探测触摸屏设备节点与 屏幕坐标 -> 触摸坐标 比例（只探测一次）"""
+        if self._touch_probed:
+            return self._touch
+        self._touch_probed = True
+        size = screen_size(self._device)
+        out = self.run("getevent -p")
+        node: str | None = None
+        axes: dict[str, int] = {}
+        for line in out.splitlines():
+            head = re.match(r"add device \d+: (\S+)", line)
+            if head:
+                node, axes = head.group(1), {}
+            axis = re.search(r"\b(0035|0036)\s*:.*\bmax (\d+)", line)
+            if node is not None and axis:
+                axes[axis.group(1)] = int(axis.group(2))
+                if size is not None and len(axes) == 2:
+                    w, h = size
+                    self._touch = (node, (axes["0035"] + 1) / w, (axes["0036"] + 1) / h)
+                    return self._touch
+        return None
+
+
 def tap(device: Device, x: int, y: int) -> None:
     """模拟点击，失败抛 AdbError"""
     try:
@@ -9,8 +9,16 @@ e9 恒为黑将、e0 恒为红帥。网格 <-> 记谱的换算与红黑方相关
 
 FEN 为 ICCS 绝对坐标系（黑方在上），不随我方红黑变化；
 从网格生成 FEN 时按红黑方处理行列翻转。
+
+逐帧热路径（识别对比、快照、开局/认输判断、FEN）用紧凑的 int8 10x9 编码数组
+（`Codes`，0=空格，1..14 按 PIECE_FEN 顺序），`encode`/`decode` 与 Board 互转；
+Board（棋子 ID 嵌套列表）保留给控制层状态与网页推送。
 """
 
+import re
+
+import numpy as np
+
 from xiangqi_bot import config
 
 # 棋子 ID（模板文件名去扩展名）-> FEN 字符（黑小写/红大写）
@@ -50,10 +58,21 @@ PIECE_CN: dict[str, str] = {
 }
 
 Board = list[list[str | None]]
+Codes = np.ndarray  # (ROWS, COLS) int8 棋子编码
 
 ROWS = 10
 COLS = 9
 
+# 棋子编码：0 为空格，其余按 PIECE_FEN 顺序 1..14（黑 1..7、红 8..14）
+EMPTY = 0
+PIECE_IDS: tuple[str, ...] = tuple(PIECE_FEN)
+PIECE_CODE: dict[str, int] = {pid: i + 1 for i, pid in enumerate(PIECE_IDS)}
+RED_MIN_CODE = PIECE_CODE["r_R"]
+_CODE_OF: dict[str | None, int] = {None: EMPTY, **PIECE_CODE}
+_ID_OF: tuple[str | None, ...] = (None, *PIECE_IDS)
+_FEN_CHARS = np.array(["1", *(PIECE_FEN[pid] for pid in PIECE_IDS)])
+_EMPTY_RUN = re.compile(r"1+")
+
 # 各棋子开局时的默认网格位置（红色在下、黑色在上），用于轮次推断
 START_SQUARES: dict[str, tuple[tuple[int, int], ...]] = {
     "b_r": ((0, 0), (0, 8)),
@@ -72,6 +91,44 @@ START_SQUARES: dict[str, tuple[tuple[int, int], ...]] = {
     "r_P": ((6, 0), (6, 2), (6, 4), (6, 6), (6, 8)),
 }
 
+# 仕士 / 相象的可达位置（下方一方；上方一方按行镜像 r -> 9-r），将帥限九宫
+_ADVISOR_SQUARES = ((9, 3), (9, 5), (8, 4), (7, 3), (7, 5))
+_BISHOP_SQUARES = ((9, 2), (9, 6), (7, 0), (7, 4), (7, 8), (5, 2), (5, 6))
+_PALACE_SQUARES = tuple((r, c) for r in range(7, 10) for c in range(3, 6))
+_placement_cache: dict[str | None, np.ndarray] = {}
+
+
+def placement_mask(my_side: str | None = None) -> np.ndarray:
+    """各棋子按走子规则可能出现的网格位置：(ROWS, COLS, 15) 布尔表，按棋子编码索引（0=空格恒真）。
+
+    我方在下：仕士 5 格、相象 7 格、将帥九宫 9 格；兵卒不后退，过河前只在本列（兵林线与
+    河沿两行的 5 个兵位）；車馬炮不限。my_side 为 None（尚未判方）时取两种朝向的并集。
+    """
+    if my_side not in _placement_cache:
+        if my_side is None:
+            mask = placement_mask("red") | placement_mask("black")
+        else:
+            mask = np.zeros((ROWS, COLS, len(PIECE_IDS) + 1), bool)
+            mask[:, :, EMPTY] = True
+            for pid in PIECE_IDS:
+                layer = mask[:, :, PIECE_CODE[pid]]
+                kind = pid[2].lower()
+                if kind in "rnc":
+                    layer[:] = True
+                    continue
+                if kind == "p":
+                    layer[:5] = True  # 过河后可横走
+                    layer[5:7, ::2] = True
+                else:
+                    squares = {"a": _ADVISOR_SQUARES, "b": _BISHOP_SQUARES, "k": _PALACE_SQUARES}
+                    for r, c in squares[kind]:
+                        layer[r, c] = True
+                if (pid[0] == "r") != (my_side == "red"):
+                    layer[:] = layer[::-1].copy()  # 对方在上：行镜像
+            mask.flags.writeable = False
+        _placement_cache[my_side] = mask
+    return _placement_cache[my_side]
+
 
 def corrected_center(r: int, c: int) -> tuple[float, float]:
     """网格 -> 矫正棋盘中心坐标（矫正空间恒为 900x1000，与源分辨率无关）"""
@@ -104,8 +161,35 @@ def make_empty_board() -> Board:
     return [[None for _ in range(COLS)] for _ in range(ROWS)]
 
 
+def encode(board: Board | Codes) -> Codes:
+    """Board -> int8 编码数组；已是编码数组时原样返回（不复制）"""
+    if isinstance(board, np.ndarray):
+        return board
+    return np.array([[_CODE_OF[p] for p in row] for row in board], np.int8)
+
+
+def decode(codes: Codes) -> Board:
+    """int8 编码数组 -> Board"""
+    return [[_ID_OF[v] for v in row] for row in codes.tolist()]
+
+
+def piece_id(code: int) -> str | None:
+    """编码 -> 棋子 ID（0 返回 None）"""
+    return _ID_OF[code]
+
+
+def red_mask(codes: Codes) -> np.ndarray:
+    """红子所在格的布尔掩码"""
+    return codes >= RED_MIN_CODE
+
+
+def black_mask(codes: Codes) -> np.ndarray:
+    """黑子所在格的布尔掩码"""
+    return (codes > EMPTY) & (codes < RED_MIN_CODE)
+
+
 def fen_of_board(
-    board: Board,
+    board: Board | Codes,
     side: str,
     to_move: str | None = None,
     halfmove_clock: int = 0,
@@ -120,24 +204,11 @@ def fen_of_board(
     我方为黑方时（屏幕棋盘翻转），行列均反转后再写入 FEN。
     """
     side_char = {"red": "w", "black": "b"}[to_move if to_move is not None else side]
-    rows = range(ROWS - 1, -1, -1) if side == "black" else range(ROWS)
-    lines: list[str] = []
-    for r in rows:
-        parts: list[str] = []
-        empty = 0
-        cols = range(COLS - 1, -1, -1) if side == "black" else range(COLS)
-        for c in cols:
-            piece = board[r][c]
-            if piece is None:
-                empty += 1
-            else:
-                if empty:
-                    parts.append(str(empty))
-                    empty = 0
-                parts.append(PIECE_FEN[piece])
-        if empty:
-            parts.append(str(empty))
-        lines.append("".join(parts))
+    codes = encode(board)
+    if side == "black":
+        codes = codes[::-1, ::-1]
+    chars = _FEN_CHARS[codes]
+    lines = [_EMPTY_RUN.sub(lambda m: str(len(m.group())), "".join(row)) for row in chars]
     return f"{'/'.join(lines)} {side_char} - - {halfmove_clock} 1"
 
 
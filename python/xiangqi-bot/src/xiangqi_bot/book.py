@@ -0,0 +1,186 @@
+"""开局库：按 Zobrist 键排序的二进制记录文件，mmap 后二分查找。
+
+文件格式：8 字节魔数 + 定长记录 (key: u64, move: u16, weight: u16)，按 key 升序。
+key 为局面（布局 + 行棋方，ICCS 绝对坐标，与我方红黑无关）的 Zobrist 哈希；
+move 编码为 起点格 * 90 + 终点格（格 = rank * 9 + file）；同一局面的多条记录
+按 weight 取最高者。查询只触及二分路径上的几页，整库无需读入内存。
+
+`build` 从 (FEN, 着法, 权重) 序列生成库文件（同局面同着法权重累加）；
+`game_entries` 把一盘棋的着法序列展开为逐步的 (FEN, 着法) 记录，
+供 scripts/build_book.py 从对局记录或离线引擎分析构建开局库。
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"XQBOOK1\0"
+RECORD = np.dtype([("key", "<u8"), ("move", "<u2"), ("weight", "<u2")])
+START_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1"
+
+_PIECES = "RNBAKCPrnbakcp"
+_SQUARES = 90
+# 固定种子：键值必须跨进程、跨版本稳定，库文件才能复用
+_ZOBRIST = np.random.default_rng(0x58514B).integers(
+    0, 2**64, size=(len(_PIECES), _SQUARES), dtype=np.uint64, endpoint=False
+)
+_BLACK_TO_MOVE = np.uint64(0x9E3779B97F4A7C15)
+
+Squares = list[str | None]  # 90 格，下标 rank * 9 + file（rank 0 为红方底线）
+
+
+def parse_fen(fen: str) -> tuple[Squares, str]:
+    """FEN -> (90 格棋子字符, 行棋方 "w"/"b")；格式错误抛 ValueError"""
+    fields = fen.split()
+    rows = fields[0].split("/")
+    if len(rows) != 10:
+        raise ValueError(f"FEN 行数错误：{fen}")
+    squares: Squares = [None] * _SQUARES
+    for i, row in enumerate(rows):
+        rank, file = 9 - i, 0
+        for ch in row:
+            if ch.isdigit():
+                file += int(ch)
+            elif ch in _PIECES and file < 9:
+                squares[rank * 9 + file] = ch
+                file += 1
+            else:
+                raise ValueError(f"FEN 非法字符或越界：{fen}")
+        if file != 9:
+            raise ValueError(f"FEN 行宽错误：{fen}")
+    side = fields[1] if len(fields) > 1 else "w"
+    return squares, side
+
+
+def to_fen(squares: Squares, side: str) -> str:
+    """(90 格, 行棋方) -> FEN（回合计数固定为 0 1）"""
+    rows = []
+    for rank in range(9, -1, -1):
+        row, empty = "", 0
+        for file in range(9):
+            piece = squares[rank * 9 + file]
+            if piece is None:
+                empty += 1
+                continue
+            row += (str(empty) if empty else "") + piece
+            empty = 0
+        rows.append(row + (str(empty) if empty else ""))
+    return f"{'/'.join(rows)} {side} - - 0 1"
+
+
+def zobrist(fen: str) -> int:
+    """局面 Zobrist 键（只看布局与行棋方）"""
+    squares, side = parse_fen(fen)
+    key = np.uint64(0)
+    for sq, piece in enumerate(squares):
+        if piece is not None:
+            key ^= _ZOBRIST[_PIECES.index(piece), sq]
+    if side == "b":
+        key ^= _BLACK_TO_MOVE
+    return int(key)
+
+
+def _square(name: str) -> int:
+    file, rank = ord(name[0]) - ord("a"), int(name[1:])
+    if not (0 <= file < 9 and 0 <= rank < 10):
+        raise ValueError(f"非法格：{name}")
+    return rank * 9 + file
+
+
+def encode_move(move: str) -> int:
+    """UCI 着法（如 h2e2）-> u16 编码"""
+    return _square(move[:2]) * _SQUARES + _square(move[2:4])
+
+
+def decode_move(code: int) -> str:
+    src, dst = divmod(int(code), _SQUARES)
+    return "".join(f"{chr(ord('a') + sq % 9)}{sq // 9}" for sq in (src, dst))
+
+
+def play(fen: str, move: str) -> str:
+    """在 fen 上走一步（不校验合法性，只要求起点有子），返回新 FEN"""
+    squares, side = parse_fen(fen)
+    src, dst = _square(move[:2]), _square(move[2:4])
+    if squares[src] is None:
+        raise ValueError(f"着法 {move} 起点无子：{fen}")
+    squares[dst], squares[src] = squares[src], None
+    return to_fen(squares, "b" if side == "w" else "w")
+
+
+def game_entries(
+    moves: Sequence[str], start_fen: str = START_FEN, max_ply: int | None = None
+) -> list[tuple[str, str]]:
+    """一盘棋 -> 逐步 (走子前 FEN, 着法)，最多前 max_ply 步；遇到无法走的着法即截断"""
+    entries: list[tuple[str, str]] = []
+    fen = start_fen
+    for move in moves[:max_ply]:
+        try:
+            nxt = play(fen, move)
+        except ValueError:
+            break
+        entries.append((fen, move))
+        fen = nxt
+    return entries
+
+
+def build(entries: Iterable[tuple[str, str, int]], path: Path) -> int:
+    """(FEN, 着法, 权重) -> 排序后的库文件（原子替换），返回记录数"""
+    weights: dict[tuple[int, int], int] = defaultdict(int)
+    for fen, move, weight in entries:
+        weights[zobrist(fen), encode_move(move)] += weight
+    records = np.zeros(len(weights), RECORD)
+    for i, ((key, move), weight) in enumerate(weights.items()):
+        records[i] = (key, move, min(weight, 0xFFFF))
+    records.sort(order=["key", "move"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        f.write(records.tobytes())
+    tmp.replace(path)
+    return len(records)
+
+
+class OpeningBook:
+    """只读开局库（首次查询时 mmap；文件不存在或格式不符时视为空库）"""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._records: np.ndarray | None = None
+        self._loaded = False
+
+    def _open(self) -> np.ndarray | None:
+        if not self._loaded:
+            self._loaded = True
+            try:
+                with self._path.open("rb") as f:
+                    magic = f.read(len(MAGIC))
+                size = self._path.stat().st_size - len(MAGIC)
+                if magic == MAGIC and size > 0 and size % RECORD.itemsize == 0:
+                    self._records = np.memmap(self._path, RECORD, mode="r", offset=len(MAGIC))
+            except OSError:
+                self._records = None
+        return self._records
+
+    def __len__(self) -> int:
+        records = self._open()
+        return 0 if records is None else len(records)
+
+    def probe(self, fen: str) -> list[tuple[str, int]]:
+        """局面的全部库着法 [(着法, 权重)]，按权重降序"""
+        records = self._open()
+        if records is None:
+            return []
+        key = np.uint64(zobrist(fen))
+        keys = records["key"]
+        lo = int(np.searchsorted(keys, key, "left"))
+        hi = int(np.searchsorted(keys, key, "right"))
+        hits = [(decode_move(r["move"]), int(r["weight"])) for r in records[lo:hi]]
+        return sorted(hits, key=lambda h: -h[1])
+
+    def best(self, fen: str) -> str | None:
+        """权重最高的库着法；不在库中返回 None"""
+        hits = self.probe(fen)
+        return hits[0][0] if hits else None
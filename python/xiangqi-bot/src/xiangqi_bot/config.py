@@ -5,7 +5,11 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 PIKAFISH_DIR = PROJECT_ROOT / "pikafish"
 PIKAFISH_EXE = PIKAFISH_DIR / "pikafish-bmi2.exe"
 TEMPLATES_DIR = PROJECT_ROOT / "templates"
+PIECE_SKINS_DIR = TEMPLATES_DIR / "pieces"  # 棋子模板包：每种盘面皮肤一个子目录（14 张 PNG）
 GAMEOVER_TEXT_DIR = TEMPLATES_DIR / "text"
+TEMPLATE_CACHE_DIR = PROJECT_ROOT / ".cache" / "templates"  # 模板解码/预计算磁盘缓存
+SEARCH_CACHE_PATH = PROJECT_ROOT / ".cache" / "search.sqlite3"  # 引擎搜索结果缓存
+BOOK_PATH = PROJECT_ROOT / "book" / "opening.bin"  # 开局库（scripts/build_book.py 生成）
 WEB_DIR = Path(__file__).resolve().parent / "web"
 
 # 矫正棋盘：按截图分辨率 (宽, 高) 查四角格中心坐标 (左上, 右上, 左下, 右下)
@@ -18,14 +22,43 @@ CORRECT_W = CORRECT_CELL * 9  # 900
 CORRECT_H = CORRECT_CELL * 10  # 1000
 TEMPLATE_SIZE = 60  # 棋子模板边长
 
+# 截图
+# 原始帧缓冲截图（跳过设备端 PNG 编码与主机端解码，但每帧传输 宽x高x4 字节，远大于 PNG），
+# 不支持时回退 PNG。端到端收益取决于 ADB 链路带宽，先用 scripts/bench_screencap.py 实测再开启
+SCREENCAP_RAW = False
+FRAME_PRODUCER = True  # 自动对弈期间由后台线程预取截图（传输与上一帧识别重叠）
+FRAME_RING_SIZE = 3  # 帧缓冲保留帧数
+FRAME_MAX_AGE_MS = 200  # 预取帧截取完成距今超过此值视为过期，重新截图
+FRAME_TIMEOUT_S = 10  # 等待一帧的超时（秒）
+FRAME_RETRY_MS = 500  # 截图失败后后台线程退避
+
 # 图片识别（矫正空间，像素）
 DIFF_WINDOW = 10  # 中心点对比窗口边长
 DIFF_THRESHOLD = 8  # 平均绝对差超过此值视为有变化
 MATCH_SEARCH_HALF = 10  # 模板匹配滑动半径
 EMPTY_MATCH_THRESHOLD = 0.8  # 低于此值判为空格
+# 批量匹配分子的计算后端："fft"（逐频点矩阵乘）或 "ncc"（滑窗展开后整块矩阵乘，走多线程 BLAS）
+MATCH_BACKEND = "fft"
+# 按棋子可能出现的位置（九宫/象位/兵位）裁剪各格候选模板；调试时关闭即全模板扫描
+TEMPLATE_PRUNE = True
+# 匹配前按格心颜色把格子分为空/红/黑：空格不匹配，有子格只比同色 7 张模板
+COLOR_PRECLASSIFY = True
+DEFAULT_SKIN = "木"  # 尚未挑选模板包时使用的皮肤
+SKIN_CHECK_INTERVAL = 30  # 对局中每隔多少帧检查一次当前模板包的平均匹配分
+# 模板包贴合度（有子格平均最大匹配分）实测：贴合的包 0.96~0.99，另一包 0.94~0.96，结算弹窗约 0.2。
+# 复查时比挑选当时的分数低 SKIN_SCORE_DROP 即重新挑选（未挑选过则按 SKIN_RECHECK_SCORE）；
+# 换包要求新包分数不低于 SKIN_MIN_SCORE，弹窗等无棋盘画面不会换包
+SKIN_SCORE_DROP = 0.02
+SKIN_RECHECK_SCORE = 0.97
+SKIN_MIN_SCORE = 0.93
+CORRECT_CELLS_ONLY = True  # 逐帧截图只矫正 90 格搜索窗口（识别只读这些区域）
+RECOGNITION_INCREMENTAL = True  # 逐帧识别只重匹配格心有变化的格子
+RECOGNITION_FULL_INTERVAL = 10  # 增量识别每隔多少帧整盘复核一次（防止缓慢变化累积漂移）
 
 # 我方走棋
 TAP_HOLD_INTERVAL_MS = 400  # 起子→落子间隔
+INPUT_PERSISTENT = True  # 点击/按键走常驻 shell 通道，整步走棋一次下发（设备端按间隔执行）
+INPUT_SENDEVENT = False  # 点击直接写触摸事件（免 input 命令启动开销；依赖设备触摸驱动，默认关）
 MOVE_SETTLE_MS = 500  # 落子后校验截图前等待
 MOVE_VERIFY_COUNT = 5  # 校验截图次数
 SELF_MOVE_ATTEMPTS = 2  # 整步重试上限（_do_move 外层循环）
@@ -39,11 +72,31 @@ RESIGN_CONFIRM_COUNT = 3  # 连续几帧确认
 RESIGN_SUSPECT_WAIT_MS = 1000  # 单帧疑似结束时延时再采样
 
 # 引擎
-ENGINE_MOVETIME_MS = 1000  # go movetime（毫秒）
+ENGINE_MOVETIME_MS = 1000  # go movetime 基准（毫秒），自适应时按局面缩放
+ENGINE_TIME_ADAPTIVE = True  # 按阶段/着法数/分数波动/杀棋/整局预算逐步分配思考时间
+ENGINE_MIN_MOVETIME_MS = 300  # 自适应思考时间下限
+ENGINE_MAX_MOVETIME_MS = 3000  # 自适应思考时间上限
+ENGINE_GAME_BUDGET_MS = 600_000  # 每局我方思考总预算（毫秒）
+ENGINE_EARLY_STOP = 0.4  # 思考超过时限的该比例后，主变稳定即提前 stop（0 关闭）
+ENGINE_STABLE_DEPTHS = 4  # 主变首着连续不变的层数
+ENGINE_STABLE_CP = 30  # 这几层分数波动上限（厘兵）
 ENGINE_THREADS = 12
 ENGINE_HASH_MB = 2048
 ENGINE_MATE_PROBE_MS = 200  # 绝杀探测短时限
+ENGINE_PONDER = True  # 对方思考期间按预测回应后台思考（命中时 ponderhit 直接出着）
+ENGINE_SPECULATE = True  # 对方思考期间在空闲引擎实例上预算对方可能应着下我方的回应
+ENGINE_SPECULATE_K = 3  # 预算对方最可能的几种应着（不含 ponder 已覆盖的预测）
+ENGINE_SPECULATE_MS = 300  # 取对方候选应着的 MultiPV 搜索时间
 ENGINE_RULE60_MAX_PLY = 60  # 自然限招（60 步不吃子判和，对应平台规则）
+ENGINE_POOL_SIZE = 0  # 引擎池进程数（所有会话共享），0 = 按 CPU 核数与物理内存自动估算
+ENGINE_POOL_WAIT_S = 30  # 等待空闲引擎实例的上限（秒），超时按引擎异常处理
+# 搜索进度（analysis 事件）推给网页的最短间隔，期间的 info 合并为最新一条
+ANALYSIS_INTERVAL_MS = 250
+SEARCH_CACHE = True  # 按局面缓存引擎搜索结果（跨对局持久化，命中时不再思考）
+SEARCH_CACHE_SIZE = 200_000  # 缓存条目上限（LRU 淘汰）
+SEARCH_CACHE_MAX_CLOCK = 20  # halfmove clock 超过此值的局面不缓存（限着/重复局面依赖历史）
+BOOK_ENABLED = True  # 开局阶段优先查开局库（库文件不存在时自动跳过）
+BOOK_MAX_PLY = 16  # 只在开局前 N 个半回合内查库
 
 # 残局判断
 ENDGAME_PIECE_COUNT = 24  # 少于此值视为残局
@@ -64,3 +117,19 @@ GAMEOVER_BACK_WORDS = ("段位提升", "铜钱", "领取")  # 遮罩类（发返
 DRAW_TEXT_DIR = TEMPLATES_DIR / "draw"
 DRAW_TEXT_THRESHOLD = 0.75  # 模板匹配阈值
 DRAW_REJECT_CP = 1000  # 我方优势超过此值（厘兵，100≈1兵）则拒绝和棋，否则同意
+
+# 文字识别 ROI：模板名 -> 纵向范围 (上, 下)，按缩放到 GAMEOVER_TEMPLATE_W 宽度后的截图高度比例；
+# 未列出的模板扫整帧
+TEXT_ROI: dict[str, tuple[float, float]] = {
+    "段位提升": (0.0, 0.2),
+    "铜钱": (0.35, 0.75),
+    "领取": (0.35, 0.75),
+    "下一关": (0.8, 1.0),
+    "晋级赛": (0.8, 1.0),
+    "重新挑战": (0.8, 1.0),
+    "再来一局": (0.8, 1.0),
+    "和棋_同意": (0.45, 0.65),
+    "和棋_拒绝": (0.45, 0.65),
+}
+TEXT_PREGATE_SCALE = 4  # 和棋弹窗预筛：ROI 与模板缩小倍数
+TEXT_PREGATE_THRESHOLD = 0.6  # 预筛粗匹配分低于此值视为无弹窗，跳过全分辨率匹配
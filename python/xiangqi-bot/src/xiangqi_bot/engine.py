@@ -1,44 +1,193 @@
 """pikafish UCI 客户端（长进程复用）。
 
-每局只启动一个引擎子进程，走棋之间复用连接（`position fen` + `go movetime`），
-避免反复重建进程的开销。`quit` 只在引擎结束前发送一次。
+每个实例只启动一个引擎子进程，走棋之间复用连接（`position fen` + `go movetime`），
+避免反复重建进程的开销；会话经 engine_pool 按请求租借实例。局面可带着法历史（`position fen <起始局面> moves ...`），
+引擎据此识别重复局面并在走棋之间复用搜索状态。`quit` 只在引擎结束前发送一次。
 引擎无响应或进程退出（Windows 写管道可能抛 [Errno 22]）时会自动重建并重试一次，
 失败一律抛 EngineError，避免裸 OSError 击穿调用方。
+
+输出读取是事件驱动的：读线程逐行解析，uciok/readyok/bestmove 到达即通过 Condition
+唤醒等待者（无轮询延迟，进程退出时等待者立即失败）；info 行解析为 InfoRecord，
+每个 multipv 只保留最新一条，内存占用不随引擎输出量增长。设置 on_info 回调后，
+主变（multipv 1）的每条 info 在读线程上实时回调（搜索进度推送）。
+
+搜索结果缓存（search_cache）：best_move 先按当前局面查 SQLite 缓存，命中直接返回；
+带着法历史的局面由调用方传入当前局面 FEN（key）作为缓存键。
+
+后台思考（ponder）：我方走完后 `ponder()` 在预测的对方回应局面上 `go ponder`，
+对方实际走法命中时 `ponder_hit()` 发 ponderhit 直接取结果（思考时间从 go 起算，
+多半已用完，立即返回）；未命中或要做其它搜索时先 `stop` 并吃掉这次 bestmove。
+
+搜索限制（SearchLimits，由 game.timing 按局面逐步给出）：movetime 为上限，可附带
+`depth`（已知杀棋/唯一着法）；给出 stable_ms 时，过了这段时间且主变首着连续
+ENGINE_STABLE_DEPTHS 层不变、分数波动不超过 ENGINE_STABLE_CP 就提前 `stop`。
+各层主变分数的波动（volatility）随结果返回，供下一步分配思考时间。
 """
 
 import subprocess
 import threading
 import time
-from collections import deque
+from collections.abc import Callable, Sequence
 from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
 from typing import IO
 
 from xiangqi_bot import config
+from xiangqi_bot.search_cache import SearchCache
+
+MATE_SCORE = 100000  # score mate N 映射为 ±(MATE_SCORE-|N|)
+_MATE_BAND = 1000  # |score| 超过 MATE_SCORE - _MATE_BAND 视为杀棋分
+_VOLATILITY_DEPTHS = 6  # 波动取最近几层主变分数
+
+_INFO_INTS = ("depth", "seldepth", "multipv", "nodes", "nps", "time")
+_MARKERS = ("uciok", "readyok", "bestmove", "id")
 
 
 class EngineError(RuntimeError):
     pass
 
 
+def mate_in(score: int) -> int | None:
+    """杀棋分 -> 步数（正=行棋方 N 步杀，负=被杀）；普通分数返回 None"""
+    if abs(score) < MATE_SCORE - _MATE_BAND:
+        return None
+    return MATE_SCORE - score if score > 0 else -MATE_SCORE - score
+
+
+def position_command(fen: str, moves: Sequence[str] = ()) -> str:
+    """UCI position 命令：起始 FEN + 之后的着法序列（可为空）"""
+    return f"position fen {fen} moves {' '.join(moves)}" if moves else f"position fen {fen}"
+
+
+@dataclass(frozen=True)
+class InfoRecord:
+    """一条带分数的 info 行（score 为厘兵，正=当前行棋方占优；mate 映射 ±MATE_SCORE）"""
+
+    depth: int = 0
+    seldepth: int = 0
+    multipv: int = 1
+    score: int = 0
+    mate: int | None = None  # score mate N 的 N，cp 分数时为 None
+    bound: str | None = None  # lowerbound / upperbound（非精确分数）
+    nodes: int = 0
+    nps: int = 0
+    time: int = 0  # 毫秒
+    pv: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class SearchLimits:
+    """一次搜索的限制（见模块说明）"""
+
+    movetime_ms: int
+    depth: int | None = None  # 限深；None 不限
+    stable_ms: int = 0  # 过了多久允许主变稳定时提前 stop；0 不提前
+
+    def go_command(self) -> str:
+        cmd = f"go movetime {self.movetime_ms}"
+        return cmd if self.depth is None else f"{cmd} depth {self.depth}"
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """一次搜索的结果：bestmove 行 + 各 multipv 的最新 info"""
+
+    move: str | None  # (none) 映射为 None
+    ponder: str | None
+    infos: tuple[InfoRecord, ...] = ()  # 按 multipv 升序
+    volatility: int = 0  # 最近几层主变分数的极差（厘兵，杀棋分截断到 ±_MATE_BAND）
+    stopped_early: bool = False  # 主变稳定而提前 stop
+
+    @property
+    def score(self) -> int:
+        """主变（multipv 1）最深一层的分数；无 score 行为 0"""
+        return self.infos[0].score if self.infos else 0
+
+
+def parse_info(line: str) -> InfoRecord | None:
+    """解析 `info ... score ...` 行；无分数的 info（currmove/string 等）返回 None"""
+    tokens = line.split()
+    if len(tokens) < 2 or tokens[0] != "info" or tokens[1] == "string":
+        return None
+    fields: dict[str, int] = {}
+    score: int | None = None
+    mate: int | None = None
+    bound: str | None = None
+    pv: tuple[str, ...] = ()
+    i = 1
+    while i < len(tokens):
+        tok = tokens[i]
+        if tok == "pv":
+            pv = tuple(tokens[i + 1 :])
+            break
+        if tok in ("lowerbound", "upperbound"):
+            bound = tok
+        elif tok in _INFO_INTS and i + 1 < len(tokens):
+            with suppress(ValueError):
+                fields[tok] = int(tokens[i + 1])
+            i += 1
+        elif tok == "score" and i + 2 < len(tokens):
+            kind = tokens[i + 1]
+            with suppress(ValueError):
+                val = int(tokens[i + 2])
+                if kind == "cp":
+                    score = val
+                elif kind == "mate":
+                    mate = val
+                    score = MATE_SCORE - val if val > 0 else -MATE_SCORE - val
+            i += 2
+        i += 1
+    if score is None:
+        return None
+    return InfoRecord(score=score, mate=mate, bound=bound, pv=pv, **fields)
+
+
 class Engine:
     """pikafish 长进程 UCI 会话（线程安全：调用方需用同一线程串行，内部亦有锁）"""
 
-    # 引擎输出行缓冲上限（防止后台 _drain 线程在无 best_move 调用时无限增长）
-    _MAX_LINES = 2000
-
-    def __init__(self) -> None:
+    def __init__(self, command: Sequence[str] | None = None, cwd: Path | None = None) -> None:
+        # 引擎命令行（默认 pikafish；测试/基准可换 scripts/fake_uci.py 替身）与工作目录
+        self._command = list(command) if command else [str(config.PIKAFISH_EXE)]
+        self._cwd = cwd or config.PIKAFISH_DIR
         self._proc: subprocess.Popen[str] | None = None
-        self._lines: deque[str] = deque(maxlen=self._MAX_LINES)
-        self._lock = threading.Lock()
+        self._lock = threading.Lock()  # 串行化命令往返
+        # 串行化 stdin 写入（interrupt 不持 _lock 也不会写串行）
+        self._write_lock = threading.Lock()
+        # 读线程解析出的输出状态（_cond 保护，_reset_output 清空）
+        self._cond = threading.Condition()
+        self._gen = 0  # 进程代号：旧进程的读线程不得改写新进程的状态
+        self._seen: set[str] = set()  # 已收到的 uciok / readyok / bestmove
+        self._infos: dict[int, InfoRecord] = {}  # multipv -> 最新 info
+        self._bestmove: tuple[str | None, str | None] = (None, None)
+        self._trail: list[tuple[int, str, int]] = []  # 主变逐层 (depth, 首着, 分数)
+        self._eof = False  # 当前进程 stdout 已关闭（进程退出）
+        self._ponder_ms: int | None = None  # 进行中的 ponder 的 movetime（None = 未在 ponder）
+        self.ponder_move: str | None = None  # 最近一次 bestmove 附带的预测对方回应
+        self.last_result: SearchResult | None = None  # 最近一次搜索（或缓存命中）的结果
+        self.early_stops = 0  # 主变稳定提前 stop 的次数
+        # 搜索进度回调：读线程上逐条收到主变 info（须快速返回，不得调用本引擎）
+        self.on_info: Callable[[InfoRecord], None] | None = None
+        self.name: str | None = None  # UCI `id name`（缓存键的引擎标识）
+        self.cache = (
+            SearchCache(config.SEARCH_CACHE_PATH, config.SEARCH_CACHE_SIZE)
+            if config.SEARCH_CACHE
+            else None
+        )
+
+    @property
+    def pondering(self) -> bool:
+        return self._ponder_ms is not None
 
     def _write(self, stream: IO[str], line: str) -> None:
         try:
-            stream.write(line + "\n")
-            stream.flush()
+            with self._write_lock:
+                stream.write(line + "\n")
+                stream.flush()
         except (OSError, ValueError) as exc:
             raise EngineError(f"引擎进程已退出：{exc}") from exc
 
-    def _drain(self, stream: IO[str]) -> None:
+    def _drain(self, stream: IO[str], gen: int) -> None:
         while True:
             try:
                 line = stream.readline()
@@ -46,19 +195,132 @@ class Engine:
                 break
             if not line:
                 break
-            self._lines.append(line)
+            self._on_line(line, gen)
+        with self._cond:
+            if gen == self._gen:
+                self._eof = True
+                self._cond.notify_all()
+
+    def _on_line(self, line: str, gen: int | None = None) -> None:
+        """解析一行引擎输出并唤醒等待者（gen 为 None 视为当前进程）"""
+        # 按首个 token 精确匹配：info 行含 marker 子串（如 "info string hash bestmove cache"）
+        # 不会误命中
+        tokens = line.split()
+        if not tokens or tokens[0] not in ("info", *_MARKERS):
+            return
+        head = tokens[0]
+        if head == "info":
+            info = parse_info(line)
+            if info is not None:
+                self._on_info(info, gen)
+            return
+        with self._cond:
+            if gen is not None and gen != self._gen:
+                return
+            if head == "id":
+                if len(tokens) > 2 and tokens[1] == "name":
+                    self.name = " ".join(tokens[2:])
+                return
+            if head == "bestmove":
+                move = tokens[1] if len(tokens) > 1 and tokens[1] != "(none)" else None
+                ponder = tokens[3] if len(tokens) > 3 and tokens[2] == "ponder" else None
+                self._bestmove = (move, ponder)
+            self._seen.add(head)
+            self._cond.notify_all()
+
+    def _on_info(self, info: InfoRecord, gen: int | None) -> None:
+        """记下 info（每个 multipv 最新一条）；主变 info 出锁后交给 on_info 回调"""
+        with self._cond:
+            if gen is not None and gen != self._gen:
+                return
+            self._infos[info.multipv] = info
+            if info.multipv != 1:
+                return
+            if info.bound is None and info.pv:
+                self._extend_trail(info)
+        callback = self.on_info
+        if callback is not None:
+            callback(info)
+
+    def _extend_trail(self, info: InfoRecord) -> None:
+        """（持 _cond 调用）记录主变逐层首着与分数；新的一层到达时唤醒提前 stop 的判定"""
+        entry = (info.depth, info.pv[0], info.score)
+        if self._trail and self._trail[-1][0] == info.depth:
+            self._trail[-1] = entry
+            return
+        self._trail.append(entry)
+        self._cond.notify_all()
+
+    def _stable_locked(self) -> bool:
+        """（持 _cond 调用）主变是否已稳定：已见杀棋，或最近 N 层首着相同且分数波动很小"""
+        recent = self._trail[-config.ENGINE_STABLE_DEPTHS :]
+        if not recent:
+            return False
+        if mate_in(recent[-1][2]) is not None:
+            return True
+        if len(recent) < config.ENGINE_STABLE_DEPTHS:
+            return False
+        scores = [score for _, _, score in recent]
+        return (
+            len({move for _, move, _ in recent}) == 1
+            and max(scores) - min(scores) <= config.ENGINE_STABLE_CP
+        )
+
+    def _volatility_locked(self) -> int:
+        scores = [
+            max(-_MATE_BAND, min(_MATE_BAND, score))
+            for _, _, score in self._trail[-_VOLATILITY_DEPTHS:]
+        ]
+        return max(scores) - min(scores) if scores else 0
+
+    def _reset_output(self) -> None:
+        """发新命令前清空已解析的输出（marker 标记、info、主变轨迹、bestmove）"""
+        with self._cond:
+            self._seen.clear()
+            self._infos.clear()
+            self._trail.clear()
+            self._bestmove = (None, None)
 
     def _wait_for(self, marker: str, timeout: float) -> None:
-        deadline = time.monotonic() + timeout
-        while time.monotonic() < deadline:
-            # 必须严格按"行首是 marker"匹配（去掉两端空白），避免 info 行含 marker 子串
-            # （如 "info string hash bestmove cache 1234"）导致提前命中却找不到真实响应。
-            stripped = (ln.strip() for ln in reversed(self._lines))
-            if any(ln.startswith(marker + " ") or ln == marker for ln in stripped):
+        """阻塞到读线程收到 marker；超时或进程退出抛 EngineError"""
+        with self._cond:
+            self._cond.wait_for(lambda: marker in self._seen or self._eof, timeout)
+            if marker in self._seen:
                 return
-            time.sleep(0.005)  # 5ms 轮询：本地管道收发是 ms 级，不需 20ms
+            if self._eof:
+                raise EngineError(f"引擎进程已退出（等待 {marker}）")
         raise EngineError(f"引擎响应超时（等待 {marker}）")
 
+    def _wait_search(self, stdin: IO[str], limits: SearchLimits) -> bool:
+        """等待本次搜索的 bestmove；允许提前结束时，主变稳定即发 stop。返回是否提前 stop"""
+        start = time.monotonic()
+        deadline = start + limits.movetime_ms / 1000 + 1
+        stop = False
+        if limits.stable_ms > 0 and limits.depth is None:
+            check_at = start + limits.stable_ms / 1000
+            with self._cond:
+                while "bestmove" not in self._seen and not self._eof:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        break
+                    if now >= check_at and self._stable_locked():
+                        stop = True
+                        break
+                    self._cond.wait((check_at if now < check_at else deadline) - now)
+        if stop:
+            self._write(stdin, "stop")
+            self.early_stops += 1
+        self._wait_for("bestmove", max(0.0, deadline - time.monotonic()) + 1)
+        return stop
+
+    def _result(self, stopped_early: bool = False) -> SearchResult:
+        """当前已解析的 bestmove + info 快照"""
+        with self._cond:
+            move, ponder = self._bestmove
+            infos = tuple(self._infos[k] for k in sorted(self._infos))
+            volatility = self._volatility_locked()
+        return SearchResult(move, ponder, infos, volatility, stopped_early)
+
     def _kill(self, proc: subprocess.Popen[str]) -> None:
         with suppress(OSError, EngineError):
             if proc.stdin is not None:
@@ -71,22 +333,41 @@ class Engine:
     def _restart(self) -> None:
         """强制结束当前引擎进程并清空引用（下次调用 start() 会重建新进程）"""
         with self._lock:
-            proc = self._proc
-            self._proc = None
-            if proc is not None:
-                self._kill(proc)
+            self._restart_locked()
+
+    def _restart_locked(self) -> None:
+        proc = self._proc
+        self._proc = None
+        self._ponder_ms = None
+        if proc is not None:
+            self._kill(proc)
+
+    def _stop_ponder_locked(self) -> None:
+        """（持锁调用）结束进行中的 ponder：发 stop 并等到其 bestmove；引擎无响应则重建"""
+        if self._ponder_ms is None:
+            return
+        self._ponder_ms = None
+        proc = self._proc
+        if proc is None or proc.stdin is None:
+            return
+        try:
+            self._write(proc.stdin, "stop")
+            self._wait_for("bestmove", 5)
+        except EngineError:
+            self._restart_locked()
 
     def start(self) -> None:
         """启动引擎子进程并完成 UCI 初始化（幂等）"""
         with self._lock:
             if self._proc is not None:
                 return
-            if not config.PIKAFISH_EXE.exists():
-                raise EngineError(f"找不到引擎: {config.PIKAFISH_EXE}")
+            exe = Path(self._command[0])
+            if not exe.exists():
+                raise EngineError(f"找不到引擎: {exe}")
             try:
                 proc = subprocess.Popen(
-                    [str(config.PIKAFISH_EXE)],
-                    cwd=str(config.PIKAFISH_DIR),
+                    self._command,
+                    cwd=str(self._cwd),
                     stdin=subprocess.PIPE,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
@@ -99,7 +380,11 @@ class Engine:
                 proc.kill()
                 raise EngineError("引擎管道初始化失败")
             self._proc = proc
-            threading.Thread(target=self._drain, args=(proc.stdout,), daemon=True).start()
+            with self._cond:
+                self._gen += 1
+                self._eof = False
+            self._reset_output()
+            threading.Thread(target=self._drain, args=(proc.stdout, self._gen), daemon=True).start()
             try:
                 self._write(proc.stdin, "uci")
                 self._wait_for("uciok", 15)
@@ -109,6 +394,8 @@ class Engine:
                     proc.stdin,
                     f"setoption name Rule60MaxPly value {config.ENGINE_RULE60_MAX_PLY}",
                 )
+                if config.ENGINE_PONDER:
+                    self._write(proc.stdin, "setoption name Ponder value true")
                 self._write(proc.stdin, "isready")
                 self._wait_for("readyok", 15)
             except EngineError:
@@ -122,31 +409,36 @@ class Engine:
         UCI 最佳实践：每局开始前发送。引擎未启动时先启动；必须在引擎空闲时调用
         （worker 线程串行保证，调用方需确保上一着 bestmove 已返回）。
         """
+        with self._lock:
+            self._stop_ponder_locked()
         self.start()
         assert self._proc is not None
         assert self._proc.stdin is not None
         with self._lock:
-            self._lines.clear()
+            self._reset_output()
             self._write(self._proc.stdin, "ucinewgame")
             self._write(self._proc.stdin, "isready")
             self._wait_for("readyok", 15)
 
-    def _go(self, fen: str, movetime_ms: int) -> list[str]:
-        """发送 position+go 并等待 bestmove，返回本次输出行快照（含 info/bestmove）。
+    def _go(self, fen: str, limits: SearchLimits, moves: Sequence[str] = ()) -> SearchResult:
+        """发送 position+go 并等待 bestmove，返回本次搜索结果（bestmove + 最新 info）。
 
         引擎无响应或进程退出时自动重建并重试（共 3 次），仍失败抛 EngineError。
         """
         for attempt in range(3):
+            with self._lock:
+                # 先结束后台 ponder，否则它的 bestmove 会被误当作本次结果
+                self._stop_ponder_locked()
             self.start()
             assert self._proc is not None
             assert self._proc.stdin is not None
             try:
                 with self._lock:
-                    self._lines.clear()
-                    self._write(self._proc.stdin, f"position fen {fen}")
-                    self._write(self._proc.stdin, f"go movetime {movetime_ms}")
-                    self._wait_for("bestmove", movetime_ms / 1000 + 1)
-                    return list(self._lines)
+                    self._reset_output()
+                    self._write(self._proc.stdin, position_command(fen, moves))
+                    self._write(self._proc.stdin, limits.go_command())
+                    stopped = self._wait_search(self._proc.stdin, limits)
+                    return self._result(stopped)
             except (EngineError, OSError) as exc:
                 self._restart()
                 if attempt < 2:
@@ -155,35 +447,18 @@ class Engine:
                 raise EngineError(f"引擎异常：{exc}") from exc
         raise EngineError("引擎未返回 bestmove")
 
-    @staticmethod
-    def _parse_score(lines: list[str]) -> int:
-        """从引擎 info 行解析局面分数（厘兵，正=当前行棋方占优）。
-
-        score cp N 直接取 N；score mate N 映射为 ±(100000-|N|)；无 score 行返回 0。
-        取最后一条 info score（最深搜索结果）。
-        """
-        score = 0
-        for line in lines:
-            if not line.startswith("info"):
-                continue
-            tokens = line.split()
-            for i, tok in enumerate(tokens):
-                if tok == "score" and i + 2 < len(tokens):
-                    kind = tokens[i + 1]
-                    try:
-                        val = int(tokens[i + 2])
-                    except ValueError:
-                        continue
-                    if kind == "cp":
-                        score = val
-                    elif kind == "mate":
-                        score = 100000 - val if val > 0 else -100000 - val
-        return score
-
     def best_move(
-        self, fen: str, movetime_ms: int = config.ENGINE_MOVETIME_MS
+        self,
+        fen: str,
+        movetime_ms: int = config.ENGINE_MOVETIME_MS,
+        moves: Sequence[str] = (),
+        key: str | None = None,
+        limits: SearchLimits | None = None,
     ) -> tuple[str | None, int]:
-        """发送局面并返回 (bestmove, score)；无着法（终局）返回 (None, 0)。
+        """发送局面（fen 之后再走 moves）并返回 (bestmove, score)；无着法（终局）返回 (None, 0)。
+
+        key 为当前局面 FEN（缓存键），省略时无 moves 即用 fen、有 moves 则不查缓存。
+        limits 给出时取代 movetime_ms；限深搜索（结果较浅）不读写缓存。
 
         score 为引擎 info score cp/mate（厘兵，正=当前行棋方占优；mate 映射 ±100000）。
         引擎无响应（超时）或进程退出（写管道报错）时自动重建进程并重试两次；
@@ -195,16 +470,116 @@ class Engine:
         1 秒余量已足够覆盖 Windows 调度抖动 + 管道 flush 延迟；
         重试 3 次意味着即使某一次引擎假卡住（Hash/管道异常），重启后也能恢复。
         """
-        lines = self._go(fen, movetime_ms)
-        score = self._parse_score(lines)
-        for line in lines:
-            if line.startswith("bestmove"):
-                tokens = line.split()
-                if len(tokens) < 2:
-                    return None, score
-                move = tokens[1]
-                return (None if move == "(none)" else move), score
-        return None, score
+        limits = limits or SearchLimits(movetime_ms)
+        if key is None and not moves:
+            key = fen
+        if limits.depth is not None:
+            key = None
+        cached = self._cached(key, limits.movetime_ms)
+        if cached is not None:
+            return cached
+        return self._take(self._go(fen, limits, moves), key, limits.movetime_ms)
+
+    def _cached(self, key: str | None, movetime_ms: int) -> tuple[str | None, int] | None:
+        """缓存命中时返回 (着法, 分数) 并恢复 ponder 预测；引擎标识未知（未启动）时不查"""
+        if self.cache is None or key is None:
+            return None
+        with self._lock:
+            self._stop_ponder_locked()
+        self.start()
+        if self.name is None:
+            return None
+        entry = self.cache.get(key, movetime_ms, self.name)
+        if entry is None:
+            return None
+        move, score, self.ponder_move = entry
+        self.last_result = SearchResult(move, self.ponder_move)
+        return move, score
+
+    def _take(
+        self, result: SearchResult, key: str | None = None, movetime_ms: int = 0
+    ) -> tuple[str | None, int]:
+        """搜索结果 -> (着法, 分数)，顺带记录 ponder 预测（ponder_move），key 非空时写缓存"""
+        self.ponder_move = result.ponder
+        self.last_result = result
+        if self.cache is not None and key is not None and self.name is not None:
+            self.cache.put(key, movetime_ms, self.name, result.move, result.score, result.ponder)
+        return result.move, result.score
+
+    def ponder(
+        self, fen: str, moves: Sequence[str], movetime_ms: int = config.ENGINE_MOVETIME_MS
+    ) -> None:
+        """在 fen 局面走完 moves（末步为预测的对方回应）后开始后台思考，立即返回。
+
+        失败抛 EngineError。
+        `go ponder movetime`：ponder 期间不计停，ponderhit 后按 go 起算的 movetime 收尾。
+        """
+        self.start()
+        with self._lock:
+            self._stop_ponder_locked()
+            proc = self._proc
+            if proc is None or proc.stdin is None:
+                raise EngineError("引擎未启动")
+            self._reset_output()
+            try:
+                self._write(proc.stdin, position_command(fen, moves))
+                self._write(proc.stdin, f"go ponder movetime {movetime_ms}")
+            except EngineError:
+                self._restart_locked()
+                raise
+            self._ponder_ms = movetime_ms
+
+    def ponder_hit(self, key: str | None = None) -> tuple[str | None, int]:
+        """对方走法命中预测：发 ponderhit 并返回 (bestmove, score)；失败抛 EngineError（已重建）
+
+        key 为命中后的当前局面 FEN，结果按 ponder 的 movetime 写入缓存。
+        """
+        with self._lock:
+            movetime_ms = self._ponder_ms
+            proc = self._proc
+            if movetime_ms is None or proc is None or proc.stdin is None:
+                raise EngineError("没有进行中的 ponder")
+            self._ponder_ms = None
+            try:
+                self._write(proc.stdin, "ponderhit")
+                self._wait_for("bestmove", movetime_ms / 1000 + 1)
+            except EngineError:
+                self._restart_locked()
+                raise
+            result = self._result()
+        return self._take(result, key, movetime_ms)
+
+    def stop_ponder(self) -> None:
+        """放弃进行中的 ponder（未命中/对局结束）；未在 ponder 时无操作，引擎无响应时重建不抛错"""
+        with self._lock:
+            self._stop_ponder_locked()
+
+    def multipv(self, fen: str, moves: Sequence[str], movetime_ms: int, count: int) -> SearchResult:
+        """MultiPV 搜索：返回前 count 条主变（infos 按 multipv 升序），不读写缓存。
+
+        搜索前后切换 `setoption MultiPV`，不影响之后的普通搜索。失败抛 EngineError。
+        """
+        self.start()
+        self._set_multipv(count)
+        try:
+            return self._go(fen, SearchLimits(movetime_ms), moves)
+        finally:
+            self._set_multipv(1)
+
+    def _set_multipv(self, count: int) -> None:
+        with self._lock:
+            self._stop_ponder_locked()
+            proc = self._proc
+            if proc is not None and proc.stdin is not None:
+                with suppress(EngineError):  # 进程已死：下次 start() 重建，默认即 MultiPV 1
+                    self._write(proc.stdin, f"setoption name MultiPV value {count}")
+
+    def interrupt(self) -> None:
+        """（可从其它线程调用）让进行中的搜索立即出 bestmove；引擎空闲时会忽略这条 stop"""
+        proc = self._proc
+        if proc is not None and proc.stdin is not None:
+            with suppress(EngineError):
+                self._write(proc.stdin, "stop")
 
     def is_mate(self, fen: str, movetime_ms: int = config.ENGINE_MATE_PROBE_MS) -> bool:
         """对方在该局面是否无路可走（绝杀/困毙）"""
@@ -212,9 +587,8 @@ class Engine:
         return move is None
 
     def close(self) -> None:
-        """结束引擎进程（`quit` 只在收到所有 bestmove 后发出，避免浅层搜索）"""
+        """结束引擎进程（`quit` 只在收到所有 bestmove 后发出，避免浅层搜索）并关闭缓存连接"""
         with self._lock:
-            proc = self._proc
-            self._proc = None
-            if proc is not None:
-                self._kill(proc)
+            self._restart_locked()
+        if self.cache is not None:
+            self.cache.close()
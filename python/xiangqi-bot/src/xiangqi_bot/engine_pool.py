@@ -0,0 +1,360 @@
+"""引擎池：N 个 pikafish 进程由所有会话共享，每次搜索请求租借一个实例。
+
+- 规模：ENGINE_POOL_SIZE，0 时按 CPU 核数（每实例 ENGINE_THREADS 线程，避免超额订阅）
+  与物理内存（每实例哈希 + 进程开销，至多占一半物理内存）自动估算
+- 哈希归属：池记录每个实例的哈希属于哪个 owner（会话句柄 + 对局序号）；
+  租给不同 owner 时先发 ucinewgame，同一局连续租到同一实例则保留哈希
+  （空闲实例优先分给上次使用它的 owner）
+- 公平排队：等待者按到达顺序 FIFO 取实例；各会话串行发请求，等价于轮转
+- 抢占：后台思考（ponder）的租约标记为可抢占，队首等待者无实例可用时
+  让其停止思考并归还，正式搜索优先于预测
+
+会话通过 PooledEngine 句柄使用引擎池，接口与 Engine 相同（best_move / is_mate /
+ponder / ponder_hit / stop_ponder / newgame），绝杀探测、主搜索与分析请求都经池租借。
+"""
+
+import ctypes
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Hashable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from xiangqi_bot import config
+from xiangqi_bot.engine import Engine, EngineError, InfoRecord, SearchLimits, SearchResult
+from xiangqi_bot.search_cache import SearchCache
+
+_PROCESS_OVERHEAD_MB = 256  # 哈希表之外的进程内存（NNUE 权重等）
+
+
+def _physical_memory_mb() -> int | None:
+    """物理内存总量（MB）；无法获取返回 None"""
+    if sys.platform == "win32":
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+        return status.ullTotalPhys // 2**20
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def auto_size(cores: int | None = None, memory_mb: int | None = None) -> int:
+    """按 CPU 核数与物理内存估算引擎实例数（至少 1）；参数省略时取本机数值。
+
+    实例总线程数不超过核数、总内存不超过物理内存一半。后台思考 / 应着预算 / 绝杀探测
+    与正式搜索同时进行，想多留实例应调低 ENGINE_THREADS / ENGINE_HASH_MB，而不是超配。
+    """
+    cores = cores or os.cpu_count() or 1
+    size = cores // config.ENGINE_THREADS
+    if memory_mb is None:
+        memory_mb = _physical_memory_mb()
+    if memory_mb:
+        per_instance = config.ENGINE_HASH_MB + _PROCESS_OVERHEAD_MB
+        size = min(size, memory_mb // 2 // per_instance)
+    return max(1, size)
+
+
+@dataclass(eq=False)
+class Lease:
+    """一次租借：独占 engine 直到归还"""
+
+    engine: Engine
+    owner: Hashable
+    preempt: Callable[[], None] | None = None  # 可抢占时的归还回调（后台思考）
+
+
+class EnginePool:
+    """共享引擎实例池（线程安全）。实例进程在首次搜索时才启动。"""
+
+    def __init__(self, size: int | None = None, factory: Callable[[], Engine] = Engine) -> None:
+        self.size = size or config.ENGINE_POOL_SIZE or auto_size()
+        self.cache = (
+            SearchCache(config.SEARCH_CACHE_PATH, config.SEARCH_CACHE_SIZE)
+            if config.SEARCH_CACHE
+            else None
+        )
+        self._engines = [factory() for _ in range(self.size)]
+        for eng in self._engines:
+            eng.cache = self.cache  # 所有实例共用一个缓存连接与命中计数
+        self._owners: dict[Engine, Hashable] = {}  # 实例 -> 哈希归属
+        self._idle: list[Engine] = list(self._engines)  # 越靠前越久未用
+        self._busy: list[Lease] = []
+        self._queue: deque[object] = deque()  # 等待者票据（FIFO）
+        self._cond = threading.Condition()
+        self.newgames = 0  # 因归属切换发送的 ucinewgame 次数
+
+    def _pick(self, owner: Hashable) -> Engine:
+        """（持锁调用）取一个空闲实例：优先哈希归属相同的，否则最久未用的"""
+        eng = next((e for e in self._idle if self._owners.get(e) == owner), self._idle[0])
+        self._idle.remove(eng)
+        return eng
+
+    def _victim(self) -> Callable[[], None] | None:
+        """（持锁调用）取出一个可抢占租约的归还回调（每个租约只触发一次）"""
+        for lease in self._busy:
+            if lease.preempt is not None:
+                preempt, lease.preempt = lease.preempt, None
+                return preempt
+        return None
+
+    def _wait_turn(self, ticket: object, owner: Hashable, deadline: float) -> Engine:
+        """排到队首且有空闲实例时取走实例；队首无实例可用时先抢占后台思考"""
+        while True:
+            preempt = None
+            with self._cond:
+                head = self._queue[0] is ticket
+                if head and self._idle:
+                    self._queue.popleft()
+                    self._cond.notify_all()
+                    return self._pick(owner)
+                if head:
+                    preempt = self._victim()
+                if preempt is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise EngineError("引擎池繁忙：等待空闲实例超时")
+                    self._cond.wait(remaining)
+                    continue
+            preempt()  # 锁外执行：回调会停止思考并 release()
+
+    def acquire(self, owner: Hashable, timeout: float = config.ENGINE_POOL_WAIT_S) -> Lease:
+        """按到达顺序排队租借实例（阻塞）；哈希归属不同时先发 ucinewgame。失败抛 EngineError"""
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+        try:
+            eng = self._wait_turn(ticket, owner, time.monotonic() + timeout)
+        except BaseException:
+            with self._cond:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                self._cond.notify_all()
+            raise
+        return self._lend(eng, owner)
+
+    def try_acquire(self, owner: Hashable) -> Lease | None:
+        """不等待地租借：有人排队或无空闲实例时返回 None（后台思考不与正式搜索争抢）"""
+        with self._cond:
+            if self._queue or not self._idle:
+                return None
+            eng = self._pick(owner)
+        return self._lend(eng, owner)
+
+    def _lend(self, eng: Engine, owner: Hashable) -> Lease:
+        lease = Lease(eng, owner)
+        with self._cond:
+            self._busy.append(lease)
+        if self._owners.get(eng) != owner:
+            try:
+                eng.newgame()
+            except EngineError:
+                self._owners.pop(eng, None)
+                self.release(lease)
+                raise
+            self._owners[eng] = owner
+            self.newgames += 1
+        return lease
+
+    def set_preempt(self, lease: Lease, preempt: Callable[[], None]) -> None:
+        """标记租约可被抢占（队首等待者无实例可用时调用 preempt 令其归还）"""
+        with self._cond:
+            if lease in self._busy:
+                lease.preempt = preempt
+                self._cond.notify_all()
+
+    def release(self, lease: Lease) -> None:
+        """归还实例（重复归还无操作）"""
+        with self._cond:
+            if lease not in self._busy:
+                return
+            self._busy.remove(lease)
+            self._idle.append(lease.engine)
+            self._cond.notify_all()
+
+    @contextmanager
+    def lease(self, owner: Hashable) -> Iterator[Engine]:
+        """with pool.lease(owner) as engine: 租借期间独占实例"""
+        lease = self.acquire(owner)
+        try:
+            yield lease.engine
+        finally:
+            self.release(lease)
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {
+                "size": self.size,
+                "busy": len(self._busy),
+                "waiting": len(self._queue),
+                "newgames": self.newgames,
+            }
+
+    def close(self) -> None:
+        """结束全部实例进程并关闭缓存连接"""
+        for eng in self._engines:
+            eng.close()
+        self._owners.clear()
+
+
+_handle_ids = itertools.count(1)
+
+
+class PooledEngine:
+    """会话的引擎句柄：接口同 Engine，每次搜索向池租借实例。
+
+    哈希归属 owner = (句柄序号, 对局序号)：newgame() 只递增对局序号，ucinewgame
+    推迟到租到归属不同的实例时由池发送。后台思考在 ponder() 到 ponder_hit()/stop_ponder()
+    之间持有租约，可被其它会话的正式搜索抢占（之后 ponder_hit 抛 EngineError，调用方重新搜索）。
+    """
+
+    def __init__(self, pool: EnginePool) -> None:
+        self.pool = pool
+        self._id = next(_handle_ids)
+        self._game = 0
+        self._lock = threading.Lock()  # 保护 _ponder（抢占回调来自其它会话的线程）
+        self._ponder: Lease | None = None
+        self.ponder_move: str | None = None  # 最近一次 bestmove 附带的预测对方回应
+        self.last_result: SearchResult | None = None  # 最近一次搜索（或缓存命中）的结果
+        # 搜索进度回调：本句柄的正式搜索（best_move / ponderhit 之后）期间挂到租到的实例上
+        self.on_info: Callable[[InfoRecord], None] | None = None
+
+    @property
+    def owner(self) -> tuple[int, int]:
+        return self._id, self._game
+
+    @property
+    def cache(self) -> SearchCache | None:
+        return self.pool.cache
+
+    @property
+    def pondering(self) -> bool:
+        return self._ponder is not None
+
+    def newgame(self) -> None:
+        """新对局：放弃后台思考，之后的租借以新的哈希归属进行"""
+        self.stop_ponder()
+        self._game += 1
+
+    @contextmanager
+    def lease(self) -> Iterator[Engine]:
+        """直接租借一个实例（分析等非走棋请求）；先放弃本会话的后台思考"""
+        self.stop_ponder()
+        with self.pool.lease(self.owner) as eng:
+            yield eng
+
+    def best_move(
+        self,
+        fen: str,
+        movetime_ms: int = config.ENGINE_MOVETIME_MS,
+        moves: Sequence[str] = (),
+        key: str | None = None,
+        limits: SearchLimits | None = None,
+    ) -> tuple[str | None, int]:
+        """同 Engine.best_move；顺带记录 ponder 预测与搜索结果"""
+        with self.lease() as eng:
+            eng.on_info = self.on_info
+            try:
+                result = eng.best_move(fen, movetime_ms, moves, key, limits)
+            finally:
+                eng.on_info = None
+            self.ponder_move, self.last_result = eng.ponder_move, eng.last_result
+        return result
+
+    def is_mate(self, fen: str, movetime_ms: int = config.ENGINE_MATE_PROBE_MS) -> bool:
+        """同 Engine.is_mate（不改写本句柄的 ponder 预测）。
+
+        不打断本会话的后台思考，可在并行线程调用：池有空闲实例时落在另一个实例上。
+        """
+        with self.pool.lease(self.owner) as eng:
+            return eng.is_mate(fen, movetime_ms)
+
+    def ponder(
+        self, fen: str, moves: Sequence[str], movetime_ms: int = config.ENGINE_MOVETIME_MS
+    ) -> None:
+        """同 Engine.ponder；池中无空闲实例（或有人排队）时不思考，抛 EngineError"""
+        self.stop_ponder()
+        lease = self.pool.try_acquire(self.owner)
+        if lease is None:
+            raise EngineError("引擎池无空闲实例，跳过后台思考")
+        try:
+            lease.engine.ponder(fen, moves, movetime_ms)
+        except EngineError:
+            self.pool.release(lease)
+            raise
+        with self._lock:
+            self._ponder = lease
+        self.pool.set_preempt(lease, self.stop_ponder)
+
+    def ponder_hit(self, key: str | None = None) -> tuple[str | None, int]:
+        """同 Engine.ponder_hit；后台思考已被抢占时抛 EngineError"""
+        with self._lock:
+            lease, self._ponder = self._ponder, None
+        if lease is None:
+            raise EngineError("没有进行中的 ponder（可能已被其它对局抢占）")
+        lease.engine.on_info = self.on_info  # 预测局面的思考从 ponderhit 起即本步搜索
+        try:
+            result = lease.engine.ponder_hit(key)
+            self.ponder_move = lease.engine.ponder_move
+            self.last_result = lease.engine.last_result
+        finally:
+            lease.engine.on_info = None
+            self.pool.release(lease)
+        return result
+
+    def stop_ponder(self) -> None:
+        """放弃后台思考并归还实例；未在思考时无操作（也是池的抢占回调）"""
+        with self._lock:
+            lease, self._ponder = self._ponder, None
+        if lease is None:
+            return
+        try:
+            lease.engine.stop_ponder()
+        finally:
+            self.pool.release(lease)
+
+    def close(self) -> None:
+        """会话结束：归还租约（实例进程归池所有，由 shutdown() 结束）"""
+        self.stop_ponder()
+
+
+_shared: EnginePool | None = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> EnginePool:
+    """进程内共享的引擎池（首次调用时创建）"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = EnginePool()
+        return _shared
+
+
+def shutdown() -> None:
+    """结束共享引擎池的全部进程（服务退出时调用）"""
+    global _shared
+    with _shared_lock:
+        pool, _shared = _shared, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,78 @@
+"""搜索进度推送（AnalysisFeed）：引擎主变 info -> 节流后的 analysis 事件。
+
+引擎读线程逐条回调 push()，每 ANALYSIS_INTERVAL_MS 至多推送一次，期间到达的 info
+只保留最新一条；搜索结束时 finish() 补推最后一条，网页看到的总是最终的深度与主变。
+事件带本步计划思考时间（movetime），可对照 time 看思考时间是否用足。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+
+from xiangqi_bot import config
+from xiangqi_bot.engine import InfoRecord
+
+AnalysisFn = Callable[[dict], None]
+
+
+def payload(info: InfoRecord, movetime_ms: int) -> dict:
+    """analysis 事件内容（score 为我方视角厘兵，mate 为 N 步杀/被杀的 ±N）"""
+    return {
+        "depth": info.depth,
+        "seldepth": info.seldepth,
+        "score": info.score,
+        "mate": info.mate,
+        "bound": info.bound,
+        "nodes": info.nodes,
+        "nps": info.nps,
+        "time": info.time,
+        "movetime": movetime_ms,
+        "pv": list(info.pv),
+    }
+
+
+class AnalysisFeed:
+    """把一次搜索的 info 流合并为每秒几条 analysis 事件（线程安全）"""
+
+    def __init__(
+        self,
+        emit: AnalysisFn,
+        interval_ms: int = config.ANALYSIS_INTERVAL_MS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._emit = emit
+        self._interval = interval_ms / 1000
+        self._clock = clock
+        self._lock = threading.Lock()  # push 来自引擎读线程，begin/finish 来自 worker 线程
+        self._movetime_ms = 0
+        self._pending: InfoRecord | None = None  # 节流期间未推送的最新 info
+        self._last_at: float | None = None  # 上次推送时刻；None = 本次搜索尚未推送
+
+    def begin(self, movetime_ms: int) -> None:
+        """新的一次搜索开始（movetime_ms 为计划思考时间）"""
+        with self._lock:
+            self._movetime_ms = movetime_ms
+            self._pending = None
+            self._last_at = None
+
+    def push(self, info: InfoRecord) -> None:
+        """引擎回调：距上次推送不足间隔时只记下，否则立即推送"""
+        now = self._clock()
+        with self._lock:
+            if self._last_at is not None and now - self._last_at < self._interval:
+                self._pending = info
+                return
+            self._pending = None
+            self._last_at = now
+            data = payload(info, self._movetime_ms)
+        self._emit(data)
+
+    def finish(self) -> None:
+        """搜索结束：补推节流中积压的最后一条"""
+        with self._lock:
+            info, self._pending = self._pending, None
+            data = payload(info, self._movetime_ms) if info is not None else None
+        if data is not None:
+            self._emit(data)
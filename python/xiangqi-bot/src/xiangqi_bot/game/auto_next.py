@@ -9,10 +9,12 @@ from __future__ import annotations
 import time
 from collections.abc import Callable
 
+import numpy as np
 from numpy import ndarray
 
 from xiangqi_bot import adb_client, vision
 from xiangqi_bot.adb_client import Device
+from xiangqi_bot.board import Codes
 from xiangqi_bot.config import (
     AUTO_NEXT_TIMEOUT_S,
     BOARD_STABLE_THRESHOLD,
@@ -54,7 +56,7 @@ class AutoNext:
         self._log("info", "开始扫描结算文字……")
         last_word: str | None = None
         retry_count = 0
-        prev_board: list[list[str | None]] | None = None
+        prev_board: Codes | None = None
         stable_count = 0
         start_time = time.monotonic()
         while True:
@@ -71,14 +73,20 @@ class AutoNext:
 
             time.sleep(GAMEOVER_SCAN_INTERVAL_MS / 1000)
 
-            hit = self._scan_text()
+            # 同一张截图只建一次文字识别帧：结算文字与和棋弹窗共享缩放灰度
+            img = self.capture.screenshot()
+            if img is None:
+                self._log("info", "未识别到结算文字")
+                continue
+            text = vision.TextFrame(img)
+            hit = self._scan_text(text)
             if hit is None:
-                corrected = self.capture.grab()
+                corrected = self.capture.grab(img, text)
                 if corrected is None:
                     self._log("info", "未识别到结算文字")
                     continue
-                board_now = vision.analyze_board(corrected, self.templates)
-                count = sum(cell is not None for row in board_now for cell in row)
+                board_now = vision.analyze_codes(corrected, self.templates)
+                count = np.count_nonzero(board_now)
                 if count > 0:
                     # 棋子出现 = ADB 操作已生效，清空重试状态
                     last_word = None
@@ -92,7 +100,7 @@ class AutoNext:
                         self._log("info", "识别到 32 个棋子，当做开局处理")
                         return corrected
                     if prev_board is not None:
-                        if prev_board == board_now:
+                        if np.array_equal(prev_board, board_now):
                             stable_count += 1
                             self._log(
                                 "info",
@@ -161,7 +169,9 @@ class AutoNext:
                 return None
             continue
 
-    def _scan_text(self, img: ndarray | None = None) -> tuple[str, int, int, bool] | None:
+    def _scan_text(
+        self, img: ndarray | vision.TextFrame | None = None
+    ) -> tuple[str, int, int, bool] | None:
         """模板匹配结算文字，返回 (文字, 屏幕x, 屏幕y, 是否按钮) 或 None。
 
         优先处理遮罩类（GAMEOVER_BACK_WORDS），再处理按钮类（GAMEOVER_BUTTON_WORDS）。
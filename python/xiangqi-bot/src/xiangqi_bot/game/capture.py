@@ -1,6 +1,7 @@
 """ADB 截图 + 透视矫正 + 和棋弹窗处理（IO 类）。
 
 持有 homography 状态；截图/点击/弹窗决策通过回调与控制层解耦。
+start_stream() 后截图改由后台 FrameProducer 预取（见 frames.py），接口不变。
 """
 
 from __future__ import annotations
@@ -12,7 +13,18 @@ from numpy import ndarray
 
 from xiangqi_bot import adb_client, vision
 from xiangqi_bot.adb_client import Device
-from xiangqi_bot.config import MOVE_SETTLE_MS
+from xiangqi_bot.config import (
+    CORRECT_CELLS_ONLY,
+    FRAME_MAX_AGE_MS,
+    FRAME_PRODUCER,
+    FRAME_TIMEOUT_S,
+    INPUT_PERSISTENT,
+    INPUT_SENDEVENT,
+    MOVE_SETTLE_MS,
+    SCREENCAP_RAW,
+    TAP_HOLD_INTERVAL_MS,
+)
+from xiangqi_bot.game.frames import FrameProducer, Source, StageTimes
 from xiangqi_bot.game.state import DrawDecision
 
 LogFn = Callable[[str, str], None]
@@ -28,6 +40,7 @@ class Capture:
         log: LogFn,
         decide_draw: Callable[[], DrawDecision],
         should_continue: Callable[[], bool] | None = None,
+        source: Source | None = None,
     ) -> None:
         self.device = device
         self.templates = templates
@@ -35,29 +48,71 @@ class Capture:
         self._decide_draw = decide_draw
         self._should_continue = should_continue or (lambda: True)
         self._homography: ndarray | None = None
+        self._source = source or (lambda: adb_client.screencap(self.device, raw=SCREENCAP_RAW))
+        self._producer: FrameProducer | None = None
+        self._last_seq = 0  # 最近取走的帧序号
+        self._last_action = 0.0  # 最近一次点击/按键完成时刻（之前开始的帧一律作废）
+        self.timing = StageTimes()  # 分阶段耗时：截图/等待/弹窗/矫正（识别由控制层记录）
+        self._input: adb_client.InputShell | None = None  # 常驻输入通道（首次点击时打开）
 
     # ---------- 公开接口 ----------
 
-    def grab(self) -> ndarray | None:
-        """截图 → 处理和棋弹窗 → 矫正，返回矫正后棋盘图。"""
-        img = self.screenshot()
+    def grab(
+        self, img: ndarray | None = None, text: vision.TextFrame | None = None
+    ) -> ndarray | None:
+        """截图 → 处理和棋弹窗 → 矫正，返回矫正后棋盘图。
+
+        img 为调用方已取的截图时不再截图；text 为该截图已建的文字识别帧（与结算文字共享）。
+        """
+        if img is None:
+            img = self.screenshot()
         if img is None:
             return None
-        img, _drawn = self._dismiss_draw(img)
-        return self._correct(img)
+        start = time.perf_counter()
+        img, _drawn = self._dismiss_draw(img, text)
+        mid = time.perf_counter()
+        corrected = self._correct(img)
+        self.timing.record("弹窗", (mid - start) * 1000)
+        self.timing.record("矫正", (time.perf_counter() - mid) * 1000)
+        return corrected
 
     def screenshot(self) -> ndarray | None:
-        """原始截图（供文字识别使用）。"""
+        """原始截图（供文字识别使用）；后台预取开启时取最新的有效帧。"""
+        producer = self._producer
+        if producer is not None:
+            return self._latest_frame(producer)
+        start = time.perf_counter()
         try:
-            img = adb_client.screencap(self.device)
+            img = self._source()
         except adb_client.AdbError as exc:
             self._log("error", str(exc))
             return None
         if img is None:
             self._log("error", "截图失败")
             return None
+        self.timing.record("截图", (time.perf_counter() - start) * 1000)
         return img
 
+    def start_stream(self) -> None:
+        """开启后台预取截图（FRAME_PRODUCER 关闭时不生效）"""
+        if not FRAME_PRODUCER or self._producer is not None:
+            return
+        self._producer = FrameProducer(self._source)
+        self._producer.start()
+
+    def stop_stream(self, wait: bool = True) -> None:
+        """停止后台预取并唤醒等待中的取帧（线程安全，可重复调用）；wait=False 不等线程退出"""
+        producer, self._producer = self._producer, None
+        if producer is not None:
+            producer.stop(5.0 if wait else 0)
+
+    def close(self) -> None:
+        """停止后台截图并关闭常驻输入通道"""
+        self.stop_stream()
+        if self._input is not None:
+            self._input.close()
+            self._input = None
+
     def tap(self, r: int, c: int) -> bool:
         """点击网格格心（逆透视映射）。返回是否成功点击。"""
         if self._homography is None:
@@ -67,37 +122,94 @@ class Capture:
         self._log("info", f"点击 ({x},{y})")
         return self.tap_xy(x, y)
 
+    def move(self, r1: int, c1: int, r2: int, c2: int) -> bool:
+        """整步走棋：点起子 → 间隔 TAP_HOLD_INTERVAL_MS → 点落子。返回是否成功点击。
+
+        常驻输入通道开启时两次点击与间隔作为一条命令下发，由设备端按时序执行。
+        """
+        shell = self._input_shell()
+        if shell is None or self._homography is None:
+            if not self.tap(r1, c1):
+                return False
+            time.sleep(TAP_HOLD_INTERVAL_MS / 1000)
+            return self.tap(r2, c2)
+        x1, y1 = vision.tap_xy(self._homography, r1, c1)
+        x2, y2 = vision.tap_xy(self._homography, r2, c2)
+        self._log("info", f"点击 ({x1},{y1}) → ({x2},{y2})")
+        try:
+            shell.move(x1, y1, x2, y2, TAP_HOLD_INTERVAL_MS)
+        except adb_client.AdbError as exc:
+            self._log("error", str(exc))
+            return False
+        self._last_action = time.monotonic()
+        return True
+
     def tap_xy(self, x: int, y: int) -> bool:
         """点击屏幕绝对坐标。"""
+        shell = self._input_shell()
         try:
-            adb_client.tap(self.device, x, y)
+            if shell is not None:
+                shell.tap(x, y)
+            else:
+                adb_client.tap(self.device, x, y)
         except adb_client.AdbError as exc:
             self._log("error", str(exc))
             return False
+        self._last_action = time.monotonic()
         return True
 
     def keyevent(self, keycode: int) -> bool:
         """发送 Android 按键事件。"""
+        shell = self._input_shell()
         try:
-            adb_client.keyevent(self.device, keycode)
+            if shell is not None:
+                shell.keyevent(keycode)
+            else:
+                adb_client.keyevent(self.device, keycode)
         except adb_client.AdbError as exc:
             self._log("error", str(exc))
             return False
+        self._last_action = time.monotonic()
         return True
 
     # ---------- 内部 ----------
 
+    def _input_shell(self) -> adb_client.InputShell | None:
+        """常驻输入通道（INPUT_PERSISTENT 关闭时为 None，走一次性 shell）"""
+        if not INPUT_PERSISTENT:
+            return None
+        if self._input is None:
+            self._input = adb_client.InputShell(self.device, sendevent=INPUT_SENDEVENT)
+        return self._input
+
+    def _latest_frame(self, producer: FrameProducer) -> ndarray | None:
+        """从后台缓冲取帧：比上次新、点击/按键之后开始截取、且截取完成后未过期。"""
+        start = time.perf_counter()
+        frame = producer.latest(
+            self._last_seq, self._last_action, FRAME_TIMEOUT_S, FRAME_MAX_AGE_MS / 1000
+        )
+        if frame is None:
+            if producer.running and self._producer is producer:
+                self._log("error", producer.error or "截图超时")
+            return None
+        self._last_seq = frame.seq
+        self.timing.record("截图", producer.capture_ms)
+        self.timing.record("等待", (time.perf_counter() - start) * 1000)
+        return frame.img
+
     def _correct(self, img: ndarray) -> ndarray | None:
-        """对已截图做透视矫正（缓存 homography）。"""
+        """对已截图做透视矫正（缓存 homography；按分辨率复用 remap 表）。"""
         h, w = img.shape[:2]
         try:
             self._homography = vision.homography(w, h)
         except RuntimeError as exc:
             self._log("error", str(exc))
             return None
-        return vision.correct_board(img)
+        return vision.correct_board(img, cells_only=CORRECT_CELLS_ONLY)
 
-    def _dismiss_draw(self, img: ndarray) -> tuple[ndarray, int]:
+    def _dismiss_draw(
+        self, img: ndarray, text: vision.TextFrame | None = None
+    ) -> tuple[ndarray, int]:
         """检测和棋弹窗（同意+拒绝两按钮同时存在），按决策回调点击，直到弹窗消失。
 
         返回 (最终截图, 点击次数)。
@@ -105,7 +217,7 @@ class Capture:
         count = 0
         decision: DrawDecision | None = None
         while self._should_continue():
-            matches = vision.find_draw_dialog(img)
+            matches = vision.find_draw_dialog(text or vision.TextFrame(img))
             accept = next((m for m in matches if m[0] == "和棋_同意"), None)
             reject = next((m for m in matches if m[0] == "和棋_拒绝"), None)
             if accept is None or reject is None:
@@ -123,5 +235,5 @@ class Capture:
             new_img = self.screenshot()
             if new_img is None:
                 break
-            img = new_img
+            img, text = new_img, None
         return img, count
@@ -2,12 +2,16 @@
 
 输入变动列表/新棋盘/预期着法，输出分类结果；不做 IO、不维护跨帧状态。
 连续帧的认输 streak 计数由控制层（GameSession）维护，本模块只做单帧判断。
+给出走前棋盘时敌方走法按走子规则（rules）校验：不合法的推断作噪声，
+含噪声的 1/3/4 格变动若只与唯一一种合法走法相符则直接取该走法。
 """
 
 from __future__ import annotations
 
-from xiangqi_bot.board import Board, piece_color
-from xiangqi_bot.game import moves
+import numpy as np
+
+from xiangqi_bot.board import PIECE_CODE, Board, Codes, encode, piece_color
+from xiangqi_bot.game import moves, rules
 from xiangqi_bot.game.state import (
     Change,
     EnemyFrame,
@@ -18,14 +22,12 @@ from xiangqi_bot.game.state import (
     Side,
 )
 
+_GENERALS = (PIECE_CODE["r_K"], PIECE_CODE["b_k"])
+
 
-def is_resign_suspect(board: Board, my_side: Side) -> bool:
+def is_resign_suspect(board: Board | Codes, my_side: Side) -> bool:
     """双方将/帥同时缺失（单帧疑似结束）。连续帧确认由控制层 streak 负责。"""
-    my_general = "r_K" if my_side == Side.RED else "b_k"
-    has_my = any(my_general in row for row in board)
-    enemy_general = "b_k" if my_side == Side.RED else "r_K"
-    has_enemy = any(enemy_general in row for row in board)
-    return not has_my and not has_enemy
+    return not np.isin(encode(board), _GENERALS).any()
 
 
 def classify_self_frame(
@@ -71,27 +73,58 @@ def classify_self_frame(
     return FrameClass(FrameResult.TRANSIENT)
 
 
-def classify_enemy_frame(changes: list[Change], my_side: Side) -> EnemyFrame:
-    """敌方走棋检测单帧分类：返回 Move / LIFTED / NOISY / SILENT。"""
+def classify_enemy_frame(
+    changes: list[Change], my_side: Side, board: Board | Codes | None = None
+) -> EnemyFrame:
+    """敌方走棋检测单帧分类：返回 Move / LIFTED / NOISY / SILENT。
+
+    board 为走前棋盘（变动对比基准）；给出且 well_formed 时按走子规则校验与消歧。
+    """
     n = len(changes)
     if n == 0:
         return EnemyResult.SILENT
+    checked = board is not None and rules.well_formed(board, my_side)
     if n == 2:
         moved = moves.infer(changes)
-        if moved is not None:
+        if moved is not None and (not checked or rules.is_legal(board, moved, my_side)):
             return moved
         return EnemyResult.NOISY
     if n == 1:
         _r, _c, old, _new = changes[0]
         if old is not None and _new is None and piece_color(old) != my_side:
             return EnemyResult.LIFTED
-        return EnemyResult.NOISY
+    if checked and n <= 4:
+        resolved = _resolve_enemy(changes, board, my_side)
+        if resolved is not None:
+            return resolved
     return EnemyResult.NOISY
 
 
 # ---------- 内部 ----------
 
 
+def _resolve_enemy(changes: list[Change], board: Board | Codes, my_side: Side) -> Move | None:
+    """含噪声的 1/3/4 格变动 -> 与之相符的唯一敌方合法走法（不唯一/没有返回 None）。
+
+    相符：落点变成该棋子，且起点变空（1 格时允许起点尚未识别为空，视为识别滞后）；
+    其余变动格视为识别噪声。
+    """
+    lookup = {(r, c): new for r, c, _old, new in changes}
+    found: Move | None = None
+    for move in rules.legal_moves(board, my_side.opponent, my_side):
+        if lookup.get(move.dst) != move.piece:
+            continue
+        if move.src in lookup:
+            if lookup[move.src] is not None:
+                continue
+        elif len(changes) != 1:
+            continue
+        if found is not None:
+            return None
+        found = move
+    return found
+
+
 def _is_lifted_only(change: Change, expected: Move, new_board: Board) -> bool:
     """n==1 恰好是我方起点提子未落（强约束避免误判）。"""
     ur, uc, uold, unew = change
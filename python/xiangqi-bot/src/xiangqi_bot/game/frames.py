@@ -0,0 +1,185 @@
+"""帧源：后台截图线程 + 最新帧环形缓冲（IO 类）、分阶段耗时统计、图片回放帧源。
+
+FrameProducer 在独立线程里按需截图：消费者取走第 N 帧后立即开始拉取第 N+1 帧，
+截图传输与上一帧的矫正/识别重叠；消费者不取帧时线程空闲，不额外占用 ADB。
+消费者只接受「序号比上次新、且在最近一次点击/按键之后开始截取、且截取完成后未过期」的帧
+（过期按完成时刻算，单帧传输本身超过过期时限的慢截图也能被预取复用），
+因此走棋校验、弹窗点击后的延时复检语义与同步截图一致。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from xiangqi_bot.adb_client import AdbError
+from xiangqi_bot.config import FRAME_RETRY_MS, FRAME_RING_SIZE
+
+Source = Callable[[], ndarray | None]  # 截一帧原始截图，失败返回 None 或抛 AdbError
+
+
+@dataclass(frozen=True)
+class Frame:
+    """一帧原始截图（序号从 1 递增，时刻为 time.monotonic()）"""
+
+    seq: int
+    started: float  # 开始截取
+    ts: float  # 截取完成
+    img: ndarray
+
+
+class StageTimes:
+    """分阶段耗时（毫秒）：每阶段保留最近一次与指数滑动平均"""
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        self._alpha = alpha
+        self.last: dict[str, float] = {}
+        self.avg: dict[str, float] = {}
+        self.count: dict[str, int] = {}
+
+    def record(self, stage: str, ms: float) -> None:
+        self.last[stage] = ms
+        prev = self.avg.get(stage)
+        self.avg[stage] = ms if prev is None else prev + self._alpha * (ms - prev)
+        self.count[stage] = self.count.get(stage, 0) + 1
+
+    def summary(self) -> str:
+        """形如「截图 120ms / 矫正 5ms」的平均耗时摘要"""
+        return " / ".join(f"{stage} {ms:.0f}ms" for stage, ms in self.avg.items())
+
+
+class FrameProducer:
+    """后台截图线程 + 最新帧环形缓冲（保留最近 FRAME_RING_SIZE 帧）。"""
+
+    def __init__(self, source: Source, size: int = FRAME_RING_SIZE) -> None:
+        self._source = source
+        self._frames: deque[Frame] = deque(maxlen=size)
+        self._cond = threading.Condition()
+        self._stop = False
+        self._seq = 0
+        self._consumed = 0  # 消费者最近取走的序号
+        self._not_before = 0.0  # 消费者要求的最早开始时刻
+        self._max_age: float | None = None  # 消费者可接受的帧龄（秒，自截取完成起算）
+        self._error_seq = 0  # 截图失败次数（消费者据此提前返回）
+        self.error: str | None = None  # 最近一次截图失败原因
+        self.capture_ms = 0.0  # 最近一帧截图耗时
+        self._thread = threading.Thread(target=self._run, name="frame-producer", daemon=True)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """通知线程退出并唤醒所有等待者；timeout > 0 时等待线程结束（进行中的截图完成后退出）"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if timeout > 0 and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def frames(self) -> list[Frame]:
+        """缓冲内全部帧（旧 → 新）"""
+        with self._cond:
+            return list(self._frames)
+
+    def latest(
+        self, after_seq: int, not_before: float, timeout: float, max_age: float | None = None
+    ) -> Frame | None:
+        """等待并返回最新帧：序号 > after_seq、开始截取时刻 >= not_before，
+        且截取完成距今不超过 max_age 秒（None 不限）。
+
+        超时、线程已停止或期间截图失败时返回 None（失败原因见 error）。
+        """
+
+        def fresh() -> Frame | None:
+            if not self._frames:
+                return None
+            frame = self._frames[-1]
+            if frame.seq <= after_seq or frame.started < not_before:
+                return None
+            return None if self._stale(frame) else frame
+
+        with self._cond:
+            self._not_before = max(self._not_before, not_before)
+            self._max_age = max_age
+            self._consumed = max(self._consumed, after_seq)
+            self._cond.notify_all()
+            errors = self._error_seq
+            ok = self._cond.wait_for(
+                lambda: self._stop or self._error_seq != errors or fresh() is not None,
+                timeout,
+            )
+            frame = fresh() if ok else None
+            if frame is not None:
+                self._consumed = frame.seq
+                self._cond.notify_all()  # 取走即唤醒后台线程预取下一帧
+            return frame
+
+    def _stale(self, frame: Frame) -> bool:
+        return self._max_age is not None and time.monotonic() - frame.ts > self._max_age
+
+    def _wanted(self) -> bool:
+        """是否需要截新帧：缓冲最新帧已被取走、早于消费者要求的时刻，或已过期"""
+        if not self._frames:
+            return True
+        frame = self._frames[-1]
+        return frame.seq <= self._consumed or frame.started < self._not_before or self._stale(frame)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stop or self._wanted())
+                if self._stop:
+                    return
+            started = time.monotonic()
+            try:
+                img = self._source()
+                error = None if img is not None else "截图失败"
+            except AdbError as exc:
+                img, error = None, str(exc)
+            done = time.monotonic()
+            with self._cond:
+                if img is None:
+                    self.error = error
+                    self._error_seq += 1
+                else:
+                    self._seq += 1
+                    self._frames.append(Frame(self._seq, started, done, img))
+                    self.capture_ms = (done - started) * 1000
+                self._cond.notify_all()
+                if img is None:
+                    # 失败后退避，避免 ADB 断开时空转
+                    self._cond.wait_for(lambda: self._stop, FRAME_RETRY_MS / 1000)
+
+
+class ReplaySource:
+    """回放帧源：按顺序读取图片文件代替设备截图（测试与离线复现），读完返回 None 或循环。"""
+
+    def __init__(self, paths: Iterable[str | Path], loop: bool = False) -> None:
+        self._images = [
+            cv2.imdecode(np.fromfile(str(p), dtype=np.uint8), cv2.IMREAD_COLOR) for p in paths
+        ]
+        self._loop = loop
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> ndarray | None:
+        with self._lock:
+            if self._index >= len(self._images):
+                if not self._loop or not self._images:
+                    return None
+                self._index = 0
+            img = self._images[self._index]
+            self._index += 1
+            return img
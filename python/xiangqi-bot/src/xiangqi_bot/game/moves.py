@@ -5,7 +5,15 @@
 
 from __future__ import annotations
 
-from xiangqi_bot.board import PIECE_CN, Board, grid_to_square, piece_color, piece_label
+from xiangqi_bot.board import (
+    PIECE_CN,
+    Board,
+    Codes,
+    decode,
+    grid_to_square,
+    piece_color,
+    piece_label,
+)
 from xiangqi_bot.game.state import Change, Move, Side
 
 
@@ -36,11 +44,27 @@ def apply(board: Board, move: Move, clock: int) -> int:
     return 0 if move.captured is not None else clock + 1
 
 
+def replay(start: Codes, played: list[Move]) -> Board | None:
+    """从同步点棋盘依次应用着法，返回结果棋盘；某步起点棋子与记录不符时返回 None。"""
+    board = decode(start)
+    for move in played:
+        r, c = move.src
+        if board[r][c] != move.piece:
+            return None
+        apply(board, move, 0)
+    return board
+
+
 def matches(move: Move, expected: Move) -> bool:
     """走法是否与引擎着法完全吻合（起点/终点/棋子）。"""
     return move.src == expected.src and move.dst == expected.dst and move.piece == expected.piece
 
 
+def to_uci(move: Move, my_side: Side) -> str:
+    """走法 -> UCI 着法串（如 h2e2），与引擎 bestmove/ponder 同一记法。"""
+    return grid_to_square(*move.src, my_side) + grid_to_square(*move.dst, my_side)
+
+
 def format_move(move: Move, my_side: Side) -> str:
     """格式化走棋日志（红/黑方 + 棋子 + 记谱 + 吃子）。"""
     piece, captured = move.piece, move.captured
@@ -1,30 +1,97 @@
-"""棋盘识别：矫正图 -> (布局, 变动列表)。薄封装 vision，纯函数。"""
+"""棋盘识别：矫正图 -> (布局, 变动列表)。薄封装 vision。
+
+`analyze` 为无状态整盘识别（纯函数）；`Recognizer` 为逐帧增量识别，
+记住各格上次匹配时的格心区域与编码，只重匹配格心有变化的格子。
+"""
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+
+import numpy as np
 from numpy import ndarray
 
 from xiangqi_bot import vision
-from xiangqi_bot.board import COLS, ROWS, Board
+from xiangqi_bot.board import COLS, ROWS, Board, Codes, decode, encode, piece_id
+from xiangqi_bot.config import RECOGNITION_FULL_INTERVAL, RECOGNITION_INCREMENTAL
 from xiangqi_bot.game.state import Change
 
 
 def analyze(
     corrected: ndarray,
     templates: dict[str, ndarray],
-    prev_board: Board | None,
+    prev_board: Board | Codes | None,
+    my_side: str | None = None,
 ) -> tuple[Board, list[Change]]:
-    """逐格识别当前帧棋盘（优先匹配 prev_board），返回 (新布局, 与 prev_board 的变动列表)。
+    """批量识别当前帧棋盘（优先沿用 prev_board），返回 (新布局, 与 prev_board 的变动列表)。
 
-    一次遍历同时完成识别+对比。prev_board 为 None 时 changes 为空，返回完整新布局。
+    识别与对比都在 int8 编码上完成：变动格由 `np.nonzero(prev != cur)` 得到。
+    prev_board 为 None 时 changes 为空，返回完整新布局。my_side 决定候选模板表朝向。
     """
-    board: Board = [[None] * COLS for _ in range(ROWS)]
-    changes: list[Change] = []
-    for r in range(ROWS):
-        for c in range(COLS):
-            old = prev_board[r][c] if prev_board is not None else None
-            new = vision.analyze_cell_with_priority(corrected, r, c, templates, old)
-            board[r][c] = new
-            if old != new:
-                changes.append(Change(r, c, old, new))
-    return board, changes
+    prev = encode(prev_board) if prev_board is not None else None
+    codes = vision.analyze_codes(corrected, templates, prev, my_side)
+    return decode(codes), diff(prev, codes)
+
+
+def diff(prev: Codes | None, cur: Codes) -> list[Change]:
+    """两帧编码的逐格变动（行优先），prev 为 None 时为空。"""
+    if prev is None:
+        return []
+    rows, cols = np.nonzero(prev != cur)
+    return [
+        Change(r, c, piece_id(int(prev[r, c])), piece_id(int(cur[r, c])))
+        for r, c in zip(rows.tolist(), cols.tolist(), strict=True)
+    ]
+
+
+@dataclass
+class Recognizer:
+    """逐帧增量识别（敌方等待循环等连续截图场景）。
+
+    各格与其上次被匹配时的格心区域比较（vision.changed_mask），只有变化的格子重新
+    模板匹配，其余沿用上次编码；无参考帧或距上次整盘已满 full_interval 帧时整盘复核。
+    """
+
+    incremental: bool = RECOGNITION_INCREMENTAL
+    full_interval: int = RECOGNITION_FULL_INTERVAL
+    my_side: str | None = None  # 我方红黑（候选模板表朝向），判方后由会话设置
+    last_matched: int = 0  # 最近一帧实际重匹配的格子数
+    _patches: ndarray | None = None
+    _codes: Codes | None = None
+    _since_full: int = 0
+
+    def reset(self) -> None:
+        """丢弃参考帧，下一帧整盘识别。"""
+        self._patches = None
+        self._codes = None
+        self._since_full = 0
+
+    def analyze(
+        self,
+        corrected: ndarray,
+        templates: dict[str, ndarray],
+        prev_board: Board | Codes | None,
+    ) -> tuple[Board, list[Change]]:
+        """同 `analyze`，但未变化的格子不再匹配。"""
+        prev = encode(prev_board) if prev_board is not None else None
+        patches = vision.center_patches(corrected)
+        if (
+            not self.incremental
+            or self._patches is None
+            or self._codes is None
+            or self._since_full >= self.full_interval
+        ):
+            codes = vision.analyze_codes(corrected, templates, prev, self.my_side)
+            self._patches = patches.copy()
+            self._since_full = 0
+            self.last_matched = ROWS * COLS
+        else:
+            changed = vision.changed_mask(self._patches, patches)
+            codes = vision.reanalyze_codes(
+                corrected, templates, self._codes, changed, prev, self.my_side
+            )
+            self._patches[changed] = patches[changed]
+            self._since_full += 1
+            self.last_matched = int(np.count_nonzero(changed))
+        self._codes = codes
+        return decode(codes), diff(prev, codes)
@@ -0,0 +1,236 @@
+"""象棋走子规则：合法着法生成与校验（纯函数）。
+
+在网格坐标（屏幕固定，我方恒在下方）上按 int8 编码展平的 90 格列表生成着法：
+车/炮（炮架）、马（蹩马腿）、相象（塞象眼、不过河）、仕士/将帥（九宫）、兵卒（过河可横走）。
+走后己方将帥被攻击（含将帥照面）的着法不合法。
+
+供帧分类校验推断出的敌方走法、从含噪声的 1/3/4 格变动中唯一确定敌方走法，
+以及统计我方合法着法数（思考时间）、直接判定对方无着可走（绝杀/困毙）。
+棋盘须 well_formed（双方各一个将帥且都在己方九宫内），识别出错的棋盘不作规则判断。
+"""
+
+from __future__ import annotations
+
+from xiangqi_bot.board import (
+    COLS,
+    EMPTY,
+    PIECE_CODE,
+    RED_MIN_CODE,
+    ROWS,
+    Board,
+    Codes,
+    encode,
+    piece_id,
+)
+from xiangqi_bot.game.state import Move, Side
+
+# 编码 -> 兵种：(code - 1) % 7，顺序同 PIECE_FEN（車馬象士將砲卒）
+ROOK, KNIGHT, BISHOP, ADVISOR, KING, CANNON, PAWN = range(7)
+
+_KINGS = {Side.RED: PIECE_CODE["r_K"], Side.BLACK: PIECE_CODE["b_k"]}
+_ORTHO = ((-1, 0), (1, 0), (0, -1), (0, 1))
+_DIAG = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+_KNIGHT_STEPS = ((-2, -1), (-2, 1), (2, -1), (2, 1), (-1, -2), (1, -2), (-1, 2), (1, 2))
+_PALACE_COLS = range(3, 6)
+
+Square = tuple[int, int]
+Cells = list[int]  # 展平的 90 格编码（下标 r * COLS + c）
+
+
+def _side_of(code: int) -> Side:
+    return Side.RED if code >= RED_MIN_CODE else Side.BLACK
+
+
+def _palace_rows(bottom: bool) -> range:
+    return range(7, 10) if bottom else range(3)
+
+
+def _own_half(r: int, bottom: bool) -> bool:
+    """r 行是否在（下方 / 上方）一方的己方半场（河界以内）"""
+    return r >= 5 if bottom else r <= 4
+
+
+def _cells(board: Board | Codes) -> Cells:
+    return encode(board).ravel().tolist()
+
+
+def _king_square(cells: Cells, side: Side) -> Square | None:
+    try:
+        i = cells.index(_KINGS[side])
+    except ValueError:
+        return None
+    return divmod(i, COLS)
+
+
+def well_formed(board: Board | Codes, my_side: Side) -> bool:
+    """双方各有且仅有一个将帥、且都在各自九宫内（我方在下）——可做规则判断的棋盘"""
+    cells = _cells(board)
+    for side, code in _KINGS.items():
+        if cells.count(code) != 1:
+            return False
+        r, c = divmod(cells.index(code), COLS)
+        if r not in _palace_rows(side == my_side) or c not in _PALACE_COLS:
+            return False
+    return True
+
+
+def _targets(cells: Cells, r: int, c: int, bottom: bool) -> list[Square]:
+    """(r, c) 上棋子的伪合法落点（不考虑走后被将）"""
+    code = cells[r * COLS + c]
+    red = code >= RED_MIN_CODE
+    kind = (code - 1) % 7
+
+    def free(tr: int, tc: int) -> bool:
+        """落点在盘内且不是己方棋子"""
+        if not (0 <= tr < ROWS and 0 <= tc < COLS):
+            return False
+        other = cells[tr * COLS + tc]
+        return other == EMPTY or (other >= RED_MIN_CODE) != red
+
+    out: list[Square] = []
+    if kind in (ROOK, CANNON):
+        for dr, dc in _ORTHO:
+            tr, tc = r + dr, c + dc
+            screened = False
+            while 0 <= tr < ROWS and 0 <= tc < COLS:
+                other = cells[tr * COLS + tc]
+                if not screened:
+                    if other == EMPTY:
+                        out.append((tr, tc))
+                    elif kind == ROOK:
+                        if (other >= RED_MIN_CODE) != red:
+                            out.append((tr, tc))
+                        break
+                    else:
+                        screened = True  # 炮架
+                elif other != EMPTY:
+                    if (other >= RED_MIN_CODE) != red:
+                        out.append((tr, tc))
+                    break
+                tr, tc = tr + dr, tc + dc
+    elif kind == KNIGHT:
+        for dr, dc in _KNIGHT_STEPS:
+            lr, lc = (r + dr // 2, c) if abs(dr) == 2 else (r, c + dc // 2)
+            leg_free = 0 <= lr < ROWS and 0 <= lc < COLS and cells[lr * COLS + lc] == EMPTY
+            if leg_free and free(r + dr, c + dc):
+                out.append((r + dr, c + dc))
+    elif kind == BISHOP:
+        for dr, dc in _DIAG:
+            tr, tc = r + 2 * dr, c + 2 * dc
+            if not (0 <= tr < ROWS and 0 <= tc < COLS) or not _own_half(tr, bottom):
+                continue
+            if cells[(r + dr) * COLS + c + dc] == EMPTY and free(tr, tc):
+                out.append((tr, tc))
+    elif kind in (ADVISOR, KING):
+        palace = _palace_rows(bottom)
+        for dr, dc in _DIAG if kind == ADVISOR else _ORTHO:
+            tr, tc = r + dr, c + dc
+            if tr in palace and tc in _PALACE_COLS and free(tr, tc):
+                out.append((tr, tc))
+    else:  # PAWN
+        forward = -1 if bottom else 1
+        steps = [(forward, 0)]
+        if not _own_half(r, bottom):
+            steps += [(0, -1), (0, 1)]
+        out.extend((r + dr, c + dc) for dr, dc in steps if free(r + dr, c + dc))
+    return out
+
+
+def _attacked(cells: Cells, sq: Square, by: Side, my_side: Side) -> bool:
+    """by 方是否攻击 sq 格（将帥照面视为将帥沿直线攻击）"""
+    r, c = sq
+    by_red = by == Side.RED
+    bottom = by == my_side
+
+    def kind_at(tr: int, tc: int) -> int | None:
+        """(tr, tc) 上 by 方棋子的兵种；非 by 方棋子或空格为 None"""
+        code = cells[tr * COLS + tc]
+        if code == EMPTY or (code >= RED_MIN_CODE) != by_red:
+            return None
+        return (code - 1) % 7
+
+    for dr, dc in _ORTHO:
+        tr, tc = r + dr, c + dc
+        screened = False
+        while 0 <= tr < ROWS and 0 <= tc < COLS:
+            if cells[tr * COLS + tc] != EMPTY:
+                kind = kind_at(tr, tc)
+                if screened:
+                    if kind == CANNON:
+                        return True
+                    break
+                if kind in (ROOK, KING):
+                    return True
+                screened = True
+            tr, tc = tr + dr, tc + dc
+    for dr, dc in _KNIGHT_STEPS:
+        nr, nc = r + dr, c + dc
+        if not (0 <= nr < ROWS and 0 <= nc < COLS) or kind_at(nr, nc) != KNIGHT:
+            continue
+        # 马在 (nr, nc) 走 (-dr, -dc) 到 sq，马腿紧挨马、沿长边方向
+        lr, lc = (nr - dr // 2, nc) if abs(dr) == 2 else (nr, nc - dc // 2)
+        if cells[lr * COLS + lc] == EMPTY:
+            return True
+    forward = -1 if bottom else 1
+    pr = r - forward
+    if 0 <= pr < ROWS and kind_at(pr, c) == PAWN:
+        return True
+    if not _own_half(r, bottom):
+        for tc in (c - 1, c + 1):
+            if 0 <= tc < COLS and kind_at(r, tc) == PAWN:
+                return True
+    return False
+
+
+def _safe_after(cells: Cells, src: Square, dst: Square, my_side: Side) -> bool:
+    """src -> dst 走后走子方的将帥不被攻击"""
+    code = cells[src[0] * COLS + src[1]]
+    side = _side_of(code)
+    after = cells.copy()
+    after[src[0] * COLS + src[1]] = EMPTY
+    after[dst[0] * COLS + dst[1]] = code
+    king = dst if (code - 1) % 7 == KING else _king_square(after, side)
+    return king is None or not _attacked(after, king, side.opponent, my_side)
+
+
+def _move(cells: Cells, src: Square, dst: Square) -> Move:
+    piece = piece_id(cells[src[0] * COLS + src[1]])
+    assert piece is not None
+    return Move(src, dst, piece, piece_id(cells[dst[0] * COLS + dst[1]]))
+
+
+def legal_moves(board: Board | Codes, side: Side, my_side: Side) -> list[Move]:
+    """side 方的全部合法着法（my_side 在屏幕下方，决定兵卒方向、九宫与河界）"""
+    cells = _cells(board)
+    side_red = side == Side.RED
+    bottom = side == my_side
+    out: list[Move] = []
+    for i, code in enumerate(cells):
+        if code == EMPTY or (code >= RED_MIN_CODE) != side_red:
+            continue
+        src = divmod(i, COLS)
+        out.extend(
+            _move(cells, src, dst)
+            for dst in _targets(cells, *src, bottom)
+            if _safe_after(cells, src, dst, my_side)
+        )
+    return out
+
+
+def is_legal(board: Board | Codes, move: Move, my_side: Side) -> bool:
+    """move 在 board 上是否合法（起点须是 move.piece，落点内容须与 move.captured 相符）"""
+    cells = _cells(board)
+    (r1, c1), dst = move.src, move.dst
+    if piece_id(cells[r1 * COLS + c1]) != move.piece:
+        return False
+    if piece_id(cells[dst[0] * COLS + dst[1]]) != move.captured:
+        return False
+    bottom = _side_of(cells[r1 * COLS + c1]) == my_side
+    return dst in _targets(cells, r1, c1, bottom) and _safe_after(cells, move.src, dst, my_side)
+
+
+def in_check(board: Board | Codes, side: Side, my_side: Side) -> bool:
+    """side 方的将帥是否正被攻击（含将帥照面）"""
+    cells = _cells(board)
+    king = _king_square(cells, side)
+    return king is not None and _attacked(cells, king, side.opponent, my_side)
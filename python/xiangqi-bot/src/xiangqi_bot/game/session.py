@@ -15,35 +15,59 @@ import threading
 import time
 import traceback
 from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 from numpy import ndarray
 
-from xiangqi_bot import engine, vision
+from xiangqi_bot import book, engine, engine_pool, vision
 from xiangqi_bot.adb_client import Device
 from xiangqi_bot.board import (
     Board,
+    decode,
+    encode,
     fen_of_board,
     grid_to_square,
     piece_label,
 )
 from xiangqi_bot.config import (
     AUTO_NEXT_GAME,
+    BOOK_ENABLED,
+    BOOK_MAX_PLY,
+    BOOK_PATH,
+    DEFAULT_SKIN,
     DRAW_REJECT_CP,
     ENEMY_NOISY_MAX,
     ENEMY_RECHECK_WAIT_MS,
     ENGINE_MATE_PROBE_MS,
     ENGINE_MOVETIME_MS,
+    ENGINE_PONDER,
+    ENGINE_SPECULATE,
     MOVE_SETTLE_MS,
     MOVE_VERIFY_COUNT,
     RESIGN_CONFIRM_COUNT,
     RESIGN_SUSPECT_WAIT_MS,
     SELF_MOVE_ATTEMPTS,
+    SKIN_CHECK_INTERVAL,
+    SKIN_MIN_SCORE,
+    SKIN_RECHECK_SCORE,
+    SKIN_SCORE_DROP,
     TAP_HOLD_INTERVAL_MS,
 )
-from xiangqi_bot.game import classifier, draw, moves, opening, recognition
+from xiangqi_bot.game import (
+    analysis,
+    classifier,
+    draw,
+    moves,
+    opening,
+    recognition,
+    rules,
+    speculate,
+    timing,
+)
 from xiangqi_bot.game.auto_next import AutoNext
 from xiangqi_bot.game.capture import Capture
+from xiangqi_bot.game.frames import Source
 from xiangqi_bot.game.state import (
     Change,
     DrawDecision,
@@ -69,13 +93,29 @@ class GameSession:
         log: LogFn,
         on_state: StateFn | None = None,
         ask_turn: AskTurnFn | None = None,
+        source: Source | None = None,
+        pool: engine_pool.EnginePool | None = None,
+        on_analysis: analysis.AnalysisFn | None = None,
     ) -> None:
         self.device: Device = device  # ADB 设备实例
         self._log = log  # 日志回调 (kind, msg)
         self._on_state = on_state  # 状态推送回调
         self._ask_turn_cb = ask_turn  # 请求网页确认轮次的回调
-        self.templates = vision.load_templates()  # 棋子模板字典（14 张 60x60）
-        self.engine = engine.Engine()  # pikafish UCI 引擎客户端
+        # 棋子模板字典（当前皮肤的一包 14 张 60x60），初始化时按画面挑选
+        self.skin = DEFAULT_SKIN
+        self.templates = vision.load_templates(self.skin)
+        self._skin_frames = 0  # 距上次检查模板包贴合度的识别帧数
+        self._skin_score: float | None = None  # 挑选当前包时的平均匹配分（复查基准）
+        # pikafish 引擎句柄：每次搜索向（默认进程内共享的）引擎池租借实例
+        self.engine = engine_pool.PooledEngine(pool or engine_pool.shared())
+        self.book = book.OpeningBook(BOOK_PATH) if BOOK_ENABLED else None  # 开局库（mmap）
+        self.timer = timing.TimeManager()  # 逐步分配思考时间（整局预算）
+        self.speculator = speculate.Speculator(self.engine)  # 对方思考期间预算我方回应
+        # 搜索进度推送（节流后的 analysis 事件）；未给回调时不挂引擎回调
+        self.analysis = analysis.AnalysisFeed(on_analysis) if on_analysis is not None else None
+        if self.analysis is not None:
+            self.engine.on_info = self.analysis.push
+        self.recognizer = recognition.Recognizer()  # 逐帧增量识别（只重匹配变化格）
 
         # 棋局状态
         self.state = GameState()
@@ -89,6 +129,7 @@ class GameSession:
             should_continue=lambda: (
                 self._running and not self._interrupt.is_set() and not self.state.game_over
             ),
+            source=source,  # 截图帧源（默认 ADB；测试可换 frames.ReplaySource）
         )
         self.auto_next_handler = AutoNext(
             device,
@@ -107,12 +148,26 @@ class GameSession:
         self._turn_answer: str | None = None  # 网页弹窗返回的轮次确认答案
         self._turn_event = threading.Event()  # 等待轮次确认的事件
 
+        # 后台思考（ponder）：本会话命中统计 + 进行中的预测
+        self.ponder_hits = 0  # 对方实际走法与预测一致的次数
+        self.ponder_total = 0  # 已判定的 ponder 次数
+        self._ponder_guess: str | None = None  # 最近一次引擎着法附带的预测对方回应
+        self._pondering: str | None = None  # 正在后台思考的预测着法（UCI）
+        self._ponder_hit = False  # 预测命中，下一步走棋直接 ponderhit 取结果
+        self._speculated: tuple[str, speculate.Response] | None = None  # 命中的 (对方应着, 回应)
+
+        # 绝杀判定：优先用主搜索的杀棋分，无从判断时经引擎池在另一实例上并行探测
+        self._search_mated: bool | None = None  # 本步着法是否一步杀（score mate 1）；None=未知
+        self._mate_probe: Future[bool] | None = None  # 进行中的并行探测（敌方检测循环取结果）
+        self._probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mate-probe")
+
     # ---------- 公共接口（worker 线程调用） ----------
 
     def interrupt(self) -> None:
-        """中断自动对弈（线程安全，从任意线程可调）"""
+        """中断自动对弈（线程安全，从任意线程可调）；同时停止后台截图并唤醒取帧等待"""
         self._running = False
         self._interrupt.set()
+        self.capture.stop_stream(wait=False)
 
     def answer_turn(self, answer: str | None) -> None:
         """网页弹窗确认（answer 为 "start"/"no"）"""
@@ -125,7 +180,10 @@ class GameSession:
         self._emit()
 
     def close(self) -> None:
-        """关闭引擎进程"""
+        """归还引擎租约，关闭后台截图线程与常驻输入通道（引擎进程归引擎池所有）"""
+        self.capture.close()
+        self._probe_executor.shutdown(wait=False, cancel_futures=True)
+        self.speculator.close()
         self.engine.close()
 
     def start(self) -> None:
@@ -180,16 +238,23 @@ class GameSession:
         """
         self._running = True
         self._emit()
+        self.capture.start_stream()
         try:
             self.engine.newgame()
+            self.timer.new_game()
             self._flow()
         except Exception as exc:  # noqa: BLE001 — 顶层兜所有业务异常
             self._log("error", f"自动对弈异常终止：{exc!r}")
             traceback.print_exc()
         finally:
+            self.capture.stop_stream()
+            self._cancel_ponder()
+            self._mate_probe = None
             self._running = False
             self._auto_next = False
             self._emit()
+        if self.capture.timing.avg:
+            self._log("info", f"帧平均耗时：{self.capture.timing.summary()}")
         self._log("info", "flow 流程结束！")
 
     def _flow(self) -> None:
@@ -229,7 +294,9 @@ class GameSession:
         轮次（state.turn）不在此处理：start 与自动下一局各有后续逻辑
         （弹窗确认 / 残局固定红先），保持各自闭环。
         """
+        self._select_skin(corrected)
         board = vision.analyze_board(corrected, self.templates)
+        self.recognizer.reset()
         my_side = opening.detect_side(board)
         if my_side is None:
             self._log(
@@ -238,6 +305,7 @@ class GameSession:
             )
             return False
         phase = opening.detect_phase(board, my_side)
+        self.recognizer.my_side = my_side  # 之后逐帧识别按我方朝向裁剪候选模板
         self.state.board = board
         self.state.my_side = my_side
         self.state.phase = phase
@@ -245,6 +313,38 @@ class GameSession:
         self._log("ok", f"我方为{my_side.cn}方，当前棋盘为{phase}")
         return True
 
+    def _select_skin(self, corrected: ndarray) -> bool:
+        """按当前画面挑选棋子模板包；最贴合的包与当前不同且平均分达标时换包（只保留一包）。
+
+        结算弹窗等无棋盘画面各包分数都很低，不换包、也不改复查基准。返回是否换了包。
+        """
+        self._skin_frames = 0
+        skin, score = vision.select_skin(corrected)
+        if score < SKIN_MIN_SCORE:
+            return False
+        self._skin_score = score
+        if skin == self.skin:
+            return False
+        self.skin = skin
+        self.templates = vision.load_templates(skin)
+        self.capture.templates = self.templates
+        self.auto_next_handler.templates = self.templates
+        self.recognizer.reset()
+        self._log("info", f"棋子模板切换为「{skin}」（平均匹配分 {score:.3f}）")
+        return True
+
+    def _check_skin(self, corrected: ndarray) -> bool:
+        """每 SKIN_CHECK_INTERVAL 帧复查当前模板包的平均匹配分，比挑选时明显偏低则重新挑选；返回是否换了包"""
+        self._skin_frames += 1
+        if self._skin_frames < SKIN_CHECK_INTERVAL:
+            return False
+        self._skin_frames = 0
+        baseline = self._skin_score
+        floor = SKIN_RECHECK_SCORE if baseline is None else baseline - SKIN_SCORE_DROP
+        if vision.confidence(corrected, self.templates) >= floor:
+            return False
+        return self._select_skin(corrected)
+
     # ---------- 我方走棋 ----------
 
     def _do_move(self) -> bool:
@@ -262,6 +362,8 @@ class GameSession:
                 continue
             outcome = self._verify(r1, c1, r2, c2, piece)
             if outcome == VerifyOutcome.DONE_OK:
+                self._start_ponder()
+                self._start_speculation()
                 return True
             if outcome == VerifyOutcome.DONE_END:
                 return False
@@ -272,6 +374,8 @@ class GameSession:
                 time.sleep(TAP_HOLD_INTERVAL_MS / 1000)
                 retry = self._verify(r1, c1, r2, c2, piece)
                 if retry == VerifyOutcome.DONE_OK:
+                    self._start_ponder()
+                    self._start_speculation()
                     return True
                 if retry == VerifyOutcome.DONE_END:
                     return False
@@ -294,9 +398,27 @@ class GameSession:
             self.state.halfmove_clock,
         )
         self._log("info", f"生成 FEN：{fen}")
+        self._search_mated = None
+        self._mate_probe = None  # 轮到我方说明对方已应着，未取的探测结果作废
+        start_fen, played = self._engine_position()
+        speculated = self._take_speculated(played)
+        if speculated is not None:
+            self._settle_unused_ponder()
+            self.state.last_eval_score = speculated.score
+            self._search_mated = engine.mate_in(speculated.score) == 1
+            self._ponder_guess = speculated.ponder
+            self._log("info", f"预算着法：{speculated.move}（评估分 {speculated.score}）")
+            return fen, speculated.move
+        book_move = self._book_move(fen)
+        if book_move is not None:
+            self._settle_unused_ponder()
+            self._ponder_guess = None
+            self._search_mated = False
+            self._log("info", f"开局库着法：{book_move}")
+            return fen, book_move
         self._log("info", "计算着法...")
         try:
-            move, score = self.engine.best_move(fen)
+            move, score = self._search(self._cache_key(fen), start_fen, played)
         except engine.EngineError as exc:
             self._log("error", f"引擎错误：{exc}（_compute_move 返回 None）")
             return None
@@ -305,7 +427,9 @@ class GameSession:
             short_time = ENGINE_MOVETIME_MS * 2 // 3
             self._log("warn", f"引擎无可用着法，用 {short_time}ms 短时限重试...")
             try:
-                move, score = self.engine.best_move(fen, short_time)
+                move, score = self.engine.best_move(
+                    start_fen, short_time, played, key=self._cache_key(fen)
+                )
             except engine.EngineError as exc:
                 self._log("error", f"重试引擎错误：{exc}（_compute_move 返回 None）")
                 return None
@@ -314,9 +438,107 @@ class GameSession:
             self._finish_game("引擎判定我方无路可走，对局结束")
             return None
         self.state.last_eval_score = score
+        self._search_mated = engine.mate_in(score) == 1
+        self._ponder_guess = self.engine.ponder_move
         self._log("info", f"引擎着法：{move}（评估分 {score}）")
         return fen, move
 
+    def _engine_position(self) -> tuple[str, list[str]]:
+        """引擎局面：(同步点 FEN, 之后双方的 UCI 着法)。
+
+        着法列表让引擎看到完整历史（重复局面判定、跨步复用搜索状态）；同步点棋盘按
+        着法列表回放后与当前棋盘不一致、或行棋方对不上时，以当前棋盘整体重新同步。
+        """
+        st = self.state
+        if st.start_fen is not None and st.start_board is not None:
+            replayed = moves.replay(st.start_board, st.played)
+            turn = st.start_turn if len(st.played) % 2 == 0 else st.start_turn.opponent
+            if replayed is not None and replayed == st.board and turn == st.turn:
+                return st.start_fen, [moves.to_uci(m, st.my_side) for m in st.played]
+            self._log(
+                "warn", f"着法记录（{len(st.played)} 步）与当前棋盘不一致，按当前棋盘重新同步"
+            )
+        st.start_fen = fen_of_board(st.board, st.my_side, st.turn, st.halfmove_clock)
+        st.start_board = encode(st.board).copy()
+        st.start_turn = st.turn
+        st.start_ply = opening.opening_ply(st.board, st.my_side)
+        st.played = []
+        return st.start_fen, []
+
+    def _cache_key(self, fen: str) -> str | None:
+        """搜索缓存键：当前局面（同一行棋方）已在本段着法记录中出现过时返回 None，不读写缓存。
+
+        重复局面下长将/长捉等判罚依赖着法历史，同一布局在不同历史下的最佳着法可能不同。
+        须在 _engine_position 之后调用（同步点 + 着法记录已与当前棋盘一致）。
+        """
+        st = self.state
+        if st.start_board is None or not st.played:
+            return fen
+        board = decode(st.start_board)
+        for ply, move in enumerate(st.played):
+            if (len(st.played) - ply) % 2 == 0 and board == st.board:
+                return None
+            moves.apply(board, move, 0)
+        return fen
+
+    def _take_speculated(self, played: list[str]) -> speculate.Response | None:
+        """取对方思考期间预算好的回应（须是针对当前着法记录末步的，且确有着法）。"""
+        speculated, self._speculated = self._speculated, None
+        if speculated is None or not played or played[-1] != speculated[0]:
+            return None
+        response = speculated[1]
+        return response if response.move is not None else None
+
+    def _book_move(self, fen: str) -> str | None:
+        """开局前 BOOK_MAX_PLY 个半回合内查开局库，命中返回库着法。"""
+        if self.book is None or self.state.start_ply is None:
+            return None
+        if self.state.start_ply + len(self.state.played) >= BOOK_MAX_PLY:
+            return None
+        return self.book.best(fen)
+
+    def _search(self, key: str | None, start_fen: str, played: list[str]) -> tuple[str | None, int]:
+        """预测命中时 ponderhit 直接取后台思考结果，否则（或 ponderhit 失败）正常搜索。
+
+        key 为搜索缓存键（当前局面 FEN；重复局面为 None，见 _cache_key）。
+
+        思考时间由 TimeManager 按阶段 / 合法着法数 / 上一步评估 / 搜索波动 / 整局预算逐步给出。
+        """
+        st = self.state
+        legal = (
+            len(rules.legal_moves(st.board, st.my_side, st.my_side))
+            if rules.well_formed(st.board, st.my_side)
+            else None
+        )
+        limits = self.timer.plan(
+            opening.detect_phase(st.board, st.my_side), legal, score=st.last_eval_score
+        )
+        if self.analysis is not None:
+            self.analysis.begin(limits.movetime_ms)
+        started = time.monotonic()
+        try:
+            result = self._search_with(key, start_fen, played, limits)
+        finally:
+            if self.analysis is not None:
+                self.analysis.finish()
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+        self.timer.record(elapsed_ms, limits, self.engine.last_result)
+        last = self.engine.last_result
+        early = "，主变稳定提前结束" if last is not None and last.stopped_early else ""
+        self._log("info", f"思考 {elapsed_ms}ms（计划 {limits.movetime_ms}ms{early}）")
+        return result
+
+    def _search_with(
+        self, key: str | None, start_fen: str, played: list[str], limits: engine.SearchLimits
+    ) -> tuple[str | None, int]:
+        if self._ponder_hit:
+            self._ponder_hit = False
+            try:
+                return self.engine.ponder_hit(key=key)
+            except engine.EngineError as exc:
+                self._log("warn", f"ponderhit 失败，改为重新搜索：{exc}")
+        return self.engine.best_move(start_fen, moves=played, key=key, limits=limits)
+
     def _unpack_move(self, fen: str, move: str) -> tuple[int, int, int, int, str | None]:
         """解析 (fen, move) → (r1,c1,r2,c2,piece)，piece 无效时返回 None。"""
         from xiangqi_bot.board import square_to_grid
@@ -343,11 +565,8 @@ class GameSession:
         return r1, c1, r2, c2, piece
 
     def _attempt_move(self, r1: int, c1: int, r2: int, c2: int) -> bool:
-        """ADB 点击起子 + 延时 + 点击落子。"""
-        if not self.capture.tap(r1, c1):
-            return False
-        time.sleep(TAP_HOLD_INTERVAL_MS / 1000)
-        return self.capture.tap(r2, c2)
+        """ADB 点击起子 + 延时 + 点击落子（常驻输入通道下一次下发）。"""
+        return self.capture.move(r1, c1, r2, c2)
 
     def _verify(self, r1: int, c1: int, r2: int, c2: int, piece: str) -> VerifyOutcome:
         """MOVE_VERIFY_COUNT 帧逐帧校验分类，返回最终结论。"""
@@ -430,13 +649,15 @@ class GameSession:
         self.state.lift_logged = False
         self._log("info", "检测敌方走棋")
         while self._running and not self._interrupt.is_set() and not self.state.game_over:
+            if self._poll_mate_probe():
+                return
             grabbed = self._grab_board()
             if grabbed is None:
                 continue
             if not self._running or self._interrupt.is_set() or self.state.game_over:
                 break
             new_board, changes = grabbed
-            result = classifier.classify_enemy_frame(changes, self.state.my_side)
+            result = classifier.classify_enemy_frame(changes, self.state.my_side, self.state.board)
             if isinstance(result, Move):
                 self._apply_enemy_move(result)
                 return
@@ -477,21 +698,22 @@ class GameSession:
 
     # ---------- 走棋应用 ----------
 
+    def _apply(self, move: Move) -> None:
+        """写入 board + 更新 clock，并记入引擎着法列表（双方走棋共用）。"""
+        self.state.halfmove_clock = moves.apply(self.state.board, move, self.state.halfmove_clock)
+        self.state.played.append(move)
+
     def _apply_self_move(self, move: Move) -> None:
         """n==2/3a 成功：只完成我方走棋，轮到对方走。"""
-        self.state.halfmove_clock = moves.apply(self.state.board, move, self.state.halfmove_clock)
+        self._apply(move)
         self.state.turn = self.state.my_side.opponent
         self.state.highlight = [move.src, move.dst]
         self._emit()
 
     def _apply_self_then_enemy(self, self_move: Move, enemy_move: Move) -> None:
         """我方走棋成功 + 敌方已完成一步，轮到我方走。"""
-        self.state.halfmove_clock = moves.apply(
-            self.state.board, self_move, self.state.halfmove_clock
-        )
-        self.state.halfmove_clock = moves.apply(
-            self.state.board, enemy_move, self.state.halfmove_clock
-        )
+        self._apply(self_move)
+        self._apply(enemy_move)
         self.state.turn = self.state.my_side
         self.state.highlight = [enemy_move.src, enemy_move.dst]
         self._log_move(enemy_move)
@@ -499,7 +721,9 @@ class GameSession:
 
     def _apply_enemy_move(self, move: Move) -> None:
         """敌方走棋：写入 board + 更新 clock + 切轮次 + 高亮 + 日志 + 推送。"""
-        self.state.halfmove_clock = moves.apply(self.state.board, move, self.state.halfmove_clock)
+        self._settle_ponder(move)
+        self._settle_speculation(move)
+        self._apply(move)
         self.state.turn = self.state.my_side
         self.state.highlight = [move.src, move.dst]
         self._log_move(move)
@@ -513,6 +737,86 @@ class GameSession:
         )
         self._log("enemy", moves.format_move(move, self.state.my_side))
 
+    # ---------- 后台思考（ponder） ----------
+
+    def _start_ponder(self) -> None:
+        """我方走棋落定、轮到对方时，在引擎预测的对方回应上开始后台思考。"""
+        guess, self._ponder_guess = self._ponder_guess, None
+        self._ponder_hit = False
+        if not ENGINE_PONDER or guess is None or self.state.game_over:
+            return
+        if self.state.turn == self.state.my_side:
+            return  # 对方已走完（SELF_THEN_ENEMY），无需预测
+        fen, played = self._engine_position()
+        try:
+            self.engine.ponder(fen, [*played, guess])
+        except engine.EngineError as exc:
+            self._log("warn", f"后台思考启动失败：{exc}")
+            return
+        self._pondering = guess
+        self._log("info", f"后台思考：预测对方走 {guess}")
+
+    def _start_speculation(self) -> None:
+        """轮到对方时，在空闲引擎实例上预算对方候选应着下我方的回应（ponder 之外）。"""
+        st = self.state
+        if not ENGINE_SPECULATE or st.game_over or st.turn == st.my_side:
+            return
+        fen, played = self._engine_position()
+        limits = self.timer.plan(
+            opening.detect_phase(st.board, st.my_side), score=st.last_eval_score
+        )
+        self.speculator.start(fen, played, self._pondering, limits)
+
+    def _settle_speculation(self, move: Move) -> None:
+        """对方走法落定：停止预算，命中则留给下一步 _compute_move 直接取用。"""
+        sp = self.speculator
+        total = sp.total
+        reply = moves.to_uci(move, self.state.my_side)
+        response = sp.settle(reply)
+        if sp.total == total:
+            return  # 本步没有预算结果（无空闲实例或尚未算完）
+        self._speculated = (reply, response) if response is not None else None
+        verdict = "命中" if response is not None else "未命中"
+        self._log(
+            "info",
+            f"应着预算{verdict}（{sp.hits}/{sp.total}，累计省时 {sp.saved_ms / 1000:.1f}s）",
+        )
+
+    def _settle_ponder(self, move: Move) -> None:
+        """对方走法落定：命中则留待 ponderhit，未命中则停止后台思考（之后重新搜索）。"""
+        guess, self._pondering = self._pondering, None
+        if guess is None:
+            return
+        self.ponder_total += 1
+        if moves.to_uci(move, self.state.my_side) == guess:
+            self.ponder_hits += 1
+            self._ponder_hit = True
+            verdict = "命中"
+        else:
+            verdict = "未命中"
+            self.engine.stop_ponder()
+        rate = self.ponder_hits / self.ponder_total
+        self._log(
+            "info",
+            f"预测{verdict}（{self.ponder_hits}/{self.ponder_total}，命中率 {rate:.0%}）",
+        )
+
+    def _settle_unused_ponder(self) -> None:
+        """本步不经搜索出着（预算着法 / 开局库）：预测命中待 ponderhit 的后台思考不再取用，停止并归还实例。"""
+        self._ponder_hit = False
+        self.engine.stop_ponder()
+
+    def _cancel_ponder(self) -> None:
+        """对局结束 / 流程结束 / 中断：放弃进行中的后台思考与应着预算（引擎空闲后才能开始新搜索或 ucinewgame）。"""
+        self._ponder_guess = None
+        self._ponder_hit = False
+        self._speculated = None
+        self.speculator.cancel()
+        if self._pondering is None:
+            return
+        self._pondering = None
+        self.engine.stop_ponder()
+
     # ---------- 认输 / 绝杀 ----------
 
     def _update_resign(self, new_board: Board) -> ResignResult:
@@ -531,24 +835,48 @@ class GameSession:
         return ResignResult.NONE
 
     def _checkmate_probe(self) -> bool:
-        """我方走棋成功后探测对方是否被绝杀（仅限 n==2 + infer 命中场景调用）。"""
+        """我方走棋成功后判定对方是否被绝杀（仅限 n==2 + infer 命中场景调用）。
+
+        主搜索给出 score mate 1 即本着将死/困毙对方，否则对方必有应着，都无需再搜索；
+        无从判断时（None）按走子规则数对方合法着法；棋盘识别异常（规则无法判断）时
+        才在后台线程经引擎池探测，不阻塞走棋，由敌方检测循环取结果。
+        """
+        known, self._search_mated = self._search_mated, None
         opp = self.state.my_side.opponent
-        fen = fen_of_board(
-            self.state.board,
-            self.state.my_side,
-            to_move=opp,
-            halfmove_clock=self.state.halfmove_clock,
-        )
-        self._log("info", f"绝杀探测 FEN（{opp.cn}方行棋）：{fen}")
+        if known is None and rules.well_formed(self.state.board, self.state.my_side):
+            known = not rules.legal_moves(self.state.board, opp, self.state.my_side)
+        if known is None:
+            fen = fen_of_board(
+                self.state.board,
+                self.state.my_side,
+                to_move=opp,
+                halfmove_clock=self.state.halfmove_clock,
+            )
+            self._log("info", f"绝杀探测 FEN（{opp.cn}方行棋，并行）：{fen}")
+            self._mate_probe = self._probe_executor.submit(
+                self.engine.is_mate, fen, ENGINE_MATE_PROBE_MS
+            )
+            return False
+        if not known:
+            return False
+        self._finish_game(f"我方绝杀，{opp.cn}方无路可走")
+        return True
+
+    def _poll_mate_probe(self) -> bool:
+        """取并行绝杀探测的结果（未完成不等待）；已绝杀则结束对局并返回 True。"""
+        probe = self._mate_probe
+        if probe is None or not probe.done():
+            return False
+        self._mate_probe = None
         try:
-            mated = self.engine.is_mate(fen, ENGINE_MATE_PROBE_MS)
+            mated = probe.result()
         except Exception as exc:  # noqa: BLE001 — 引擎假异常降级当未绝杀
             self._log("warn", f"引擎绝杀探测失败，当作未绝杀继续：{exc!r}")
             return False
         if not mated:
             self._log("info", "未绝杀，继续对局")
             return False
-        self._finish_game(f"我方绝杀，{opp.cn}方无路可走")
+        self._finish_game(f"我方绝杀，{self.state.my_side.opponent.cn}方无路可走")
         return True
 
     # ---------- 和棋决策 ----------
@@ -583,6 +911,7 @@ class GameSession:
             if not self._initialize(corrected):
                 return False
             self.engine.newgame()
+            self.timer.new_game()
             if self.state.phase == Phase.ENDGAME:
                 # 残局关卡固定红方先行
                 self.state.turn = Side.RED
@@ -609,11 +938,17 @@ class GameSession:
     # ---------- 截图识别小工具 ----------
 
     def _grab_board(self) -> tuple[Board, list[Change]] | None:
-        """截图 → 弹窗处理 → 矫正 → 识别棋盘，返回 (新布局, 变动列表)。"""
+        """截图 → 弹窗处理 → 矫正 → 增量识别棋盘，返回 (新布局, 变动列表)。"""
         corrected = self.capture.grab()
         if corrected is None:
             return None
-        return recognition.analyze(corrected, self.templates, self.state.prev_board)
+        start = time.perf_counter()
+        result = self.recognizer.analyze(corrected, self.templates, self.state.prev_board)
+        self.capture.timing.record("识别", (time.perf_counter() - start) * 1000)
+        # 模板包复查不计入识别耗时；换包后识别器已重置，用新包重识别本帧
+        if self._check_skin(corrected):
+            result = self.recognizer.analyze(corrected, self.templates, self.state.prev_board)
+        return result
 
     # ---------- 交互 / 结束 / 推送 ----------
 
@@ -644,6 +979,8 @@ class GameSession:
             flush=True,
         )
         self.state.game_over = True
+        # 对方认输 / 超时 / 离开时可能仍在后台思考：立即停止并归还实例，预测不带进下一局
+        self._cancel_ponder()
         self._log("gameover", reason)
         self._emit()
 
@@ -674,5 +1011,6 @@ class GameSession:
                 "board": [list(row) for row in self.state.board],
                 "highlight": [[r, c] for r, c in self.state.highlight],
                 "last_move": self.state.last_move,
+                "cache": self.engine.cache.stats() if self.engine.cache is not None else None,
             }
         )
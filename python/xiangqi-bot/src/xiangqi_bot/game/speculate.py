@@ -0,0 +1,139 @@
+"""对方思考期间的应着预算（Speculator IO 类）。
+
+我方走完后，在引擎池的空闲实例上（后台线程）：
+
+1. 对「我方走后」局面做 MultiPV 搜索，取对方最可能的 ENGINE_SPECULATE_K 种应着
+   （跳过 ponder 已在思考的那一种）
+2. 逐一搜索每种应着之后我方的最佳回应，存入本步的回应表
+
+对方走法落定时 settle() 停止预算并查表，命中则 _compute_move 直接取用、不再搜索。
+池中没有空闲实例（如单实例且正在 ponder）时本步不预算；预算租约可被其它会话的
+正式搜索抢占（发 stop 后尽快归还），被打断的搜索结果一律丢弃。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from xiangqi_bot import config
+from xiangqi_bot.engine import EngineError, SearchLimits
+from xiangqi_bot.engine_pool import Lease, PooledEngine
+
+
+@dataclass(frozen=True)
+class Response:
+    """预算好的我方回应"""
+
+    move: str | None
+    score: int
+    ponder: str | None
+    elapsed_ms: int  # 预算这条回应的搜索用时（命中即省下的延迟）
+
+
+class Speculator:
+    """按步预算对方候选应着下我方的回应，带本会话命中率 / 省时统计"""
+
+    def __init__(self, handle: PooledEngine) -> None:
+        self._handle = handle  # 会话的引擎句柄（同一哈希归属向池租借）
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculate")
+        self._lock = threading.Lock()  # 保护 _halt / _lease（含归还与发 stop）/ _responses
+        self._halt = threading.Event()  # 当前这一步的预算是否已停止
+        self._lease: Lease | None = None
+        self._responses: dict[str, Response] = {}  # 对方应着（UCI）-> 我方回应
+        self.hits = 0  # 对方实际走法落在回应表中的次数
+        self.total = 0  # 有预算结果并已判定的步数
+        self.saved_ms = 0  # 命中省下的搜索时间
+
+    def start(
+        self, fen: str, moves: Sequence[str], exclude: str | None, limits: SearchLimits
+    ) -> None:
+        """我方走后（fen 走完 moves，轮到对方）开始后台预算；立即返回"""
+        self.cancel()
+        halt = threading.Event()
+        with self._lock:
+            self._halt = halt
+            self._responses = {}
+        self._executor.submit(self._run, halt, fen, list(moves), exclude, limits)
+
+    def _run(
+        self,
+        halt: threading.Event,
+        fen: str,
+        moves: list[str],
+        exclude: str | None,
+        limits: SearchLimits,
+    ) -> None:
+        pool = self._handle.pool
+        if halt.is_set():
+            return
+        try:
+            lease = pool.try_acquire(self._handle.owner)
+        except EngineError:
+            return
+        if lease is None:
+            return
+        with self._lock:
+            self._lease = lease
+        pool.set_preempt(lease, self._stop)  # 被抢占只停搜索，已算好的回应仍属本步局面
+        try:
+            eng = lease.engine
+            count = config.ENGINE_SPECULATE_K + (exclude is not None)
+            result = eng.multipv(fen, moves, config.ENGINE_SPECULATE_MS, count)
+            replies = [info.pv[0] for info in result.infos if info.pv and info.pv[0] != exclude]
+            for reply in replies[: config.ENGINE_SPECULATE_K]:
+                if halt.is_set():
+                    break
+                started = time.monotonic()
+                move, score = eng.best_move(fen, moves=[*moves, reply], limits=limits)
+                elapsed_ms = int((time.monotonic() - started) * 1000)
+                with self._lock:
+                    if halt.is_set():
+                        break  # 被打断的搜索结果不可信
+                    self._responses[reply] = Response(move, score, eng.ponder_move, elapsed_ms)
+        except EngineError:
+            pass  # 预算只是加速，失败不影响对弈（正式搜索会重建引擎）
+        finally:
+            with self._lock:  # 与 cancel 同锁：发 stop 期间租约不会被归还
+                self._lease = None
+                pool.release(lease)
+
+    def cancel(self) -> None:
+        """放弃本步预算（流程结束 / 对局结束）：停止搜索并清空回应表，之后的 settle 不再命中"""
+        with self._lock:
+            self._stop_locked()
+            self._responses = {}
+
+    def _stop(self) -> None:
+        """停止当前预算（进行中的搜索发 stop），保留已算好的回应；也是引擎池的抢占回调"""
+        with self._lock:
+            self._stop_locked()
+
+    def _stop_locked(self) -> None:
+        """持锁发 stop：stop 只发给本预算仍持有的实例，不会落到已归还、
+        又借给其它会话 / ponder / 探测的实例上打断它们的搜索。
+        """
+        self._halt.set()
+        if self._lease is not None:
+            self._lease.engine.interrupt()
+
+    def settle(self, reply: str) -> Response | None:
+        """对方走法落定：停止预算并查回应表，命中返回预算的回应（无预算结果不计入统计）"""
+        with self._lock:
+            self._stop_locked()
+            responses, self._responses = self._responses, {}
+        if not responses:
+            return None
+        self.total += 1
+        hit = responses.get(reply)
+        if hit is not None:
+            self.hits += 1
+            self.saved_ms += hit.elapsed_ms
+        return hit
+
+    def close(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -10,7 +10,7 @@ from dataclasses import dataclass, field
 from enum import StrEnum
 from typing import Literal, NamedTuple
 
-from xiangqi_bot.board import Board, make_empty_board
+from xiangqi_bot.board import Board, Codes, encode, make_empty_board
 
 
 class Side(StrEnum):
@@ -124,7 +124,7 @@ class GameState:
     """
 
     board: Board = field(default_factory=make_empty_board)
-    prev_board: Board | None = None
+    prev_board: Codes | None = None  # 轮次开头快照（int8 编码，供逐帧对比）
     my_side: Side = Side.RED
     turn: Side = Side.RED  # 行棋方（默认红先占位）
     phase: Phase = Phase.MIDDLE
@@ -134,6 +134,12 @@ class GameState:
     highlight: list[tuple[int, int]] = field(default_factory=list)
     last_move: str | None = None
     last_eval_score: int = 0
+    # 引擎局面：最近一次同步点 + 之后双方已走的着法（`position fen <start_fen> moves ...`）
+    start_fen: str | None = None  # None = 下一次计算着法时从当前棋盘重新同步
+    start_board: Codes | None = None  # 同步点棋盘（int8 编码），与着法列表互相校验
+    start_turn: Side = Side.RED
+    start_ply: int | None = None  # 同步点是开局第几个半回合（非开局局面为 None，不查开局库）
+    played: list[Move] = field(default_factory=list)
     # 检测瞬态（每次检测会话由控制层重置）
     resign_streak: int = 0
     noisy_count: int = 0
@@ -152,10 +158,15 @@ class GameState:
         self.highlight = []
         self.last_move = None
         self.last_eval_score = 0
+        self.start_fen = None
+        self.start_board = None
+        self.start_turn = Side.RED
+        self.start_ply = None
+        self.played = []
         self.resign_streak = 0
         self.noisy_count = 0
         self.lift_logged = False
 
     def snapshot_prev(self) -> None:
-        """把当前 board 深拷贝为 prev_board（每轮次开头调用）。"""
-        self.prev_board = [row[:] for row in self.board]
+        """把当前 board 快照为 int8 编码的 prev_board（每轮次开头调用）。"""
+        self.prev_board = encode(self.board).copy()
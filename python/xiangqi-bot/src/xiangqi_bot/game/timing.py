@@ -0,0 +1,72 @@
+"""自适应思考时间（每步一个 SearchLimits）。
+
+以 ENGINE_MOVETIME_MS 为基准，按以下输入缩放，再用整局预算约束：
+
+- 阶段：开局（多半有库/定式）少想，中局满额，残局略少
+- 合法着法数：唯一着法只搜 1 层；着法很少（多为被将军）减半
+- 上一次搜索的分数波动：各层主变分数起伏越大局面越尖锐，最多加倍
+- 杀棋分：我方已有杀时按剩余步数限深，直接走完杀着
+- 整局预算 ENGINE_GAME_BUDGET_MS：单步不超过「剩余预算 / 预计剩余步数」的两倍
+
+主变稳定时由引擎提前 stop（SearchLimits.stable_ms），省下的时间留给后面的尖锐局面。
+"""
+
+from __future__ import annotations
+
+from xiangqi_bot import config
+from xiangqi_bot.engine import SearchLimits, SearchResult, mate_in
+from xiangqi_bot.game.state import Phase
+
+_PHASE_FACTOR = {Phase.OPENING: 0.6, Phase.MIDDLE: 1.0, Phase.ENDGAME: 0.8}
+_MOVES_LEFT = {Phase.OPENING: 40, Phase.MIDDLE: 30, Phase.ENDGAME: 20}  # 预计我方剩余步数
+_FEW_MOVES = 3  # 合法着法不超过此数时减半
+_VOLATILE_CP = 200  # 分数波动达到此值时思考时间加倍
+
+
+class TimeManager:
+    """一局的思考时间分配：plan() 给出本步限制，record() 记下实际用时与搜索波动"""
+
+    def __init__(self, budget_ms: int = config.ENGINE_GAME_BUDGET_MS) -> None:
+        self.budget_ms = budget_ms
+        self.spent_ms = 0  # 本局已用思考时间
+        self.volatility = 0  # 最近一次搜索的分数波动
+        self.saved_ms = 0  # 提前 stop 省下的时间（计划 - 实际）
+
+    def new_game(self) -> None:
+        self.spent_ms = 0
+        self.volatility = 0
+        self.saved_ms = 0
+
+    @property
+    def remaining_ms(self) -> int:
+        return max(0, self.budget_ms - self.spent_ms)
+
+    def plan(self, phase: Phase, legal_moves: int | None = None, score: int = 0) -> SearchLimits:
+        """本步搜索限制。score 为上一步引擎评估（我方视角），legal_moves 未知时传 None"""
+        if not config.ENGINE_TIME_ADAPTIVE:
+            return SearchLimits(config.ENGINE_MOVETIME_MS)
+        low, high = config.ENGINE_MIN_MOVETIME_MS, config.ENGINE_MAX_MOVETIME_MS
+        if legal_moves == 1:
+            return SearchLimits(low, depth=1)
+        mate = mate_in(score)
+        if mate is not None and mate > 0:
+            # 上一步已见 N 步杀：对方应着后至多 N-1 步，限深够找到杀着即可
+            return SearchLimits(high, depth=2 * mate + 1)
+
+        ms = config.ENGINE_MOVETIME_MS * _PHASE_FACTOR[phase]
+        if legal_moves is not None and legal_moves <= _FEW_MOVES:
+            ms /= 2
+        ms *= 1 + min(self.volatility, _VOLATILE_CP) / _VOLATILE_CP
+        ms = min(ms, 2 * self.remaining_ms / _MOVES_LEFT[phase])
+        movetime = int(max(low, min(high, ms)))
+        return SearchLimits(movetime, stable_ms=int(movetime * config.ENGINE_EARLY_STOP))
+
+    def record(self, elapsed_ms: int, limits: SearchLimits, result: SearchResult | None) -> None:
+        """记录本步实际用时（含缓存命中/ponderhit 的极短用时）与搜索波动"""
+        self.spent_ms += elapsed_ms
+        if result is None:
+            return
+        if result.infos:
+            self.volatility = result.volatility  # 缓存命中无逐层信息，沿用上次
+        if result.stopped_early:
+            self.saved_ms += max(0, limits.movetime_ms - elapsed_ms)
@@ -0,0 +1,167 @@
+"""引擎搜索结果持久缓存（SQLite，跨对局/跨进程共享）。
+
+自动下一局反复对弈，开局与残局关卡的局面大量重复；缓存命中时直接返回上次
+`go movetime` 的结果，省掉整段思考时间。
+
+键为「规范化局面（布局 + 行棋方）+ 思考时限 + 引擎标识」：
+
+- 去掉 FEN 的回合计数；halfmove clock 超过 SEARCH_CACHE_MAX_CLOCK 的局面不缓存
+  （长串不吃子时自然限招与重复局面判定依赖历史，同一布局结果可能不同）
+- 键不含着法历史：当前局面已在本局着法记录中出现过（重复局面，长将/长捉判罚依赖历史）时，
+  会话不传缓存键（GameSession._cache_key），这类搜索不读写缓存
+- 引擎标识取 UCI `id name`，换引擎版本即自然失效
+- 思考时限逐步自适应（game.timing），查询时取时限不低于本次请求的最长一条
+  （想得更久的结果可以直接顶替较短的搜索）
+
+按最近使用时间 LRU 淘汰，容量为 SEARCH_CACHE_SIZE 条。数据库不可用（只读目录、
+文件损坏等）时缓存静默失效，只影响命中率，不影响对弈。
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from xiangqi_bot import config
+
+CACHE_VERSION = 1
+
+_EVICT_EVERY = 64  # 每写入多少条检查一次容量
+
+Entry = tuple[str | None, int, str | None]  # (bestmove, score, ponder)
+
+
+def normalize(fen: str) -> str | None:
+    """FEN -> 缓存键局面部分（布局 + 行棋方）；不宜缓存的局面返回 None"""
+    fields = fen.split()
+    if len(fields) < 2:
+        return None
+    try:
+        clock = int(fields[4]) if len(fields) > 4 else 0
+    except ValueError:
+        return None
+    if clock > config.SEARCH_CACHE_MAX_CLOCK:
+        return None
+    return f"{fields[0]} {fields[1]}"
+
+
+class SearchCache:
+    """FEN -> (bestmove, score, ponder) 的 SQLite 缓存，带本实例命中/未命中计数（线程安全）"""
+
+    def __init__(self, path: Path, capacity: int) -> None:
+        self._path = path
+        self.capacity = capacity
+        self._conn: sqlite3.Connection | None = None
+        self._broken = False  # 打开/读写失败后不再尝试
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._conn is not None or self._broken:
+            return self._conn
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search ("
+                "fen TEXT, movetime INTEGER, engine TEXT, "
+                "move TEXT, score INTEGER, ponder TEXT, used REAL, "
+                "PRIMARY KEY (fen, movetime, engine)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS search_used ON search (used)")
+            conn.commit()
+        except (OSError, sqlite3.Error):
+            self._broken = True
+            return None
+        self._conn = conn
+        return conn
+
+    def _engine_key(self, engine: str) -> str:
+        return f"{engine}#v{CACHE_VERSION}"
+
+    def get(self, fen: str, movetime_ms: int, engine: str) -> Entry | None:
+        """查询时限 >= movetime_ms 的缓存（取时限最长者）；命中时刷新最近使用时间。
+
+        不可缓存的局面不计入命中/未命中。
+        """
+        key = normalize(fen)
+        if key is None:
+            return None
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            engine_key = self._engine_key(engine)
+            try:
+                row = conn.execute(
+                    "SELECT move, score, ponder, movetime FROM search "
+                    "WHERE fen = ? AND engine = ? AND movetime >= ? "
+                    "ORDER BY movetime DESC LIMIT 1",
+                    (key, engine_key, movetime_ms),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE search SET used = ? WHERE fen = ? AND movetime = ? AND engine = ?",
+                        (time.time(), key, row[3], engine_key),
+                    )
+                    conn.commit()
+            except sqlite3.Error:
+                self._broken = True
+                return None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0], row[1], row[2]
+
+    def put(
+        self,
+        fen: str,
+        movetime_ms: int,
+        engine: str,
+        move: str | None,
+        score: int,
+        ponder: str | None,
+    ) -> None:
+        """写入一次搜索结果；超出容量时淘汰最久未用的条目"""
+        key = normalize(fen)
+        if key is None:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, movetime_ms, self._engine_key(engine), move, score, ponder, time.time()),
+                )
+                self._puts += 1
+                if self._puts % _EVICT_EVERY == 0:
+                    self._evict(conn)
+                conn.commit()
+            except sqlite3.Error:
+                self._broken = True
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM search").fetchone()
+        excess = count - self.capacity
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM search WHERE (fen, movetime, engine) IN "
+                "(SELECT fen, movetime, engine FROM search ORDER BY used LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
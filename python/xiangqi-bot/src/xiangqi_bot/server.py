@@ -16,7 +16,7 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from starlette.responses import Response
 
-from xiangqi_bot import adb_client, config
+from xiangqi_bot import adb_client, config, engine_pool
 from xiangqi_bot.game import GameSession
 
 
@@ -86,6 +86,9 @@ class Hub:
         self.last_state = state
         self.broadcast({"type": "state", "state": state})
 
+    def on_analysis(self, data: dict) -> None:
+        self.broadcast({"type": "analysis", **data})
+
     def ask_turn(self) -> None:
         self.broadcast({"type": "prompt_turn"})
 
@@ -102,7 +105,9 @@ class Hub:
     def open_session(self, device) -> None:
         """在 worker 线程中为已连接设备创建对局会话"""
         self.device_name = device.serial
-        self.session = GameSession(device, self.log, self.on_state, self.ask_turn)
+        self.session = GameSession(
+            device, self.log, self.on_state, self.ask_turn, on_analysis=self.on_analysis
+        )
         self.log("ok", f"已连接设备 {self.device_name}")
         self.broadcast({"type": "connected", "serial": self.device_name})
 
@@ -148,6 +153,7 @@ async def lifespan(_app: FastAPI):
     yield
     if hub.session is not None:
         hub.session.close()
+    engine_pool.shutdown()
 
 
 app = FastAPI(title="JJ象棋 Bot", lifespan=lifespan)
@@ -250,7 +256,7 @@ class NoCacheStaticFiles(StaticFiles):
         return response
 
 
-app.mount("/pieces", StaticFiles(directory=str(config.TEMPLATES_DIR)), name="pieces")
+app.mount("/pieces", StaticFiles(directory=str(config.PIECE_SKINS_DIR)), name="pieces")
 
 if config.WEB_DIR.is_dir():
     app.mount("/", NoCacheStaticFiles(directory=str(config.WEB_DIR), html=True), name="web")
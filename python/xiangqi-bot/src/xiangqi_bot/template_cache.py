@@ -0,0 +1,155 @@
+"""模板磁盘缓存：解码后的模板像素与派生预计算按 PNG 内容哈希落盘，启动时 mmap 零拷贝加载。
+
+每组模板（棋子 / 结算文字 / 和棋弹窗）在 `config.TEMPLATE_CACHE_DIR` 下对应：
+
+- `<组>.json`：清单（缓存版本、参数标签、各 PNG 的 SHA-256、各模板形状与偏移）
+- `<组>.pixels.npy`：全部模板像素首尾相接的一维 uint8 数组
+- `<组>.<键>.npy`：调用方派生的预计算数组（如批量匹配的模板频谱）
+
+清单最后写入，作为缓存有效的提交点；PNG 内容、版本或参数标签任一不符即整组重建。
+进程内另按文件 (大小, mtime) 签名缓存已加载结果，同一进程重复加载（多会话、重连）
+直接复用同一对象。签名至多每 _RECHECK_S 秒查看一次（逐帧调用的文字模板只剩一次字典查找），
+PNG 被修改后至多 _RECHECK_S 秒即失效，不会长期返回过期模板。
+"""
+
+import hashlib
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from xiangqi_bot import config
+
+CACHE_VERSION = 1
+
+Images = dict[str, np.ndarray]
+Derive = Callable[[Images], dict[str, np.ndarray]]
+
+_RECHECK_S = 5.0  # 进程内缓存命中后，多久内不再 glob / stat PNG 查看签名
+
+# 进程内缓存：组名 -> (上次核对签名的时刻, 文件签名, 模板, 派生数组)
+_loaded: dict[str, tuple[float, tuple, Images, dict[str, np.ndarray]]] = {}
+
+
+def _signature(paths: list[Path]) -> tuple:
+    """文件名 + 大小 + mtime，进程内快速判断 PNG 是否变化（不读文件内容）"""
+    stats = [p.stat() for p in paths]
+    return tuple((p.name, s.st_size, s.st_mtime_ns) for p, s in zip(paths, stats, strict=True))
+
+
+def _read_manifest(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _load_disk(
+    directory: Path, group: str, manifest: dict, keys: tuple[str, ...]
+) -> tuple[Images, dict[str, np.ndarray]] | None:
+    """按清单 mmap 读取像素与派生数组，模板为扁平像素数组上的只读视图（零拷贝）"""
+    try:
+        pixels = np.load(directory / f"{group}.pixels.npy", mmap_mode="r")
+        derived = {k: np.load(directory / f"{group}.{k}.npy", mmap_mode="r") for k in keys}
+    except (OSError, ValueError):
+        return None
+    images: Images = {}
+    for name, shape, offset in manifest["entries"]:
+        size = int(np.prod(shape))
+        if offset + size > pixels.size:
+            return None
+        images[name] = pixels[offset : offset + size].reshape(shape)
+    return images, derived
+
+
+def _save_disk(
+    directory: Path, group: str, manifest: dict, images: Images, derived: dict[str, np.ndarray]
+) -> None:
+    """写入像素、派生数组，最后原子替换清单；磁盘不可写时静默跳过（仅失去缓存）"""
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        flat = [img.reshape(-1) for img in images.values()]
+        arrays = {"pixels": np.concatenate(flat) if flat else np.zeros(0, np.uint8), **derived}
+        for key, arr in arrays.items():
+            tmp = directory / f"{group}.{key}.npy.tmp"
+            with tmp.open("wb") as f:
+                np.save(f, np.ascontiguousarray(arr))
+            tmp.replace(directory / f"{group}.{key}.npy")
+        tmp = directory / f"{group}.json.tmp"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(directory / f"{group}.json")
+    except OSError:
+        pass
+
+
+def load_group(
+    group: str,
+    source_dir: Path,
+    flags: int,
+    derive: Derive | None = None,
+    tag: str = "",
+) -> tuple[Images, dict[str, np.ndarray]]:
+    """加载 source_dir/*.png 一组模板，返回 ({文件名: 模板}, {键: 派生数组})。
+
+    flags 为 cv2.imdecode 读取方式；derive 由解码后的模板计算需要落盘的预计算数组，
+    tag 描述影响派生结果的参数（参数变化时缓存失效）。
+    """
+    now = time.monotonic()
+    hit = _loaded.get(group)
+    if hit is not None and hit[1][:2] == (flags, tag) and now - hit[0] < _RECHECK_S:
+        return hit[2], hit[3]
+    paths = sorted(source_dir.glob("*.png"))
+    signature = (flags, tag, _signature(paths))
+    if hit is not None and hit[1] == signature:
+        _loaded[group] = (now, *hit[1:])
+        return hit[2], hit[3]
+
+    raw = {p.stem: p.read_bytes() for p in paths}
+    hashes = {name: hashlib.sha256(data).hexdigest() for name, data in raw.items()}
+    directory = config.TEMPLATE_CACHE_DIR
+    manifest = _read_manifest(directory / f"{group}.json")
+    keys = tuple(manifest.get("derived", ())) if manifest else ()
+    loaded = None
+    if (
+        manifest is not None
+        and manifest.get("version") == CACHE_VERSION
+        and manifest.get("flags") == flags
+        and manifest.get("tag") == tag
+        and manifest.get("hashes") == hashes
+        and (derive is not None) == bool(keys)
+    ):
+        loaded = _load_disk(directory, group, manifest, keys)
+
+    if loaded is None:
+        images: Images = {}
+        for name, data in raw.items():
+            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+            if img is None:
+                raise RuntimeError(f"无法读取模板图片: {source_dir / (name + '.png')}")
+            images[name] = img
+        derived = derive(images) if derive is not None else {}
+        entries, offset = [], 0
+        for name, img in images.items():
+            entries.append([name, list(img.shape), offset])
+            offset += img.size
+        manifest = {
+            "version": CACHE_VERSION,
+            "flags": flags,
+            "tag": tag,
+            "hashes": hashes,
+            "entries": entries,
+            "derived": list(derived),
+        }
+        _save_disk(directory, group, manifest, images, derived)
+        loaded = (images, derived)
+
+    _loaded[group] = (now, signature, *loaded)
+    return loaded
+
+
+def clear() -> None:
+    """清空进程内缓存（磁盘缓存不受影响）"""
+    _loaded.clear()
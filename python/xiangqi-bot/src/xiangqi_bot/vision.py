@@ -1,32 +1,167 @@
 """图片识别：透视矫正、矫正空间模板匹配、两图对比。
 
 所有分析均在"矫正棋盘"上进行：源截图先按分辨率查 `config.BOARD_CORNERS`
-做透视矫正（warpPerspective 到固定 900x1000 空间），再在矫正空间内匹配模板，
+做透视矫正（按分辨率预计算的 remap 表映射到固定 900x1000 空间），再在矫正空间内匹配模板，
 因此匹配与源分辨率无关（同一游戏画面在任意分辨率下识别结果一致）。
+
+整盘识别（`analyze_codes`）把 90 格搜索窗口（`cell_windows`）交给 `match_windows`：
+先做颜色预分类（`config.COLOR_PRECLASSIFY`，`classify_cells`）：一次 HSV 转换统计
+各格格心圆盘内红色像素与深色像素占比，把格子分为空 / 红 / 黑 / 不确定，
+空格直接判空、红黑格只与同色 7 张模板做相关，不确定的格子仍比全部模板；
+再按类把窗口堆叠成张量交给批量引擎（`window_scores`），每张模板一次相关即覆盖该类全部格子，
+逐格最大分由 NumPy 归约得到，结果与逐格 `cv2.matchTemplate`（TM_CCOEFF_NORMED）一致。
+相关分子有两种后端（`config.MATCH_BACKEND`）：默认 "fft" 逐频点矩阵乘；"ncc" 用滑窗视图把
+每格 21x21 个偏移展开成 60*60*3 维行向量，与 (60*60*3, 14) 的零均值模板矩阵做整块矩阵乘。
+`match_scores` 不经预分类，直接给出 90 格 x 全部模板的分数（基准与一致性校验用）。
+
+棋子模板按盘面皮肤分包（`config.PIECE_SKINS_DIR/<皮肤>/`）：`select_skin` 用每包对有子格的
+平均最大匹配分（`confidence`）挑出最贴合当前画面的一包，会话只载入这一包（仍是 14 张模板）。
+
+候选模板按位置裁剪（`config.TEMPLATE_PRUNE`，表见 board.placement_mask，按我方红黑翻转）：
+仕士/相象/将帥/兵卒只在其可能出现的格子参与比较，逐格匹配少试约一半模板，
+批量引擎在取最高分前屏蔽不可能的棋子，排除「九宫外的士」之类的误识别。
 """
 
+from dataclasses import dataclass
+from functools import cached_property
+
 import cv2
 import numpy as np
 
-from xiangqi_bot import config
-from xiangqi_bot.board import COLS, ROWS, corrected_center
+from xiangqi_bot import config, template_cache
+from xiangqi_bot.board import (
+    COLS,
+    EMPTY,
+    PIECE_CODE,
+    RED_MIN_CODE,
+    ROWS,
+    Codes,
+    corrected_center,
+    decode,
+    placement_mask,
+)
 
 Templates = dict[str, np.ndarray]
 
 _HOMOGRAPHY_CACHE: dict[tuple[int, int], np.ndarray] = {}
+_TAPS_CACHE: dict[bytes, np.ndarray] = {}
+
+# 搜索窗口边长（模板 + 两侧滑动半径）与每轴滑动偏移数
+_WINDOW = config.TEMPLATE_SIZE + 2 * config.MATCH_SEARCH_HALF  # 80
+_OFFSETS = 2 * config.MATCH_SEARCH_HALF + 1  # 21
+# 窗口在格内的起点（格心 - 窗口半边长）
+_WINDOW_MARGIN = config.CORRECT_CELL // 2 - _WINDOW // 2  # 10
+# 窗口零均值平方和低于此值视为纯色（与 OpenCV 一致，相关系数记 0）
+_FLAT_VARIANCE = 1.0
+_NCC_CHUNK = 4  # ncc 后端每次矩阵乘展开的格数（每格 441x10800 float32 约 19 MB）
+
+# 颜色预分类：格心圆盘（半径 = 模板半边长）内红色 / 深色像素占比阈值。
+# 红：色相 <8 或 >175、饱和度 >100、亮度 >70（同 scripts/detect_board_corners.py）；
+# 深：亮度 <90（黑子字与描边；木纹/石纹底色与红子都亮）。
+# 实测（木/石两种盘面）：空格红 ≤0.06、深 ≤0.06；红子红 ≥0.39；黑子深 ≥0.29
+CELL_EMPTY, CELL_RED, CELL_BLACK, CELL_UNKNOWN = range(4)
+_DISC_RADIUS = config.TEMPLATE_SIZE // 2
+_RED_PIECE = 0.3  # 红占比达此值（且深色很少）为红子
+_BLACK_PIECE = 0.2  # 深占比达此值（且几乎无红）为黑子
+_EMPTY_RED = 0.15  # 红、深占比都低于各自上限才判空格
+_EMPTY_DARK = 0.12
+
+
+@dataclass(frozen=True)
+class TemplateBank:
+    """批量匹配的模板预计算（按模板字典构建一次，逐帧复用）。
+
+    spectra 为零均值模板在窗口尺寸下的共轭频谱，排成 (频点, 通道, 模板) 供逐频点矩阵乘；
+    matrix（ncc 后端首次用到时由 spectra 还原）为零均值模板按 (通道, 行, 列) 展平的
+    (60*60*3, 模板) 矩阵；
+    norms 为零均值模板的 L2 范数（TM_CCOEFF_NORMED 分母的模板部分）；
+    codes 为各列模板对应的棋子编码（board.PIECE_CODE）。
+    """
+
+    ids: tuple[str, ...]
+    spectra: np.ndarray
+    norms: np.ndarray
+    codes: np.ndarray
+
+    def subset(self, keep: np.ndarray) -> "TemplateBank":
+        """只含 keep（按列布尔掩码）模板的子库"""
+        return TemplateBank(
+            ids=tuple(pid for pid, k in zip(self.ids, keep, strict=True) if k),
+            spectra=np.ascontiguousarray(self.spectra[:, :, keep]),
+            norms=self.norms[keep],
+            codes=self.codes[keep],
+        )
+
+    @cached_property
+    def matrix(self) -> np.ndarray:
+        """ncc 后端的零均值模板矩阵：共轭频谱逆变换回零填充的模板，裁出 60x60 后展平"""
+        ch, count = self.spectra.shape[1:]
+        spectra = self.spectra.reshape(_WINDOW, _WINDOW // 2 + 1, ch, count).transpose(3, 2, 0, 1)
+        size = config.TEMPLATE_SIZE
+        zero_mean = np.fft.irfft2(np.conj(spectra), s=(_WINDOW, _WINDOW))[:, :, :size, :size]
+        return np.ascontiguousarray(zero_mean.reshape(count, -1).T, dtype=np.float32)
+
+    @cached_property
+    def by_color(self) -> dict[int, "TemplateBank"]:
+        """颜色预分类后各类格子使用的模板库：红 / 黑为同色子库，不确定为全库"""
+        red = self.codes >= RED_MIN_CODE
+        return {CELL_RED: self.subset(red), CELL_BLACK: self.subset(~red), CELL_UNKNOWN: self}
 
-_gameover_text_cache: dict[str, np.ndarray] | None = None
-_draw_text_cache: dict[str, np.ndarray] | None = None
 
+# 模板字典 id -> (模板字典, 预计算)；同时保留字典引用，避免 id 被回收复用。
+# 只留最近几包（各皮肤各一包 + 测试临时字典），超出时淘汰最早放入的
+_bank_cache: dict[int, tuple[Templates, TemplateBank]] = {}
+_BANK_CACHE_SIZE = 4
+
+
+def _remember_bank(templates: Templates, bank: TemplateBank) -> TemplateBank:
+    _bank_cache.pop(id(templates), None)
+    while len(_bank_cache) >= _BANK_CACHE_SIZE:
+        del _bank_cache[next(iter(_bank_cache))]
+    _bank_cache[id(templates)] = (templates, bank)
+    return bank
+
+
+@dataclass(frozen=True)
+class Calibration:
+    """某源分辨率的矫正标定（按 (w, h) 缓存）：cv2.remap 定点表（CV_16SC2 + 插值系数）。
+
+    board_maps 覆盖整张 900x1000 矫正棋盘；window_maps 只覆盖 90 格搜索窗口拼成的
+    720x800 图（识别只读这些区域），逐帧只需一次 remap，无需每帧重算透视坐标。
+    """
 
-def load_templates() -> Templates:
-    """加载 templates/*.png，返回 {棋子ID: 模板图(BGR)}"""
-    templates: Templates = {}
-    for path in sorted(config.TEMPLATES_DIR.glob("*.png")):
-        tpl = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), cv2.IMREAD_COLOR)
-        if tpl is None:
-            raise RuntimeError(f"无法读取模板图片: {path}")
-        templates[path.stem] = tpl
+    board_maps: tuple[np.ndarray, np.ndarray]
+    window_maps: tuple[np.ndarray, np.ndarray]
+
+
+_CALIBRATION_CACHE: dict[tuple[int, int], Calibration] = {}
+
+
+def skins() -> list[str]:
+    """可用的棋子模板包（PIECE_SKINS_DIR 下含 PNG 的子目录名），按名称排序"""
+    if not config.PIECE_SKINS_DIR.is_dir():
+        return []
+    return sorted(
+        d.name for d in config.PIECE_SKINS_DIR.iterdir() if d.is_dir() and any(d.glob("*.png"))
+    )
+
+
+def load_templates(skin: str = config.DEFAULT_SKIN) -> Templates:
+    """加载 PIECE_SKINS_DIR/<skin>/*.png，返回 {棋子ID: 模板图(BGR)}。
+
+    经 template_cache 读取：像素与批量匹配预计算（频谱、范数）随 PNG 哈希落盘，
+    命中时零解码、零 FFT，并直接预置 template_bank 的缓存。
+    """
+    templates, derived = template_cache.load_group(
+        f"pieces_{skin}",
+        config.PIECE_SKINS_DIR / skin,
+        cv2.IMREAD_COLOR,
+        derive=_bank_arrays,
+        tag=f"window={_WINDOW}",
+    )
+    hit = _bank_cache.get(id(templates))
+    if hit is None or hit[0] is not templates:
+        _remember_bank(templates, _make_bank(templates, derived))
     return templates
 
 
@@ -51,31 +186,80 @@ def homography(w: int, h: int) -> np.ndarray:
     return _HOMOGRAPHY_CACHE[key]
 
 
-def correct_board(img: np.ndarray) -> np.ndarray:
-    """源截图 -> 矫正棋盘（900x1000）"""
+def calibration(w: int, h: int) -> Calibration:
+    """按源截图分辨率取矫正标定（首次构建 remap 定点表，之后复用）"""
+    key = (int(w), int(h))
+    if key not in _CALIBRATION_CACHE:
+        inverse = np.linalg.inv(homography(w, h))
+        ys, xs = np.mgrid[0 : config.CORRECT_H, 0 : config.CORRECT_W]
+        dst = np.stack([xs, ys], axis=-1).reshape(-1, 1, 2).astype(np.float64)
+        src = cv2.perspectiveTransform(dst, inverse).reshape(config.CORRECT_H, config.CORRECT_W, 2)
+        src = src.astype(np.float32)
+        windows = _cell_grid(src, _WINDOW_MARGIN, _WINDOW).transpose(0, 2, 1, 3, 4)
+        windows = np.ascontiguousarray(windows.reshape(ROWS * _WINDOW, COLS * _WINDOW, 2))
+        _CALIBRATION_CACHE[key] = Calibration(
+            board_maps=cv2.convertMaps(src, None, cv2.CV_16SC2),
+            window_maps=cv2.convertMaps(windows, None, cv2.CV_16SC2),
+        )
+    return _CALIBRATION_CACHE[key]
+
+
+def correct_board(img: np.ndarray, cells_only: bool = False) -> np.ndarray:
+    """源截图 -> 矫正棋盘（900x1000）。
+
+    cells_only=True 时只矫正 90 格搜索窗口（其余像素为 0），供逐帧识别使用。
+    """
     h, w = img.shape[:2]
-    return cv2.warpPerspective(img, homography(w, h), (config.CORRECT_W, config.CORRECT_H))
+    calib = calibration(w, h)
+    if not cells_only:
+        return cv2.remap(img, *calib.board_maps, cv2.INTER_LINEAR)
+    windows = cv2.remap(img, *calib.window_maps, cv2.INTER_LINEAR)
+    board = np.zeros((config.CORRECT_H, config.CORRECT_W, *img.shape[2:]), img.dtype)
+    m = _WINDOW_MARGIN
+    grid = board.reshape(ROWS, config.CORRECT_CELL, COLS, config.CORRECT_CELL, -1)
+    grid[:, m : m + _WINDOW, :, m : m + _WINDOW] = windows.reshape(ROWS, _WINDOW, COLS, _WINDOW, -1)
+    return board
+
+
+def grid_taps(h_matrix: np.ndarray) -> np.ndarray:
+    """90 格格心的源截图点击坐标 (10, 9, 2)，按透视矩阵缓存（逆矩阵只算一次）"""
+    key = h_matrix.tobytes()
+    if key not in _TAPS_CACHE:
+        centers = np.array(
+            [[corrected_center(r, c) for c in range(COLS)] for r in range(ROWS)], np.float64
+        )
+        src = cv2.perspectiveTransform(centers.reshape(-1, 1, 2), np.linalg.inv(h_matrix))
+        _TAPS_CACHE[key] = np.rint(src.reshape(ROWS, COLS, 2)).astype(int)
+    return _TAPS_CACHE[key]
 
 
 def tap_xy(h_matrix: np.ndarray, r: int, c: int) -> tuple[int, int]:
-    """矫正空间网格格 -> 源截图屏幕坐标（逆透视映射，用于模拟点击）"""
-    x, y = corrected_center(r, c)
-    src = cv2.perspectiveTransform(np.array([[[x, y]]], np.float32), np.linalg.inv(h_matrix))
-    sx, sy = src[0, 0]
-    return round(float(sx)), round(float(sy))
+    """矫正空间网格格 -> 源截图屏幕坐标（逆透视映射，用于模拟点击；查预计算表）"""
+    x, y = grid_taps(h_matrix)[r, c]
+    return int(x), int(y)
 
 
-def analyze_cell(img: np.ndarray, r: int, c: int, templates: Templates) -> str | None:
-    """分析矫正棋盘某格的棋子 ID，空格返回 None"""
+def candidates(my_side: str | None = None) -> np.ndarray | None:
+    """各格允许的棋子编码表 (ROWS, COLS, 15)；关闭 TEMPLATE_PRUNE（调试全扫描）时返回 None"""
+    return placement_mask(my_side) if config.TEMPLATE_PRUNE else None
+
+
+def analyze_cell(
+    img: np.ndarray, r: int, c: int, templates: Templates, my_side: str | None = None
+) -> str | None:
+    """分析矫正棋盘某格的棋子 ID，空格返回 None（只试该格可能出现的棋子模板）"""
     px, py = corrected_center(r, c)
     px, py = round(px), round(py)
     half = config.MATCH_SEARCH_HALF + config.TEMPLATE_SIZE // 2
     x1 = max(0, px - half)
     y1 = max(0, py - half)
     window = img[y1 : py + half, x1 : px + half]
+    allowed = candidates(my_side)
     best_id: str | None = None
     best_score = -1.0
     for piece_id, tpl in templates.items():
+        if allowed is not None and not allowed[r, c, PIECE_CODE[piece_id]]:
+            continue
         result = cv2.matchTemplate(window, tpl, cv2.TM_CCOEFF_NORMED)
         _, max_val, _, _ = cv2.minMaxLoc(result)
         if max_val > best_score:
@@ -92,12 +276,19 @@ def analyze_cell_with_priority(
     c: int,
     templates: Templates,
     priority_id: str | None = None,
+    my_side: str | None = None,
 ) -> str | None:
     """优先匹配 priority_id 模板，命中则直接返回；不匹配再匹配剩余模板（排除 priority_id）。
 
     用于 prev_board 变动检测：大部分格子未变化，优先匹配上一帧的棋子可大幅减少匹配次数。
+    priority_id 不可能出现在该格时（候选表裁剪）不优先。
     """
-    if priority_id is not None and priority_id in templates:
+    allowed = candidates(my_side)
+    if (
+        priority_id is not None
+        and priority_id in templates
+        and (allowed is None or allowed[r, c, PIECE_CODE[priority_id]])
+    ):
         px, py = corrected_center(r, c)
         px, py = round(px), round(py)
         half = config.MATCH_SEARCH_HALF + config.TEMPLATE_SIZE // 2
@@ -109,117 +300,432 @@ def analyze_cell_with_priority(
         if max_val >= config.EMPTY_MATCH_THRESHOLD:
             return priority_id
     remaining = {k: v for k, v in templates.items() if k != priority_id}
-    return analyze_cell(img, r, c, remaining)
+    return analyze_cell(img, r, c, remaining, my_side)
+
+
+def template_bank(templates: Templates) -> TemplateBank:
+    """取模板字典对应的批量匹配预计算（同一字典对象只构建一次）"""
+    hit = _bank_cache.get(id(templates))
+    if hit is not None and hit[0] is templates:
+        return hit[1]
+    return _remember_bank(templates, _make_bank(templates, _bank_arrays(templates)))
+
+
+def _bank_arrays(templates: Templates) -> dict[str, np.ndarray]:
+    """批量匹配的模板预计算：零均值共轭频谱 (频点, 通道, 模板) 与范数 (T,)"""
+    stack = np.stack(list(templates.values())).astype(np.float32)  # (T, 60, 60, 3)
+    zero_mean = stack - stack.mean(axis=(1, 2), keepdims=True)
+    norms = np.sqrt((zero_mean.astype(np.float64) ** 2).sum(axis=(1, 2, 3)))
+    spectra = np.conj(np.fft.rfft2(zero_mean.transpose(0, 3, 1, 2), s=(_WINDOW, _WINDOW)))
+    return {
+        "spectra": spectra.transpose(2, 3, 1, 0).reshape(-1, stack.shape[3], len(templates)),
+        "norms": norms,
+    }
+
+
+def _make_bank(templates: Templates, arrays: dict[str, np.ndarray]) -> TemplateBank:
+    ids = tuple(templates)
+    return TemplateBank(
+        ids=ids,
+        spectra=arrays["spectra"],
+        norms=arrays["norms"],
+        codes=np.array([PIECE_CODE[k] for k in ids], np.int8),
+    )
 
 
-def analyze_board(img: np.ndarray, templates: Templates) -> list[list[str | None]]:
-    """分析矫正棋盘 90 格，返回 10x9 布局"""
-    return [[analyze_cell(img, r, c, templates) for c in range(COLS)] for r in range(ROWS)]
+def _cell_grid(img: np.ndarray, start: int, size: int) -> np.ndarray:
+    """矫正棋盘 -> 各格内 [start, start+size) 见方区域的 (10, 9, size, size, C) 视图（不复制）"""
+    grid = img.reshape(ROWS, config.CORRECT_CELL, COLS, config.CORRECT_CELL, -1)
+    return grid[:, start : start + size, :, start : start + size].transpose(0, 2, 1, 3, 4)
+
+
+def cell_windows(img: np.ndarray) -> np.ndarray:
+    """矫正棋盘 -> 90 格搜索窗口张量 (90, 80, 80, 3)，行优先，与 analyze_cell 的窗口逐像素一致"""
+    grid = _cell_grid(img, _WINDOW_MARGIN, _WINDOW)
+    return grid.reshape(ROWS * COLS, _WINDOW, _WINDOW, -1)
+
+
+def _fft_numer(windows: np.ndarray, bank: TemplateBank) -> np.ndarray:
+    """相关分子 (N, T, 21, 21)：窗口做一次 rfft2，逐频点与模板频谱矩阵乘
+    （通道在乘法内求和），再 irfft2 取不回绕的 21x21 偏移"""
+    n, _h, _w, ch = windows.shape
+    freq = np.fft.rfft2(windows.astype(np.float32).transpose(0, 3, 1, 2))  # (N, C, 80, 41)
+    freq = freq.transpose(2, 3, 0, 1).reshape(-1, n, ch)  # (F, N, C)
+    prod = np.matmul(freq, bank.spectra)  # (F, N, T)
+    prod = prod.reshape(_WINDOW, _WINDOW // 2 + 1, n, -1).transpose(2, 3, 0, 1)
+    return np.fft.irfft2(prod, s=(_WINDOW, _WINDOW))[:, :, :_OFFSETS, :_OFFSETS]
+
+
+def _ncc_numer(windows: np.ndarray, bank: TemplateBank) -> np.ndarray:
+    """相关分子 (N, T, 21, 21)：滑窗视图展开每格 21x21 个 60x60 区域，与模板矩阵整块相乘。
+
+    模板已零均值，区域不必再减均值；按 _NCC_CHUNK 格分块限制展开的内存。
+    """
+    n = len(windows)
+    size = config.TEMPLATE_SIZE
+    # (N, 21, 21, C, 60, 60)，末三维与 matrix 的展平顺序一致
+    view = np.lib.stride_tricks.sliding_window_view(
+        windows.astype(np.float32), (size, size), axis=(1, 2)
+    )
+    numer = np.empty((n, _OFFSETS, _OFFSETS, len(bank.ids)), np.float32)
+    for start in range(0, n, _NCC_CHUNK):
+        part = view[start : start + _NCC_CHUNK]
+        patches = part.reshape(-1, bank.matrix.shape[0])  # 复制展开
+        numer[start : start + len(part)] = (patches @ bank.matrix).reshape(
+            len(part), _OFFSETS, _OFFSETS, -1
+        )
+    return numer.transpose(0, 3, 1, 2)
+
+
+def window_scores(windows: np.ndarray, bank: TemplateBank) -> np.ndarray:
+    """N 个搜索窗口 x 全部模板的最大 TM_CCOEFF_NORMED 分，返回 (N, T)。
+
+    分子 = 零均值模板与窗口的互相关（后端见 config.MATCH_BACKEND）；
+    分母 = 窗口各偏移 60x60 区域的零均值平方和（积分图求得）x 模板范数。
+    """
+    n, _h, _w, ch = windows.shape
+    size = config.TEMPLATE_SIZE
+    numer = (_ncc_numer if config.MATCH_BACKEND == "ncc" else _fft_numer)(windows, bank)
+
+    wide = windows.astype(np.float64)
+    sums = np.zeros((n, _WINDOW + 1, _WINDOW + 1, ch))
+    sums[:, 1:, 1:] = wide.cumsum(axis=1).cumsum(axis=2)
+    squares = np.zeros_like(sums)
+    squares[:, 1:, 1:] = (wide * wide).cumsum(axis=1).cumsum(axis=2)
+
+    def _box(integral: np.ndarray) -> np.ndarray:
+        a, b = slice(0, _OFFSETS), slice(size, size + _OFFSETS)
+        return integral[:, b, b] - integral[:, a, b] - integral[:, b, a] + integral[:, a, a]
+
+    s1 = _box(sums)
+    variance = (_box(squares) - s1 * s1 / (size * size)).sum(axis=-1)  # (N, 21, 21)
+    flat = variance <= _FLAT_VARIANCE
+    denom = np.sqrt(np.where(flat, 1.0, variance))[:, None] * bank.norms[None, :, None, None]
+    scores = np.where(flat[:, None], 0.0, numer / np.maximum(denom, 1e-12))
+    return np.clip(scores, -1.0, 1.0).max(axis=(2, 3))
+
+
+def match_scores(img: np.ndarray, templates: Templates) -> np.ndarray:
+    """矫正棋盘 90 格 x 全部模板的最大匹配分，返回 (90, T)，列顺序同 templates"""
+    return window_scores(cell_windows(img), template_bank(templates))
+
+
+def pick_codes(
+    scores: np.ndarray,
+    bank: TemplateBank,
+    priority: np.ndarray | None = None,
+    allowed: np.ndarray | None = None,
+) -> np.ndarray:
+    """逐行取最高分模板的棋子编码，低于 EMPTY_MATCH_THRESHOLD 判为空格（同分取靠前模板）。
+
+    priority 为各行上一帧编码（与 analyze_cell_with_priority 相同语义）：
+    该棋子模板分仍达阈值则沿用，避免相近模板分数抖动造成误变动。
+    allowed 为各行允许的棋子编码 (N, 15)（候选表），不允许的模板不参与比较。
+    """
+    if allowed is not None:
+        scores = np.where(allowed[:, bank.codes], scores, -1.0)
+    rows = np.arange(len(scores))
+    best = scores.argmax(axis=1)
+    codes = np.where(scores[rows, best] >= config.EMPTY_MATCH_THRESHOLD, bank.codes[best], EMPTY)
+    if priority is not None:
+        column = np.full(len(PIECE_CODE) + 1, -1)
+        column[bank.codes] = np.arange(len(bank.codes))
+        prior_col = column[priority]
+        keep = (prior_col >= 0) & (scores[rows, prior_col.clip(0)] >= config.EMPTY_MATCH_THRESHOLD)
+        codes = np.where(keep, priority, codes)
+    return codes.astype(np.int8)
+
+
+def classify_cells(windows: np.ndarray) -> np.ndarray:
+    """N 个搜索窗口 -> 颜色预分类 (N,)：CELL_EMPTY / CELL_RED / CELL_BLACK / CELL_UNKNOWN。
+
+    只取格心模板大小的方块做一次 HSV 转换，统计内切圆盘内红色、深色像素占比。
+    """
+    n = len(windows)
+    size = config.TEMPLATE_SIZE
+    start = (_WINDOW - size) // 2
+    core = np.ascontiguousarray(windows[:, start : start + size, start : start + size])
+    hsv = cv2.cvtColor(core.reshape(n * size, size, 3), cv2.COLOR_BGR2HSV).reshape(n, size, size, 3)
+    yy, xx = np.mgrid[0:size, 0:size]
+    disc = np.hypot(yy - (size - 1) / 2, xx - (size - 1) / 2) <= _DISC_RADIUS
+    h, s, v = hsv[:, disc, 0], hsv[:, disc, 1], hsv[:, disc, 2]
+    red = (((h < 8) | (h > 175)) & (s > 100) & (v > 70)).mean(axis=1)
+    dark = (v < 90).mean(axis=1)
+    labels = np.full(n, CELL_UNKNOWN, np.int8)
+    labels[(red < _EMPTY_RED) & (dark < _EMPTY_DARK)] = CELL_EMPTY
+    labels[(red >= _RED_PIECE) & (dark < _EMPTY_DARK)] = CELL_RED
+    labels[(dark >= _BLACK_PIECE) & (red < _EMPTY_RED / 3)] = CELL_BLACK
+    return labels
+
+
+def match_windows(
+    windows: np.ndarray,
+    bank: TemplateBank,
+    priority: np.ndarray | None = None,
+    allowed: np.ndarray | None = None,
+) -> np.ndarray:
+    """N 个搜索窗口 -> 棋子编码 (N,)；参数同 pick_codes。
+
+    开启 COLOR_PRECLASSIFY 时先颜色预分类：空格直接判空，红 / 黑格只与同色模板匹配。
+    """
+    if not config.COLOR_PRECLASSIFY:
+        return pick_codes(window_scores(windows, bank), bank, priority, allowed)
+    labels = classify_cells(windows)
+    codes = np.zeros(len(windows), np.int8)
+    for label, sub in bank.by_color.items():
+        idx = np.nonzero(labels == label)[0]
+        if idx.size == 0 or not sub.ids:
+            continue
+        prior = priority[idx] if priority is not None else None
+        mask = allowed[idx] if allowed is not None else None
+        codes[idx] = pick_codes(window_scores(windows[idx], sub), sub, prior, mask)
+    return codes
+
+
+def analyze_codes(
+    img: np.ndarray,
+    templates: Templates,
+    priority: Codes | None = None,
+    my_side: str | None = None,
+) -> Codes:
+    """分析矫正棋盘 90 格，返回 10x9 int8 编码（priority 为上一帧编码，优先沿用）。
+
+    my_side 为我方红黑（决定候选表朝向），尚未判方时传 None。
+    """
+    if not templates:
+        return np.zeros((ROWS, COLS), np.int8)
+    bank = template_bank(templates)
+    prior = priority.reshape(-1) if priority is not None else None
+    allowed = candidates(my_side)
+    flat = allowed.reshape(ROWS * COLS, -1) if allowed is not None else None
+    return match_windows(cell_windows(img), bank, prior, flat).reshape(ROWS, COLS)
+
+
+def reanalyze_codes(
+    img: np.ndarray,
+    templates: Templates,
+    base: Codes,
+    cells: np.ndarray,
+    priority: Codes | None = None,
+    my_side: str | None = None,
+) -> Codes:
+    """只重匹配 cells（10x9 布尔掩码）内的格子，其余格沿用 base 编码"""
+    codes = base.copy()
+    rows, cols = np.nonzero(cells)
+    if rows.size == 0 or not templates:
+        return codes
+    bank = template_bank(templates)
+    windows = _cell_grid(img, _WINDOW_MARGIN, _WINDOW)[rows, cols]
+    prior = priority[rows, cols] if priority is not None else None
+    allowed = candidates(my_side)
+    subset = allowed[rows, cols] if allowed is not None else None
+    codes[rows, cols] = match_windows(windows, bank, prior, subset)
+    return codes
+
+
+def confidence(img: np.ndarray, templates: Templates) -> float:
+    """模板包与当前画面的贴合度：颜色预分类为红 / 黑子的格子上，同色模板最大分的平均值。
+
+    与 COLOR_PRECLASSIFY 开关无关（总按颜色取有子格）；画面无子时为 0.0。
+    """
+    if not templates:
+        return 0.0
+    windows = cell_windows(img)
+    labels = classify_cells(windows)
+    bank = template_bank(templates)
+    best = [
+        window_scores(windows[labels == label], bank.by_color[label]).max(axis=1)
+        for label in (CELL_RED, CELL_BLACK)
+        if (labels == label).any() and bank.by_color[label].ids
+    ]
+    return float(np.concatenate(best).mean()) if best else 0.0
+
+
+def select_skin(img: np.ndarray) -> tuple[str, float]:
+    """逐包计算 confidence，返回 (最贴合的皮肤, 其平均分)；无可用模板包时为默认皮肤"""
+    scored = [(confidence(img, load_templates(skin)), skin) for skin in skins()]
+    if not scored:
+        return config.DEFAULT_SKIN, 0.0
+    score, skin = max(scored)
+    return skin, score
+
+
+def analyze_board(
+    img: np.ndarray, templates: Templates, my_side: str | None = None
+) -> list[list[str | None]]:
+    """分析矫正棋盘 90 格，返回 10x9 布局（批量匹配，替代逐格 1260 次 matchTemplate）"""
+    return decode(analyze_codes(img, templates, my_side=my_side))
+
+
+def center_patches(img: np.ndarray) -> np.ndarray:
+    """矫正棋盘 -> 90 格中心 DIFF_WINDOW 见方区域 (10, 9, w, w, C) 视图"""
+    start = config.CORRECT_CELL // 2 - config.DIFF_WINDOW // 2
+    return _cell_grid(img, start, config.DIFF_WINDOW)
+
+
+def changed_mask(prev_patches: np.ndarray, cur_patches: np.ndarray) -> np.ndarray:
+    """两组格心区域的平均绝对差超过 DIFF_THRESHOLD 的格子，返回 10x9 布尔掩码"""
+    delta = np.abs(prev_patches.astype(np.int16) - cur_patches.astype(np.int16))
+    return delta.mean(axis=(2, 3, 4)) > config.DIFF_THRESHOLD
 
 
 def diff_cells(prev_img: np.ndarray, cur_img: np.ndarray) -> set[tuple[int, int]]:
     """对比两张矫正棋盘中心点 10x10 区域，返回有变化的格子集合"""
-    changed: set[tuple[int, int]] = set()
-    half = config.DIFF_WINDOW // 2
-    for r in range(ROWS):
-        for c in range(COLS):
-            x, y = corrected_center(r, c)
-            px, py = round(x), round(y)
-            prev_region = prev_img[py - half : py + half, px - half : px + half]
-            cur_region = cur_img[py - half : py + half, px - half : px + half]
-            diff = float(np.abs(prev_region.astype(np.int16) - cur_region.astype(np.int16)).mean())
-            if diff > config.DIFF_THRESHOLD:
-                changed.add((r, c))
-    return changed
+    rows, cols = np.nonzero(changed_mask(center_patches(prev_img), center_patches(cur_img)))
+    return set(zip(rows.tolist(), cols.tolist(), strict=True))
 
 
 def load_gameover_text_templates() -> dict[str, np.ndarray]:
-    """加载 templates/text/*.png 结算文字模板（灰度），返回 {文字: 模板}"""
-    global _gameover_text_cache
-    if _gameover_text_cache is None:
-        templates: dict[str, np.ndarray] = {}
-        for path in sorted(config.GAMEOVER_TEXT_DIR.glob("*.png")):
-            tpl = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
-            if tpl is None:
-                raise RuntimeError(f"无法读取结算文字模板: {path}")
-            templates[path.stem] = tpl
-        _gameover_text_cache = templates
-    return _gameover_text_cache
+    """加载 templates/text/*.png 结算文字模板（灰度），返回 {文字: 模板}（PNG 变化后至多数秒重新加载）"""
+    return template_cache.load_group("gameover", config.GAMEOVER_TEXT_DIR, cv2.IMREAD_GRAYSCALE)[0]
+
+
+def load_draw_text_templates() -> dict[str, np.ndarray]:
+    """加载 templates/draw/*.png 和棋弹窗模板（灰度），返回 {文字: 模板}（PNG 变化后至多数秒重新加载）"""
+    return template_cache.load_group("draw", config.DRAW_TEXT_DIR, cv2.IMREAD_GRAYSCALE)[0]
+
+
+class TextFrame:
+    """一帧原始截图的文字识别预处理：等比缩放到 GAMEOVER_TEMPLATE_W 宽度的灰度图。
+
+    游戏 UI 随分辨率线性缩放（3200 = 1080 等比 x1.3333），模板按 1080 宽制作。
+    整帧灰度与各纵向 ROI 条带均按需计算一次并缓存，结算文字与和棋弹窗共享同一帧；
+    只扫 ROI 时只缩放/转换该条带，不处理整张截图。
+    """
+
+    def __init__(self, img: np.ndarray, w: int = 0, h: int = 0) -> None:
+        self.img = img
+        self._size = (w, h)
+        self._gray: np.ndarray | None = None
+        self._bands: dict[tuple[float, float], tuple[np.ndarray, int]] = {}
+
+    @cached_property
+    def scale(self) -> float:
+        """源坐标 = 缩放坐标 x scale（首次匹配时才读截图尺寸）"""
+        w, h = self._size
+        if w == 0 or h == 0:
+            h, w = self.img.shape[:2]
+            self._size = (w, h)
+        return w / config.GAMEOVER_TEMPLATE_W
+
+    @cached_property
+    def height(self) -> int:
+        """缩放后高度"""
+        scale = self.scale  # 先解析截图尺寸
+        return max(1, round(self._size[1] / scale))
+
+    def gray(self) -> np.ndarray:
+        """整帧缩放灰度图"""
+        if self._gray is None:
+            self._gray = self._convert(self.img, self.height)
+        return self._gray
+
+    def band(self, roi: tuple[float, float] | None) -> tuple[np.ndarray, int]:
+        """纵向 ROI（缩放后高度比例 (上, 下)）的灰度条带，返回 (条带, 条带顶部的缩放坐标 y)"""
+        if roi is None:
+            return self.gray(), 0
+        if roi not in self._bands:
+            top = int(roi[0] * self.height)
+            bottom = max(top + 1, min(self.height, int(np.ceil(roi[1] * self.height))))
+            if self._gray is not None:
+                self._bands[roi] = (self._gray[top:bottom], top)
+            else:
+                ratio = self.img.shape[0] / self.height
+                src_top = int(top * ratio)
+                src_bottom = min(self.img.shape[0], int(np.ceil(bottom * ratio)))
+                crop = self.img[src_top:src_bottom]
+                self._bands[roi] = (self._convert(crop, bottom - top), round(src_top / ratio))
+        return self._bands[roi]
+
+    def _convert(self, img: np.ndarray, target_h: int) -> np.ndarray:
+        if self.scale != 1:
+            interp = cv2.INTER_AREA if self.scale < 1 else cv2.INTER_LINEAR
+            img = cv2.resize(img, (config.GAMEOVER_TEMPLATE_W, target_h), interpolation=interp)
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+# 预筛用的缩小模板：组名 -> (原模板字典, 缩小模板字典)
+_pregate_cache: dict[str, tuple[dict[str, np.ndarray], dict[str, np.ndarray]]] = {}
+
+
+def _shrink(img: np.ndarray) -> np.ndarray:
+    factor = config.TEXT_PREGATE_SCALE
+    size = (max(1, img.shape[1] // factor), max(1, img.shape[0] // factor))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+
+def _pregate(group: str, gray: np.ndarray, templates: dict[str, np.ndarray]) -> bool:
+    """低分辨率粗匹配预筛：条带缩小 TEXT_PREGATE_SCALE 倍后任一模板粗分达标才做全分辨率匹配"""
+    cached = _pregate_cache.get(group)
+    if cached is None or cached[0] is not templates:
+        cached = (templates, {k: _shrink(v) for k, v in templates.items()})
+        _pregate_cache[group] = cached
+    small = _shrink(gray)
+    for tpl in cached[1].values():
+        if tpl.shape[0] > small.shape[0] or tpl.shape[1] > small.shape[1]:
+            continue
+        result = cv2.matchTemplate(small, tpl, cv2.TM_CCOEFF_NORMED)
+        if result.max() >= config.TEXT_PREGATE_THRESHOLD:
+            return True
+    return False
+
+
+def _match_text(
+    frame: TextFrame,
+    templates: dict[str, np.ndarray],
+    threshold: float,
+    pregate: str | None = None,
+) -> list[tuple[str, int, int, float]]:
+    """在各模板的 ROI 条带（config.TEXT_ROI，未配置则整帧）上匹配，坐标还原到源分辨率。
+
+    pregate 为组名时，先对同一条带上的该组模板做低分辨率预筛，未达标直接返回空。
+    """
+    groups: dict[tuple[float, float] | None, dict[str, np.ndarray]] = {}
+    for word, tpl in templates.items():
+        groups.setdefault(config.TEXT_ROI.get(word), {})[word] = tpl
+    matches: list[tuple[str, int, int, float]] = []
+    for roi, group in groups.items():
+        gray, top = frame.band(roi)
+        if pregate is not None and not _pregate(f"{pregate}:{roi}", gray, group):
+            continue
+        for word, tpl in group.items():
+            if tpl.shape[0] > gray.shape[0] or tpl.shape[1] > gray.shape[1]:
+                continue
+            result = cv2.matchTemplate(gray, tpl, cv2.TM_CCOEFF_NORMED)
+            ys, xs = np.where(result >= threshold)
+            for x, y in zip(xs, ys, strict=False):
+                cx = round((x + tpl.shape[1] / 2) * frame.scale)
+                cy = round((top + y + tpl.shape[0] / 2) * frame.scale)
+                matches.append((word, cx, cy, float(result[y, x])))
+    return sorted(matches, key=lambda m: m[3], reverse=True)
 
 
 def find_gameover_text(
-    img: np.ndarray, w: int = 0, h: int = 0
+    img: np.ndarray | TextFrame, w: int = 0, h: int = 0
 ) -> list[tuple[str, int, int, float]]:
-    """在原始截图上模板匹配结算文字。
+    """在原始截图（或共享的 TextFrame）上模板匹配结算文字。
 
-    游戏 UI 随分辨率线性缩放（3200 = 1080 等比 x1.3333），故先把截图等比缩放到
-    GAMEOVER_TEMPLATE_W 宽度再匹配，坐标还原到源分辨率。返回所有高于阈值的
+    截图等比缩放到 GAMEOVER_TEMPLATE_W 宽度再匹配，坐标还原到源分辨率。返回所有高于阈值的
     [(文字, 屏幕x, 屏幕y, 匹配分)]（中心点坐标），按分降序。
     """
-    if w == 0 or h == 0:
-        h, w = img.shape[:2]
     templates = load_gameover_text_templates()
     if not templates:
         return []
-    scale = w / config.GAMEOVER_TEMPLATE_W
-    if w != config.GAMEOVER_TEMPLATE_W:
-        target_h = max(1, round(h / scale))
-        interp = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
-        img = cv2.resize(img, (config.GAMEOVER_TEMPLATE_W, target_h), interpolation=interp)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    matches: list[tuple[str, int, int, float]] = []
-    for word, tpl in templates.items():
-        result = cv2.matchTemplate(gray, tpl, cv2.TM_CCOEFF_NORMED)
-        ys, xs = np.where(result >= config.GAMEOVER_TEXT_THRESHOLD)
-        for x, y in zip(xs, ys, strict=False):
-            if x > gray.shape[1] - tpl.shape[1] or y > gray.shape[0] - tpl.shape[0]:
-                continue
-            cx = round((x + tpl.shape[1] / 2) * scale)
-            cy = round((y + tpl.shape[0] / 2) * scale)
-            matches.append((word, cx, cy, float(result[y, x])))
-    return sorted(matches, key=lambda m: m[3], reverse=True)
+    frame = img if isinstance(img, TextFrame) else TextFrame(img, w, h)
+    return _match_text(frame, templates, config.GAMEOVER_TEXT_THRESHOLD)
 
 
-def load_draw_text_templates() -> dict[str, np.ndarray]:
-    """加载 templates/draw/*.png 和棋弹窗模板（灰度），返回 {文字: 模板}"""
-    global _draw_text_cache
-    if _draw_text_cache is None:
-        templates: dict[str, np.ndarray] = {}
-        for path in sorted(config.DRAW_TEXT_DIR.glob("*.png")):
-            tpl = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
-            if tpl is None:
-                raise RuntimeError(f"无法读取和棋弹窗模板: {path}")
-            templates[path.stem] = tpl
-        _draw_text_cache = templates
-    return _draw_text_cache
-
-
-def find_draw_dialog(img: np.ndarray, w: int = 0, h: int = 0) -> list[tuple[str, int, int, float]]:
-    """在原始截图上模板匹配和棋弹窗文字。
-
-    与 find_gameover_text 相同的缩放策略：缩放到 GAMEOVER_TEMPLATE_W 宽度再匹配，
-    坐标还原到源分辨率。返回所有高于阈值的
+def find_draw_dialog(
+    img: np.ndarray | TextFrame, w: int = 0, h: int = 0
+) -> list[tuple[str, int, int, float]]:
+    """在原始截图（或共享的 TextFrame）上模板匹配和棋弹窗文字。
+
+    与 find_gameover_text 相同的缩放策略，只扫弹窗按钮行 ROI；逐帧调用（敌方等待循环），
+    故先做低分辨率预筛，无弹窗时跳过全分辨率匹配。返回所有高于阈值的
     [(文字, 屏幕x, 屏幕y, 匹配分)]（中心点坐标），按分降序。
     """
-    if w == 0 or h == 0:
-        h, w = img.shape[:2]
     templates = load_draw_text_templates()
     if not templates:
         return []
-    scale = w / config.GAMEOVER_TEMPLATE_W
-    if w != config.GAMEOVER_TEMPLATE_W:
-        target_h = max(1, round(h / scale))
-        interp = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
-        img = cv2.resize(img, (config.GAMEOVER_TEMPLATE_W, target_h), interpolation=interp)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    matches: list[tuple[str, int, int, float]] = []
-    for word, tpl in templates.items():
-        result = cv2.matchTemplate(gray, tpl, cv2.TM_CCOEFF_NORMED)
-        ys, xs = np.where(result >= config.DRAW_TEXT_THRESHOLD)
-        for x, y in zip(xs, ys, strict=False):
-            if x > gray.shape[1] - tpl.shape[1] or y > gray.shape[0] - tpl.shape[0]:
-                continue
-            cx = round((x + tpl.shape[1] / 2) * scale)
-            cy = round((y + tpl.shape[0] / 2) * scale)
-            matches.append((word, cx, cy, float(result[y, x])))
-    return sorted(matches, key=lambda m: m[3], reverse=True)
+    frame = img if isinstance(img, TextFrame) else TextFrame(img, w, h)
+    return _match_text(frame, templates, config.DRAW_TEXT_THRESHOLD, pregate="draw")
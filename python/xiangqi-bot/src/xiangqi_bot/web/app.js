@@ -12,6 +12,7 @@ const state = {
   highlight: [],
   lastMove: null,
   autoNext: true,
+  cache: null,
 };
 
 const STATUS_CN = {
@@ -79,6 +80,7 @@ function handleEvent(msg) {
       state.gameOver = s.game_over;
       state.highlight = s.highlight;
       state.lastMove = s.last_move;
+      state.cache = s.cache || null;
       if (typeof s.auto_next === "boolean") {
         state.autoNext = s.auto_next;
         document.getElementById("toggle-auto-next").checked = state.autoNext;
@@ -106,13 +108,18 @@ function handleEvent(msg) {
         gameOver: false,
         highlight: [],
         lastMove: null,
+        cache: null,
       });
       busy = null;
+      renderAnalysis(null);
       document.getElementById("device-info").textContent = "设备：-";
       document.getElementById("connect-screen").hidden = false;
       document.getElementById("main-screen").hidden = true;
       document.getElementById("prompt-mask").hidden = true;
       break;
+    case "analysis":
+      renderAnalysis(msg);
+      break;
     case "prompt_turn":
       document.getElementById("prompt-mask").hidden = false;
       break;
@@ -132,6 +139,30 @@ function appendLog(kind, msg) {
   log.scrollTop = log.scrollHeight;
 }
 
+// ---------- 搜索进度 ----------
+function formatEval(a) {
+  if (a.mate !== null && a.mate !== undefined) {
+    return a.mate > 0 ? `${a.mate} 步杀` : `被 ${-a.mate} 步杀`;
+  }
+  const bound = a.bound === "lowerbound" ? "≥" : a.bound === "upperbound" ? "≤" : "";
+  return `${bound}${a.score > 0 ? "+" : ""}${a.score}`;
+}
+
+function renderAnalysis(a) {
+  const set = (id, text) => {
+    document.getElementById(id).textContent = text;
+  };
+  if (!a) {
+    ["an-depth", "an-time", "an-nps", "an-eval", "an-pv"].forEach((id) => set(id, "-"));
+    return;
+  }
+  set("an-depth", a.seldepth ? `${a.depth}/${a.seldepth}` : `${a.depth}`);
+  set("an-time", `${a.time}/${a.movetime} ms`);
+  set("an-nps", a.nps >= 1e6 ? `${(a.nps / 1e6).toFixed(2)} M/s` : `${Math.round(a.nps / 1e3)} K/s`);
+  set("an-eval", formatEval(a));
+  set("an-pv", a.pv.length ? a.pv.join(" ") : "-");
+}
+
 // ---------- 状态栏与按钮 ----------
 function renderStatus() {
   // 棋盘尚无棋子 = 未成功同步（初始化失败/未开始），阵营与阶段显示 "-"
@@ -146,6 +177,10 @@ function renderStatus() {
         ? "黑方"
         : "-";
   document.getElementById("side").textContent = sideCn;
+  const cache = state.cache;
+  document.getElementById("cache").textContent = cache
+    ? `${cache.hits}/${cache.hits + cache.misses}`
+    : "-";
   document.getElementById("flow-status").textContent = STATUS_CN[state.status] || state.status;
   applyButtons();
 }
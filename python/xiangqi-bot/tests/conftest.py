@@ -10,8 +10,9 @@ import cv2
 import numpy as np
 import pytest
 
-from xiangqi_bot import vision
-from xiangqi_bot.board import START_SQUARES, make_empty_board
+from xiangqi_bot import config, vision
+from xiangqi_bot.board import PIECE_CODE, START_SQUARES, encode, make_empty_board
+from xiangqi_bot.game import capture, session
 
 if TYPE_CHECKING:
     pass
@@ -22,12 +23,27 @@ RAW_SCREENSHOTS = PROJECT_ROOT / "raw_screenshots"
 DICT_VISION_PATCHES: dict[str, Callable[..., Any]] = {}
 
 
+def _dict_codes(corrected: dict[str, Any], priority: np.ndarray | None = None) -> np.ndarray:
+    """dict 帧 -> 编码：无 priority 取整盘 board；有 priority 则在其上覆盖 cells。"""
+    if priority is None:
+        return encode(corrected["board"])
+    codes = priority.copy()
+    for (r, c), pid in corrected["cells"].items():
+        codes[r, c] = PIECE_CODE[pid] if pid is not None else 0
+    return codes
+
+
 def _make_dict_vision() -> dict[str, Callable[..., Any]]:
     return {
-        "analyze_cell_with_priority": lambda corrected, r, c, templates, priority_id=None: (
+        "analyze_cell_with_priority": lambda corrected, r, c, templates, priority_id=None, **_: (
             corrected["cells"].get((r, c), priority_id)
         ),
-        "analyze_board": lambda corrected, templates: corrected["board"],
+        "analyze_board": lambda corrected, templates, my_side=None: corrected["board"],
+        "analyze_codes": lambda corrected, templates, priority=None, my_side=None: _dict_codes(
+            corrected, priority
+        ),
+        "select_skin": lambda corrected: (config.DEFAULT_SKIN, 1.0),
+        "confidence": lambda corrected, templates: 1.0,
         "find_gameover_text": lambda img, w=0, h=0: [],
         "find_draw_dialog": lambda img, w=0, h=0: [],
         "tap_xy": lambda h, r, c: (50 + c * 100, 50 + r * 100),
@@ -148,3 +164,7 @@ def _patch_dict_vision(monkeypatch: pytest.MonkeyPatch) -> None:
     patches = _make_dict_vision()
     for attr, fn in patches.items():
         monkeypatch.setattr(vision, attr, fn)
+    # MockDevice 只模拟一次性 input_tap/shell，点击不走常驻输入通道
+    monkeypatch.setattr(capture, "INPUT_PERSISTENT", False)
+    # 应着预算在后台线程直接用引擎池，会话测试默认关闭（test_engine 单独覆盖）
+    monkeypatch.setattr(session, "ENGINE_SPECULATE", False)
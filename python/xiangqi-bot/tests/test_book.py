@@ -0,0 +1,79 @@
+"""开局库：构建/二分查询 + 会话在开局阶段优先走库着法。"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from xiangqi_bot import book
+from xiangqi_bot.game import session as game
+from xiangqi_bot.game.state import Side
+
+from .conftest import LogCollector, MockDevice, full_board, move_piece
+
+GAMES = [["h2e2", "h9g7", "h0g2"], ["h2e2", "b9c7"], ["b2e2", "h9g7"]]
+
+
+def _build(tmp_path: Path) -> book.OpeningBook:
+    entries = [(fen, move, 1) for g in GAMES for fen, move in book.game_entries(g)]
+    path = tmp_path / "opening.bin"
+    assert book.build(entries, path) == 6
+    return book.OpeningBook(path)
+
+
+def test_book_build_and_probe(tmp_path: Path) -> None:
+    """同局面同着法权重累加；按 Zobrist 二分命中；行棋方参与键值"""
+    ob = _build(tmp_path)
+    assert len(ob) == 6
+    assert ob.probe(book.START_FEN) == [("h2e2", 2), ("b2e2", 1)]
+    after = book.play(book.START_FEN, "h2e2")
+    assert ob.probe(after) == [("b9c7", 1), ("h9g7", 1)], "同权重按着法编码顺序"
+    assert ob.best(after.replace(" b ", " w ")) is None, "行棋方不同应是不同局面"
+    assert book.to_fen(*book.parse_fen(book.START_FEN)) == book.START_FEN
+    assert book.game_entries(["h2e2", "a5a6"]) == [(book.START_FEN, "h2e2")], "起点无子应截断"
+    assert book.OpeningBook(tmp_path / "missing.bin").best(book.START_FEN) is None
+
+
+@pytest.mark.parametrize(
+    ("side", "moved", "expected"),
+    [(Side.RED, None, "h2e2"), (Side.BLACK, (2, 1, 2, 4), "b9c7")],
+)
+def test_session_book_move(
+    tmp_path: Path,
+    collector: LogCollector,
+    monkeypatch: pytest.MonkeyPatch,
+    side: Side,
+    moved: tuple[int, int, int, int] | None,
+    expected: str,
+) -> None:
+    """开局（红先 / 黑方应对红方第一步）直接返回库着法，不调引擎；超过深度限制则调引擎"""
+    s = game.GameSession(MockDevice(), collector.log, collector.on_state, None)
+    s.book = _build(tmp_path)
+    board = full_board(side)
+    if moved is not None:
+        move_piece(board, *moved)
+    s.state.board = board
+    s.state.my_side = side
+    s.state.turn = side
+    s.state.initialized = True
+    engine_calls: list[str] = []
+
+    def fake_best_move(fen, ms=1000, moves=(), key=None, limits=None):  # type: ignore[no-untyped-def]
+        engine_calls.append(key)
+        return "a0a1", 0
+
+    s.engine.best_move = fake_best_move  # type: ignore[method-assign]
+    stops: list[int] = []
+    s.engine.stop_ponder = lambda: stops.append(1)  # type: ignore[method-assign]
+    s._ponder_hit = True  # 预测命中的后台思考仍持有实例
+
+    pending = s._compute_move()
+    assert pending is not None
+    assert pending[1] == expected
+    assert not engine_calls
+    assert stops and not s._ponder_hit, "库着法不取 ponder 结果，应停止后台思考归还实例"
+
+    monkeypatch.setattr(game, "BOOK_MAX_PLY", 1 if moved else 0)
+    assert s._compute_move() == (pending[0], "a0a1")
+    assert len(engine_calls) == 1
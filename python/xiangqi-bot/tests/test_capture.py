@@ -12,6 +12,8 @@
 - _do_move 提起未落补点成功
 - _do_move 失败中止
 - _do_move 走棋成功 + 绝杀探测
+- _do_move 成功后后台思考：对方走法命中 → ponderhit，未命中 → stop
+- 引擎局面：同步点 FEN + 双方着法；着法记录与棋盘不一致时整体重新同步
 """
 
 from __future__ import annotations
@@ -24,8 +26,10 @@ import pytest
 
 from xiangqi_bot.board import make_empty_board
 from xiangqi_bot.config import MOVE_VERIFY_COUNT
+from xiangqi_bot.engine import MATE_SCORE
 from xiangqi_bot.game import session as game
-from xiangqi_bot.game.state import Phase, Side, VerifyOutcome
+from xiangqi_bot.game import speculate
+from xiangqi_bot.game.state import Move, Phase, Side, VerifyOutcome
 
 from .conftest import LogCollector, MockDevice
 
@@ -243,7 +247,12 @@ def _setup_do_move(
     engine_cls = s.engine.__class__
 
     move_iter = iter(best_moves)
-    monkeypatch.setattr(engine_cls, "best_move", lambda self, fen, ms=1000: (next(move_iter), 0))
+    score = MATE_SCORE - 1 if is_mate else 0  # 主搜索报 mate 1 即判绝杀
+    monkeypatch.setattr(
+        engine_cls,
+        "best_move",
+        lambda self, fen, ms=1000, moves=(), key=None, limits=None: (next(move_iter), score),
+    )
     monkeypatch.setattr(engine_cls, "is_mate", lambda self, fen, ms: is_mate)
     monkeypatch.setattr(type(s), "_attempt_move", lambda self, r1, c1, r2, c2: True)
 
@@ -279,6 +288,120 @@ def test_do_move_success(collector: LogCollector, monkeypatch: pytest.MonkeyPatc
     assert s.state.turn == Side.BLACK
 
 
+@pytest.mark.parametrize(("enemy_dst", "hit"), [((1, 4), True), ((0, 5), False)])
+def test_do_move_ponder(
+    collector: LogCollector,
+    monkeypatch: pytest.MonkeyPatch,
+    enemy_dst: tuple[int, int],
+    hit: bool,
+) -> None:
+    """走棋成功后按引擎预测（e9e8）后台思考；对方走法命中则下一步 ponderhit，否则 stop 重搜。"""
+    b = make_empty_board()
+    b[7][3] = "r_R"
+    b[9][4] = "r_K"
+    b[0][4] = "b_k"
+    s = _make_session(collector, b)
+    after = [row[:] for row in b]
+    after[7][3] = None
+    after[0][3] = "r_R"
+    _setup_do_move(
+        monkeypatch,
+        s,
+        best_moves=["d2d9", "d9d8"],
+        frames_per_verify=[[(after, [(7, 3, "r_R", None), (0, 3, None, "r_R")])]],
+    )
+    calls: list[tuple] = []
+    engine_cls = s.engine.__class__
+    monkeypatch.setattr(engine_cls, "ponder", lambda self, fen, m: calls.append(("ponder", m[-1])))
+    monkeypatch.setattr(
+        engine_cls, "ponder_hit", lambda self, key=None: calls.append(("hit",)) or ("d9d8", 0)
+    )
+    monkeypatch.setattr(engine_cls, "stop_ponder", lambda self: calls.append(("stop",)))
+    s.engine.ponder_move = "e9e8"
+
+    assert s._do_move() is True
+    assert calls == [("ponder", "e9e8")]
+
+    s._apply_enemy_move(Move((0, 4), enemy_dst, "b_k"))
+    assert (s.ponder_hits, s.ponder_total) == (int(hit), 1)
+    assert s._compute_move() is not None
+    assert calls[1:] == ([("hit",)] if hit else [("stop",)])
+
+
+def test_do_move_speculation(collector: LogCollector, monkeypatch: pytest.MonkeyPatch) -> None:
+    """我方走后开始应着预算；对方走法命中回应表时 _compute_move 直接出着，不再搜索。"""
+    b = make_empty_board()
+    b[7][3] = "r_R"
+    b[9][4] = "r_K"
+    b[0][4] = "b_k"
+    s = _make_session(collector, b)
+    after = [row[:] for row in b]
+    after[7][3] = None
+    after[0][3] = "r_R"
+    _setup_do_move(
+        monkeypatch,
+        s,
+        best_moves=["d2d9"],  # 第二次搜索会 StopIteration
+        frames_per_verify=[[(after, [(7, 3, "r_R", None), (0, 3, None, "r_R")])]],
+    )
+    monkeypatch.setattr(game, "ENGINE_PONDER", False)
+    monkeypatch.setattr(game, "ENGINE_SPECULATE", True)
+    started: list[list[str]] = []
+
+    def fake_settle(reply: str) -> speculate.Response | None:
+        s.speculator.total += 1
+        return speculate.Response("d9d8", 7, "e8e9", 800) if reply == "e9e8" else None
+
+    monkeypatch.setattr(s.speculator, "start", lambda fen, m, exclude, limits: started.append(m))
+    monkeypatch.setattr(s.speculator, "settle", fake_settle)
+
+    assert s._do_move() is True
+    assert started == [["d2d9"]]
+    s._apply_enemy_move(Move((0, 4), (1, 4), "b_k"))
+    assert s._compute_move() == ("3R5/4k4/9/9/9/9/9/9/9/4K4 w - - 2 1", "d9d8")
+    assert (s.state.last_eval_score, s._ponder_guess) == (7, "e8e9")
+    assert any("应着预算命中" in line for line in collector.logs)
+
+
+def test_engine_position_moves(collector: LogCollector, monkeypatch: pytest.MonkeyPatch) -> None:
+    """双方走棋后引擎收到「同步点 FEN + moves」；棋盘被改动（与着法记录不符）时整体重新同步。"""
+    b = make_empty_board()
+    b[7][3] = "r_R"
+    b[9][4] = "r_K"
+    b[0][4] = "b_k"
+    s = _make_session(collector, b)
+    after = [row[:] for row in b]
+    after[7][3] = None
+    after[0][3] = "r_R"
+    _setup_do_move(
+        monkeypatch,
+        s,
+        best_moves=[],
+        frames_per_verify=[[(after, [(7, 3, "r_R", None), (0, 3, None, "r_R")])]],
+    )
+    searches: list[tuple[str, list[str]]] = []
+    replies = iter(["d2d9", "d9d8", "d8d7"])
+
+    def spy_best_move(self, fen, ms=1000, moves=(), key=None, limits=None):  # type: ignore[no-untyped-def]
+        searches.append((fen, list(moves)))
+        return next(replies), 0
+
+    monkeypatch.setattr(s.engine.__class__, "best_move", spy_best_move)
+    start_fen = "4k4/9/9/9/9/9/9/3R5/9/4K4 w - - 0 1"
+
+    assert s._do_move() is True
+    s._apply_enemy_move(Move((0, 4), (1, 4), "b_k"))
+    assert s._compute_move() is not None
+    assert searches == [(start_fen, []), (start_fen, ["d2d9", "e9e8"])]
+
+    # 识别修正等路径绕过着法记录改动棋盘：回放对不上 -> 以当前棋盘为新同步点
+    s.state.board[9][4] = None
+    s.state.board[9][3] = "r_K"
+    assert s._compute_move() is not None
+    assert searches[-1] == ("3R5/4k4/9/9/9/9/9/9/9/3K5 w - - 2 1", [])
+    assert any("与当前棋盘不一致" in line for line in collector.logs)
+
+
 def test_do_move_retry_success(collector: LogCollector, monkeypatch: pytest.MonkeyPatch) -> None:
     """第1次 STATIONARY（全 n==0）→ 第2次成功。"""
     b = make_empty_board()
@@ -358,7 +481,7 @@ def test_do_move_fail_abort(collector: LogCollector, monkeypatch: pytest.MonkeyP
 
 
 def test_do_move_checkmate(collector: LogCollector, monkeypatch: pytest.MonkeyPatch) -> None:
-    """n==2 命中 + 绝杀探测 → game_over=True。"""
+    """n==2 命中 + 主搜索 score mate 1 → game_over=True（不再单独探测）。"""
     b = make_empty_board()
     b[7][3] = "r_R"
     b[9][4] = "r_K"
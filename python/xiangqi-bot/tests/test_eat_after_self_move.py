@@ -86,7 +86,7 @@ def test_self_eat_then_enemy_r2_eat_no_finish(
     best_move_seq = iter(["e1e0", "a0a1"])
     engine_cls = s.engine.__class__
 
-    def spy_best_move(self, fen, movetime_ms=1000):  # type: ignore[no-untyped-def]
+    def spy_best_move(self, fen, movetime_ms=1000, moves=(), key=None, limits=None):  # type: ignore[no-untyped-def]
         return next(best_move_seq), 0
 
     def spy_is_mate(self, fen, movetime_ms=200):  # type: ignore[no-untyped-def]
@@ -1,12 +1,35 @@
-"""引擎自愈场景（4 个）。"""
+"""引擎自愈场景（4 个）+ 输出解析与事件驱动等待 + 后台思考（ponder）命令序列 + 搜索缓存
++ 引擎池 + 自适应思考时间（提前 stop）。
+"""
 
 from __future__ import annotations
 
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
 import pytest
 
-from xiangqi_bot.engine import Engine, EngineError
+from xiangqi_bot import config, engine_pool, search_cache
+from xiangqi_bot.engine import (
+    MATE_SCORE,
+    Engine,
+    EngineError,
+    InfoRecord,
+    SearchLimits,
+    SearchResult,
+    parse_info,
+)
+from xiangqi_bot.game import session as game
+from xiangqi_bot.game.analysis import AnalysisFeed
+from xiangqi_bot.game.speculate import Response, Speculator
+from xiangqi_bot.game.state import Move, Phase, Side
+from xiangqi_bot.game.timing import TimeManager
+from xiangqi_bot.search_cache import SearchCache
 
-from .conftest import LogCollector
+from .conftest import LogCollector, MockDevice, full_board, move_piece
 
 
 class FakeStream:
@@ -43,6 +66,8 @@ def _make_engine(
     waits: list[str] = []
 
     def fake_start() -> None:
+        if e._proc is not None:
+            return  # 与真实 start() 一致：进程存活时复用
         p = FakeProc(fail=len(spawned) < write_fail)
         spawned.append(p)
         e._proc = p
@@ -53,7 +78,7 @@ def _make_engine(
         waits.append(marker)
         if len(waits) <= wait_fail:
             raise EngineError(f"引擎响应超时（等待 {marker}）")
-        e._lines.append("bestmove h2e2 ponder b9c7")
+        e._on_line("bestmove h2e2 ponder b9c7")
 
     e._wait_for = fake_wait  # type: ignore[method-assign]
     return e, spawned, waits
@@ -85,10 +110,493 @@ def test_engine(collector: LogCollector) -> None:
     e, spawned, _waits = _make_engine()
 
     def fake_wait_none(marker: str, timeout: float) -> None:
-        e._lines.append("bestmove (none)")
+        e._on_line("bestmove (none)")
 
     e._wait_for = fake_wait_none  # type: ignore[method-assign]
     move, _score = e.best_move("fen4")
     assert move is None, f"终局应返回 None，实际 {move}"
     assert len(spawned) == 1, "正常场景不应重建进程"
     assert e.is_mate("fen5") is True, "is_mate 应复用 best_move"
+
+
+def test_parse_info() -> None:
+    """info 行解析：cp/mate 分数、边界、pv；无分数的 info 行与 info string 忽略"""
+    rec = parse_info(
+        "info depth 18 seldepth 27 multipv 1 score cp -35 upperbound nodes 123456 "
+        "nps 987654 hashfull 12 time 125 pv h2e2 h9g7 h0g2"
+    )
+    assert rec == InfoRecord(
+        depth=18,
+        seldepth=27,
+        score=-35,
+        bound="upperbound",
+        nodes=123456,
+        nps=987654,
+        time=125,
+        pv=("h2e2", "h9g7", "h0g2"),
+    )
+    assert parse_info("info depth 5 score mate 3 pv a0a1").score == MATE_SCORE - 3
+    assert parse_info("info depth 5 score mate -2").score == -MATE_SCORE + 2
+    assert parse_info("info depth 12 currmove h2e2 currmovenumber 1") is None
+    assert parse_info("info string score cp 100") is None
+
+
+def test_reader_wakes_waiters() -> None:
+    """读线程解析输出：bestmove 到达即唤醒等待者，info 每个 multipv 只保留最新一条；进程退出立即失败"""
+    e = Engine()
+    for depth in range(1, 200):
+        e._on_line(f"info depth {depth} multipv 1 score cp {depth} pv h2e2")
+    e._on_line("info string bestmove cache 1234")
+    assert e._seen == set(), "info 行里的 bestmove 子串不应命中"
+    assert len(e._infos) == 1
+
+    def feed() -> None:
+        time.sleep(0.05)
+        e._on_line("bestmove h2e2 ponder h9g7")
+
+    threading.Thread(target=feed).start()
+    start = time.monotonic()
+    e._wait_for("bestmove", 5)
+    assert time.monotonic() - start < 1
+    result = e._result()
+    assert (result.move, result.ponder, result.score) == ("h2e2", "h9g7", 199)
+
+    # 进程退出（stdout EOF）：等待者不等满超时
+    e._reset_output()
+    e._drain(io.StringIO("info depth 1 score cp 5\n"), e._gen)
+    with pytest.raises(EngineError, match="已退出"):
+        e._wait_for("readyok", 5)
+
+
+def test_engine_ponder() -> None:
+    """ponder：position ... moves + go ponder；命中发 ponderhit，新搜索前先 stop 吃掉 bestmove"""
+    e, spawned, waits = _make_engine()
+    move, _score = e.best_move("fen1", moves=["h2e2", "h9g7"])
+    assert (move, e.ponder_move) == ("h2e2", "b9c7")
+    assert spawned[-1].stdin.buf[-2] == "position fen fen1 moves h2e2 h9g7\n"
+
+    e.ponder("fen2", ["b9c7"], 1000)
+    sent = spawned[-1].stdin.buf
+    assert sent[-2:] == ["position fen fen2 moves b9c7\n", "go ponder movetime 1000\n"]
+    assert e.pondering
+    assert e.ponder_hit() == ("h2e2", 0)
+    assert sent[-1] == "ponderhit\n"
+    assert not e.pondering
+
+    # 未命中：下一次 best_move 前先 stop 并等待 ponder 的 bestmove
+    e.ponder("fen3", ["b9c7"], 1000)
+    waits.clear()
+    e.best_move("fen4")
+    sent = spawned[-1].stdin.buf
+    assert sent[-3:] == ["stop\n", "position fen fen4\n", "go movetime 1000\n"]
+    assert waits == ["bestmove", "bestmove"], f"stop 与新搜索各等一次 bestmove，实际 {waits}"
+
+    with pytest.raises(EngineError):
+        e.ponder_hit()
+
+
+def test_search_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """搜索缓存：同局面命中不再发 go；回合计数不影响键；clock 过大不缓存；LRU 淘汰；跨实例持久"""
+    path = tmp_path / "search.sqlite3"
+    e, _spawned, waits = _make_engine()
+    e.cache = SearchCache(path, capacity=100)
+    e.name = "Pikafish test"
+    fen = "4k4/9/9/9/9/9/9/3R5/9/4K4 w - - 3 7"
+
+    assert e.best_move(fen) == ("h2e2", 0)
+    assert e.best_move(fen.replace("3 7", "5 9")) == ("h2e2", 0)
+    assert e.ponder_move == "b9c7", "命中时应恢复 ponder 预测"
+    assert waits == ["bestmove"], "命中不应再搜索"
+    assert e.cache.stats() == {"hits": 1, "misses": 1}
+
+    # 带着法历史：只有调用方给出当前局面 key 才走缓存
+    e.best_move("start", moves=["h2e2"])
+    e.best_move("start", moves=["h2e2"], key=fen)
+    assert len(waits) == 2
+    assert search_cache.normalize(fen.replace("3 7", "21 7")) is None
+
+    # 重新打开（新进程）仍命中；超出容量淘汰最久未用
+    cache = SearchCache(path, capacity=2)
+    monkeypatch.setattr(search_cache, "_EVICT_EVERY", 1)
+    assert cache.get(fen, 1000, "Pikafish test") == ("h2e2", 0, "b9c7")
+    assert cache.get(fen, 1000, "Pikafish 2") is None, "换引擎版本应失效"
+    cache.put("a w - - 0 1", 1000, "x", "a0a1", 1, None)
+    cache.put("b w - - 0 1", 1000, "x", "b0b1", 2, None)
+    assert cache.get(fen, 1000, "Pikafish test") is None
+    assert cache.get("b w", 1000, "x") == ("b0b1", 2, None)
+    cache.close()
+
+
+def test_repeated_position_skips_cache(collector: LogCollector) -> None:
+    """当前局面已在着法记录中出现过（来回走成循环）时不传缓存键，不会命中其它历史的结果"""
+    s = game.GameSession(MockDevice(), collector.log, collector.on_state, None)
+    s.book = None
+    s.state.board = full_board("red")
+    s.state.my_side = s.state.turn = Side.RED
+    s.state.initialized = True
+    keys: list[str | None] = []
+
+    def fake_best_move(fen, ms=1000, moves=(), key=None, limits=None):  # type: ignore[no-untyped-def]
+        keys.append(key)
+        return "a0a1", 0
+
+    s.engine.best_move = fake_best_move  # type: ignore[method-assign]
+    first = s._compute_move()
+    assert first is not None and keys == [first[0]], "首次出现的局面按 FEN 走缓存"
+
+    cycle = [((9, 0), (8, 0), "r_R"), ((0, 0), (1, 0), "b_r")]
+    cycle += [(dst, src, piece) for src, dst, piece in cycle]
+    for src, dst, piece in cycle:
+        move_piece(s.state.board, *src, *dst)
+        s.state.played.append(Move(src, dst, piece, None))
+    again = s._compute_move()
+    assert again is not None and again[0] == first[0], "循环后回到同一局面"
+    assert keys == [first[0], None], "重复局面不读写缓存"
+
+
+class PoolFakeEngine:
+    """引擎池测试用实例：记录 ucinewgame 与 ponder 状态"""
+
+    def __init__(self) -> None:
+        self.cache = None
+        self.newgames = 0
+        self.pondering = False
+        self.ponder_move: str | None = None
+        self.last_result = None
+
+    def newgame(self) -> None:
+        self.newgames += 1
+
+    def best_move(self, fen, movetime_ms=1000, moves=(), key=None, limits=None):  # type: ignore[no-untyped-def]
+        self.ponder_move = "b9c7"
+        return ("h2e2", 0) if not moves else (f"reply-{moves[-1]}", len(moves))
+
+    def is_mate(self, fen, movetime_ms=200):  # type: ignore[no-untyped-def]
+        return False
+
+    def multipv(self, fen, moves, movetime_ms, count):  # type: ignore[no-untyped-def]
+        replies = ("h9g7", "b9c7", "h7e7", "c6c5")[:count]
+        infos = tuple(InfoRecord(multipv=i, pv=(m,)) for i, m in enumerate(replies, 1))
+        return SearchResult(replies[0], None, infos)
+
+    def interrupt(self) -> None:
+        pass
+
+    def ponder(self, fen, moves, movetime_ms=1000):  # type: ignore[no-untyped-def]
+        self.pondering = True
+
+    def ponder_hit(self, key=None):  # type: ignore[no-untyped-def]
+        self.pondering = False
+        return "h0g2", 0
+
+    def stop_ponder(self) -> None:
+        self.pondering = False
+
+    def close(self) -> None:
+        pass
+
+
+def test_engine_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """引擎池：按核数/内存定规模；哈希归属切换才 ucinewgame；FIFO 排队；正式搜索抢占后台思考"""
+    monkeypatch.setattr(config, "ENGINE_THREADS", 4)
+    monkeypatch.setattr(config, "ENGINE_HASH_MB", 1024)
+    assert engine_pool.auto_size(16, 64_000) == 4
+    assert engine_pool.auto_size(32, 12_000) == 4, "内存只够四个实例"
+    assert engine_pool.auto_size(16, 4_000) == 1, "内存只够一个实例"
+    assert engine_pool.auto_size(2, 0) == 1, "核数不够一个实例的线程数时仍保留 1 个"
+
+    pool = engine_pool.EnginePool(2, factory=PoolFakeEngine)  # type: ignore[arg-type]
+    a, b = engine_pool.PooledEngine(pool), engine_pool.PooledEngine(pool)
+    assert a.best_move("fen") == ("h2e2", 0)
+    assert a.ponder_move == "b9c7"
+    a.best_move("fen")
+    assert pool.newgames == 1, "同一局连续租借应保留哈希"
+    b.best_move("fen")
+    a.best_move("fen")
+    assert pool.newgames == 2, "空闲实例优先分给原归属"
+    a.newgame()
+    assert not a.is_mate("fen")
+    assert pool.newgames == 3, "新对局应发 ucinewgame"
+
+    # 单实例：后台思考持有租约，其它会话的搜索抢占之；有人占用时不启动后台思考
+    pool = engine_pool.EnginePool(1, factory=PoolFakeEngine)  # type: ignore[arg-type]
+    a, b = engine_pool.PooledEngine(pool), engine_pool.PooledEngine(pool)
+    a.ponder("fen", ["b9c7"])
+    assert a.pondering
+    assert b.best_move("fen") == ("h2e2", 0)
+    assert not a.pondering
+    with pytest.raises(EngineError, match="抢占"):
+        a.ponder_hit()
+    a.ponder("fen", ["b9c7"])
+    assert a.ponder_hit() == ("h0g2", 0)
+    with pool.lease(b.owner):
+        with pytest.raises(EngineError, match="无空闲"):
+            a.ponder("fen", ["b9c7"])
+
+        # 等待者按到达顺序取得实例
+        order: list[str] = []
+        threads = []
+
+        def search(handle: engine_pool.PooledEngine, name: str) -> None:
+            handle.best_move("fen")
+            order.append(name)
+
+        for handle, name in ((a, "first"), (engine_pool.PooledEngine(pool), "second")):
+            waiting = pool.stats()["waiting"]
+            t = threading.Thread(target=search, args=(handle, name))
+            t.start()
+            while pool.stats()["waiting"] == waiting:
+                time.sleep(0.001)
+            threads.append(t)
+    for t in threads:
+        t.join(5)
+    assert order == ["first", "second"]
+    assert pool.stats()["busy"] == 0
+
+
+def test_early_stop() -> None:
+    """主变首着连续多层不变且分数稳定：过了 stable_ms 即发 stop，不等满 movetime"""
+    e, spawned, _waits = _make_engine()
+
+    def feed() -> None:
+        for depth in range(1, 8):
+            time.sleep(0.005)
+            e._on_line(f"info depth {depth} score cp {10 + depth % 2 * 5} pv h2e2 h9g7")
+
+    threading.Thread(target=feed).start()
+    start = time.monotonic()
+    move, _score = e.best_move("fen", limits=SearchLimits(5000, stable_ms=50))
+    assert move == "h2e2"
+    assert time.monotonic() - start < 1
+    assert spawned[-1].stdin.buf[-2:] == ["go movetime 5000\n", "stop\n"]
+    assert e.last_result is not None and e.last_result.stopped_early
+    assert e.last_result.volatility == 5
+    assert e.early_stops == 1
+
+    # 限深搜索不提前 stop、不走缓存
+    e.best_move("fen", limits=SearchLimits(3000, depth=5, stable_ms=50))
+    assert spawned[-1].stdin.buf[-1] == "go movetime 3000 depth 5\n"
+    assert not e.last_result.stopped_early
+
+
+def test_time_manager(monkeypatch: pytest.MonkeyPatch) -> None:
+    """思考时间：阶段缩放、唯一着法限深 1、已见杀棋限深、波动加时、整局预算封顶"""
+    monkeypatch.setattr(config, "ENGINE_MOVETIME_MS", 1000)
+    monkeypatch.setattr(config, "ENGINE_MIN_MOVETIME_MS", 300)
+    monkeypatch.setattr(config, "ENGINE_MAX_MOVETIME_MS", 3000)
+    monkeypatch.setattr(config, "ENGINE_EARLY_STOP", 0.5)
+    tm = TimeManager(budget_ms=600_000)
+    assert tm.plan(Phase.MIDDLE) == SearchLimits(1000, stable_ms=500)
+    assert tm.plan(Phase.OPENING).movetime_ms == 600
+    assert tm.plan(Phase.MIDDLE, legal_moves=2).movetime_ms == 500
+    assert tm.plan(Phase.MIDDLE, legal_moves=1) == SearchLimits(300, depth=1)
+    assert tm.plan(Phase.MIDDLE, score=MATE_SCORE - 3) == SearchLimits(3000, depth=7)
+
+    info = InfoRecord(depth=20, score=40, pv=("h2e2",))
+    limits = tm.plan(Phase.MIDDLE)
+    tm.record(400, limits, SearchResult("h2e2", None, (info,), volatility=300, stopped_early=True))
+    assert (tm.spent_ms, tm.saved_ms) == (400, 600)
+    assert tm.plan(Phase.MIDDLE).movetime_ms == 2000, "波动大应加时"
+    tm.record(5, limits, SearchResult("h2e2", None))
+    assert tm.volatility == 300, "缓存命中无逐层信息，沿用上次波动"
+
+    tm.spent_ms = 590_000
+    assert tm.plan(Phase.MIDDLE).movetime_ms == 666, "剩余预算不足时按剩余步数封顶"
+    tm.new_game()
+    assert tm.remaining_ms == 600_000
+    monkeypatch.setattr(config, "ENGINE_TIME_ADAPTIVE", False)
+    assert tm.plan(Phase.OPENING) == SearchLimits(1000)
+
+
+def test_multipv() -> None:
+    """MultiPV 搜索：前后切换 MultiPV 选项，infos 按 multipv 返回多条主变"""
+    e, spawned, _waits = _make_engine()
+    e._on_line("info depth 9 multipv 2 score cp -10 pv b9c7")
+    e._wait_for = lambda marker, timeout: (  # type: ignore[method-assign]
+        e._on_line("info depth 9 multipv 1 score cp 20 pv h9g7"),
+        e._on_line("info depth 9 multipv 2 score cp 5 pv b9c7"),
+        e._on_line("bestmove h9g7"),
+    )
+    result = e.multipv("fen", ["h2e2"], 300, 2)
+    assert [info.pv[0] for info in result.infos] == ["h9g7", "b9c7"]
+    sent = spawned[-1].stdin.buf
+    assert sent[0] == "setoption name MultiPV value 2\n"
+    assert sent[-1] == "setoption name MultiPV value 1\n"
+
+
+def test_speculator(monkeypatch: pytest.MonkeyPatch) -> None:
+    """应着预算：MultiPV 取候选（跳过 ponder 预测）逐一算回应；命中计入省时；无空闲实例不预算"""
+    monkeypatch.setattr(config, "ENGINE_SPECULATE_K", 2)
+    pool = engine_pool.EnginePool(1, factory=PoolFakeEngine)  # type: ignore[arg-type]
+    sp = Speculator(engine_pool.PooledEngine(pool))
+    sp.start("fen", ["h2e2"], "h9g7", SearchLimits(1000))
+    sp._executor.submit(lambda: None).result(5)
+    assert set(sp._responses) == {"b9c7", "h7e7"}
+    hit = sp.settle("h7e7")
+    assert isinstance(hit, Response) and hit.move == "reply-h7e7"
+    assert (sp.hits, sp.total) == (1, 1)
+    assert sp.settle("b9c7") is None and sp.total == 1, "已结算的回应表不再命中"
+
+    sp.start("fen", ["h2e2"], "h9g7", SearchLimits(1000))
+    sp._executor.submit(lambda: None).result(5)
+    sp.cancel()  # 流程 / 对局结束：回应表属于已放弃的局面
+    assert sp.settle("b9c7") is None and (sp.hits, sp.total) == (1, 1), "取消后不再命中、不计统计"
+
+    with pool.lease(("other", 0)):
+        sp.start("fen", ["h2e2"], None, SearchLimits(1000))
+        sp._executor.submit(lambda: None).result(5)
+    assert sp.settle("h9g7") is None
+    assert sp.total == 1, "无空闲实例时不预算、不计入统计"
+    assert pool.stats()["busy"] == 0
+    sp.close()
+
+
+def test_speculator_stop_only_while_leased() -> None:
+    """cancel 发 stop 时预算仍持有租约：_run 收尾归还租约须等 stop 发完，stop 不会落到转借的实例上"""
+    searching, leased_at_stop = threading.Event(), []
+    pool = engine_pool.EnginePool(1, factory=PoolFakeEngine)  # type: ignore[arg-type]
+    (eng,) = pool._idle
+
+    def blocking_multipv(fen, moves, movetime_ms, count):  # type: ignore[no-untyped-def]
+        searching.set()
+        eng.stopped.wait(5)
+        return SearchResult(None, None)
+
+    def slow_interrupt() -> None:
+        eng.stopped.set()  # 搜索随即返回，_run 进入 finally 归还租约
+        time.sleep(0.05)
+        leased_at_stop.append(pool.stats()["busy"])
+
+    eng.stopped = threading.Event()  # type: ignore[attr-defined]
+    eng.multipv = blocking_multipv  # type: ignore[method-assign]
+    eng.interrupt = slow_interrupt  # type: ignore[method-assign]
+    sp = Speculator(engine_pool.PooledEngine(pool))
+    sp.start("fen", ["h2e2"], None, SearchLimits(1000))
+    assert searching.wait(5)
+    sp.cancel()
+    sp._executor.submit(lambda: None).result(5)
+    assert leased_at_stop == [1], "stop 发出时租约应仍未归还"
+    assert pool.stats()["busy"] == 0
+    sp.close()
+
+
+def test_speculated_move_settles_ponder(collector: LogCollector) -> None:
+    """直接取预算着法时不经搜索：命中待取的后台思考应停止并归还实例，不调引擎"""
+    s = game.GameSession(MockDevice(), collector.log, collector.on_state, None)
+    s.book = None
+    s.state.board = full_board("red")
+    s.state.my_side = s.state.turn = Side.RED
+    s.state.initialized = True
+    s._engine_position()
+    for src, dst, piece in (((9, 1), (7, 2), "r_N"), ((0, 1), (2, 2), "b_n")):
+        move_piece(s.state.board, *src, *dst)
+        s.state.played.append(Move(src, dst, piece, None))
+    calls: list[str] = []
+    s.engine.best_move = lambda *a, **k: calls.append("search")  # type: ignore[method-assign]
+    s.engine.stop_ponder = lambda: calls.append("stop_ponder")  # type: ignore[method-assign]
+    s._speculated = ("b9c7", Response("h0g2", 12, None, 300))
+    s._ponder_hit = True
+
+    pending = s._compute_move()
+    assert pending is not None and pending[1] == "h0g2"
+    assert calls == ["stop_ponder"] and not s._ponder_hit
+
+
+def test_game_end_cancels_ponder(collector: LogCollector) -> None:
+    """后台思考期间对局结束（对方认输等）：立即停止思考与应着预算，旧预测不参与下一局判定"""
+    s = game.GameSession(MockDevice(), collector.log, collector.on_state, None)
+    s.state.my_side = Side.RED
+    calls: list[str] = []
+    s.engine.stop_ponder = lambda: calls.append("stop_ponder")  # type: ignore[method-assign]
+    s.speculator.cancel = lambda: calls.append("cancel")  # type: ignore[method-assign]
+    s._pondering = "h7e7"
+    s._ponder_guess = "b9c7"
+    s._ponder_hit = True
+
+    s._finish_game("对方认输")
+    assert calls == ["cancel", "stop_ponder"]
+    assert s._pondering is None and s._ponder_guess is None and not s._ponder_hit
+
+    s._settle_ponder(Move((2, 7), (2, 4), "b_c", None))  # 下一局对方首着恰为旧预测 h7e7
+    assert s.ponder_total == 0 and not s._ponder_hit
+
+
+FAKE_UCI = Path(__file__).resolve().parent.parent / "scripts" / "fake_uci.py"
+
+
+def _fake_uci(*extra: str) -> Engine:
+    e = Engine([sys.executable, str(FAKE_UCI), *extra], cwd=FAKE_UCI.parent)
+    e.cache = None
+    return e
+
+
+def test_fake_uci_process() -> None:
+    """真实子进程（替身引擎）：读线程解析 info/bestmove；ponder/ponderhit；进程崩溃后重建重试"""
+    e = _fake_uci("--move", "b2e2", "--score", "35", "--crash-after", "3")
+    try:
+        assert e.best_move("fen", 60) == ("b2e2", 35)
+        assert e.name == "FakeUCI 1.0"
+        assert e.last_result is not None and e.last_result.infos[0].pv == ("b2e2",)
+        assert e.ponder_move == "h9g7"
+
+        e.ponder("fen", ["h9g7"], 60)
+        time.sleep(0.05)
+        assert e.pondering
+        assert e.ponder_hit() == ("b2e2", 35)
+
+        result = e.multipv("fen", [], 60, 3)
+        assert [info.pv[0] for info in result.infos] == ["b2e2", "h9g7", "b9c7"]
+
+        first = e._proc
+        assert e.best_move("fen", 60) == ("b2e2", 35), "第 4 次 go 崩溃后应重建并重试成功"
+        assert e._proc is not first
+    finally:
+        e.close()
+
+
+def test_analysis_feed() -> None:
+    """搜索进度：引擎主变 info 实时回调；推送按间隔节流合并，结束时补推最后一条"""
+    e = Engine()
+    got: list[InfoRecord] = []
+    e.on_info = got.append
+    e._on_line("info depth 3 multipv 1 score cp 12 nps 900000 pv h2e2 h9g7")
+    e._on_line("info depth 3 multipv 2 score cp 5 pv b2e2")
+    e._on_line("info depth 3 currmove h2e2")
+    assert [info.depth for info in got] == [3], "只回调带分数的主变 info"
+
+    now = [0.0]
+    sent: list[dict] = []
+    feed = AnalysisFeed(sent.append, interval_ms=250, clock=lambda: now[0])
+    feed.begin(1000)
+    for depth in range(1, 6):
+        feed.push(InfoRecord(depth=depth, score=depth * 10, nps=1000, time=depth, pv=("h2e2",)))
+        now[0] += 0.1
+    assert [d["depth"] for d in sent] == [1, 4], "250ms 内的 info 只保留最新一条"
+    feed.finish()
+    assert sent[-1] == {
+        "depth": 5,
+        "seldepth": 0,
+        "score": 50,
+        "mate": None,
+        "bound": None,
+        "nodes": 0,
+        "nps": 1000,
+        "time": 5,
+        "movetime": 1000,
+        "pv": ["h2e2"],
+    }
+    feed.finish()
+    assert len(sent) == 3, "无积压时 finish 不重复推送"
+
+    # 经引擎池：正式搜索期间挂回调，结束后摘除（预算等其它租借不推送）
+    pool = engine_pool.EnginePool(1, factory=_fake_uci)
+    handle = engine_pool.PooledEngine(pool)
+    handle.on_info = lambda info: sent.append({"depth": info.depth})
+    try:
+        sent.clear()
+        handle.best_move("fen", 60)
+        assert sent, "正式搜索应推送进度"
+        with pool.lease(handle.owner) as eng:
+            assert eng.on_info is None
+    finally:
+        pool.close()
@@ -0,0 +1,110 @@
+"""后台截图线程：取帧顺序、点击后作废旧帧、慢截图预取复用、interrupt 唤醒等待、回放帧源。"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from xiangqi_bot import adb_client
+from xiangqi_bot.game import session as game
+from xiangqi_bot.game.capture import Capture
+from xiangqi_bot.game.frames import FrameProducer, ReplaySource
+
+from .conftest import RAW_SCREENSHOTS, LogCollector, MockDevice
+
+SHOTS = [RAW_SCREENSHOTS / n for n in ("木_红_1080x2400.png", "石_红_1080x2400.png")]
+
+
+def _capture(collector: LogCollector, source: ReplaySource) -> Capture:
+    return Capture(MockDevice(), {}, collector.log, lambda: "accept", source=source)
+
+
+def test_stream_replay_frames(collector: LogCollector) -> None:
+    """预取帧按序交付、矫正成棋盘；回放读完后取帧失败并记日志"""
+    cap = _capture(collector, ReplaySource(SHOTS))
+    cap.start_stream()
+    try:
+        first = cap.grab()
+        second = cap.grab()
+        assert first is not None and second is not None
+        assert first.shape == (1000, 900, 3) and not np.array_equal(first, second)
+        assert cap.grab() is None
+        assert "[error] 截图失败" in collector.logs
+    finally:
+        cap.stop_stream()
+    assert {"截图", "等待", "弹窗", "矫正"} <= cap.timing.avg.keys()
+
+
+def test_frames_after_tap_are_fresh(
+    collector: LogCollector, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """点击之后取到的帧一定在点击完成之后才开始截取"""
+    monkeypatch.setattr(adb_client, "tap", lambda device, x, y: None)
+    cap = _capture(collector, ReplaySource(SHOTS, loop=True))
+    cap.start_stream()
+    try:
+        assert cap.screenshot() is not None
+        time.sleep(0.05)  # 让后台线程预取下一帧
+        assert cap.tap_xy(1, 1)
+        tapped = cap._last_action
+        assert cap.screenshot() is not None
+        producer = cap._producer
+        assert producer is not None
+        newest = producer.frames()[-1]
+        assert newest.seq == cap._last_seq and newest.started >= tapped
+    finally:
+        cap.stop_stream()
+
+
+def test_slow_capture_prefetch_is_used(collector: LogCollector) -> None:
+    """单帧截图 300ms（超过 FRAME_MAX_AGE_MS）时，识别期间预取的帧仍被采用，不重新截图"""
+    replay = ReplaySource(SHOTS, loop=True)
+
+    def slow() -> np.ndarray | None:
+        time.sleep(0.3)
+        return replay()
+
+    cap = _capture(collector, slow)  # type: ignore[arg-type]
+    cap.start_stream()
+    try:
+        assert cap.screenshot() is not None
+        time.sleep(0.25)  # 模拟矫正 + 识别，期间后台拉取下一帧
+        asked = time.monotonic()
+        assert cap.screenshot() is not None
+        waited = time.monotonic() - asked
+        producer = cap._producer
+        assert producer is not None
+        used = next(f for f in producer.frames() if f.seq == cap._last_seq)
+        assert used.started < asked, "应采用识别期间预取的帧"
+        assert waited < 0.2, f"只需等预取帧收尾，实际等待 {waited * 1000:.0f}ms"
+    finally:
+        cap.stop_stream()
+
+
+def test_interrupt_wakes_waiting_grab(collector: LogCollector) -> None:
+    """截图卡住时 interrupt() 停止后台线程并立即唤醒等待中的取帧"""
+    release = threading.Event()
+
+    def stuck() -> np.ndarray | None:
+        release.wait(5)
+        return None
+
+    s = game.GameSession(MockDevice(), collector.log, collector.on_state, None, source=stuck)
+    s.capture.start_stream()
+    producer = s.capture._producer
+    assert isinstance(producer, FrameProducer)
+    result: list[object] = []
+    waiter = threading.Thread(target=lambda: result.append(s.capture.grab()))
+    waiter.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    s.interrupt()
+    waiter.join(2)
+    assert not waiter.is_alive() and result == [None]
+    assert time.monotonic() - start < 1
+    release.set()
+    producer.stop()
+    assert not producer.running
@@ -0,0 +1,118 @@
+"""常驻 shell 输入通道：命令下发、整步走棋批量命令、sendevent 坐标换算、断线重连。"""
+
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pytest
+
+from xiangqi_bot import adb_client
+from xiangqi_bot.game import capture as capture_module
+from xiangqi_bot.game.capture import Capture
+
+from .conftest import LogCollector
+
+GETEVENT = """add device 1: /dev/input/event3
+  name:     "gpio-keys"
+  events:
+    KEY (0001): 0073  0074
+add device 2: /dev/input/event2
+  name:     "fts_ts"
+  events:
+    ABS (0003): 0035  : value 0, min 0, max 2159, fuzz 0, flat 0, resolution 0
+                0036  : value 0, min 0, max 4799, fuzz 0, flat 0, resolution 0
+"""
+
+
+class _ShellConn:
+    """模拟 exec:sh 连接：记录每行脚本，回写输出与完成标记"""
+
+    def __init__(self, broken: bool = False) -> None:
+        self.socket = self
+        self.lines: list[str] = []
+        self.broken = broken
+        self._out = b""
+
+    def send(self, cmd: str) -> None:
+        assert cmd == "exec:sh"
+
+    def sendall(self, data: bytes) -> None:
+        if self.broken:
+            raise OSError("broken pipe")
+        line = data.decode().rstrip("\n")
+        script, marker = re.fullmatch(r"(.*); echo (\S+)", line).groups()  # type: ignore[union-attr]
+        self.lines.append(script)
+        out = GETEVENT if script == "getevent -p" else ""
+        self._out += f"{out}{marker}\n".encode()
+
+    def settimeout(self, _timeout: float) -> None:
+        pass
+
+    def recv(self, _size: int) -> bytes:
+        out, self._out = self._out, b""
+        return out
+
+    def close(self) -> None:
+        pass
+
+
+class _ShellDevice:
+    def __init__(self) -> None:
+        self.conns: list[_ShellConn] = []
+
+    def create_connection(self) -> _ShellConn:
+        self.conns.append(_ShellConn())
+        return self.conns[-1]
+
+    def shell(self, cmd: str) -> str:
+        assert cmd == "wm size"
+        return "Physical size: 1080x2400\n"
+
+
+def test_input_shell_commands() -> None:
+    """多次点击/按键复用同一连接；整步走棋一条命令含设备端停顿"""
+    dev = _ShellDevice()
+    shell = adb_client.InputShell(dev)  # type: ignore[arg-type]
+    shell.tap(10, 20)
+    shell.keyevent(adb_client.KEYCODE_BACK)
+    shell.move(1, 2, 3, 4, 400)
+    assert len(dev.conns) == 1
+    assert dev.conns[0].lines == [
+        "input tap 10 20",
+        "input keyevent 4",
+        "input tap 1 2; sleep 0.400; input tap 3 4",
+    ]
+
+
+def test_input_shell_reconnects() -> None:
+    """连接失效时重开一次再写，命令只执行一遍"""
+    dev = _ShellDevice()
+    shell = adb_client.InputShell(dev)  # type: ignore[arg-type]
+    shell.tap(1, 1)
+    dev.conns[0].broken = True
+    shell.tap(2, 2)
+    assert [c.lines for c in dev.conns] == [["input tap 1 1"], ["input tap 2 2"]]
+
+
+def test_input_shell_sendevent() -> None:
+    """sendevent：探测触摸屏节点，屏幕坐标按触摸坐标范围换算"""
+    dev = _ShellDevice()
+    shell = adb_client.InputShell(dev, sendevent=True)  # type: ignore[arg-type]
+    shell.tap(540, 1200)
+    script = dev.conns[0].lines[-1]
+    assert "sendevent /dev/input/event2 3 53 1080" in script
+    assert "sendevent /dev/input/event2 3 54 2400" in script
+    assert "input tap" not in script
+
+
+def test_capture_move_batched(collector: LogCollector, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Capture.move 在常驻通道下一次下发起子 + 落子"""
+    monkeypatch.setattr(capture_module, "INPUT_PERSISTENT", True)
+    dev = _ShellDevice()
+    cap = Capture(dev, {}, collector.log, lambda: "accept")  # type: ignore[arg-type]
+    cap._homography = np.eye(3)
+    assert cap.move(9, 1, 7, 2)
+    assert dev.conns[0].lines == ["input tap 150 950; sleep 0.400; input tap 250 750"]
+    assert cap._last_action > 0
+    cap.close()
@@ -6,8 +6,10 @@ import itertools
 import time as real_time
 from typing import Any
 
+import numpy as np
 import pytest
 
+from xiangqi_bot import vision
 from xiangqi_bot.board import START_SQUARES, make_empty_board
 from xiangqi_bot.game import session as game
 from xiangqi_bot.game.state import Side
@@ -38,9 +40,11 @@ def _make_session(collector: LogCollector) -> tuple[game.GameSession, MockDevice
     s.state.resign_streak = 0
     s.state.lift_logged = False
     s.state.noisy_count = 0
-    s.engine.best_move = lambda fen, ms=1000: ("e2e3", 0)  # type: ignore[method-assign]
+    s.engine.best_move = lambda fen, ms=1000, moves=(), key=None, limits=None: ("e2e3", 0)  # type: ignore[method-assign]
     s.engine.is_mate = lambda fen, ms: False  # type: ignore[method-assign]
     s.engine.newgame = lambda: None  # type: ignore[method-assign]
+    # 结算扫描每轮先截一张图，文字 / 棋盘结果由 _scan_text 与 capture.grab 的 mock 给出
+    s.capture.screenshot = lambda: np.zeros((1, 1, 3), np.uint8)  # type: ignore[method-assign]
     return s, dev
 
 
@@ -62,7 +66,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(_full_start_board()),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue: list[tuple[str, int, int, bool] | None] = [
         ("下一关", 712, 2198, True),
         None,
@@ -92,7 +96,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(_full_start_board()),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("段位提升", 540, 1000, False),
         ("再来一局", 542, 2237, True),
@@ -125,7 +129,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(endgame),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("下一关", 712, 2198, True),
         None,
@@ -148,7 +152,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
     monkeypatch.setattr(cfg, "AUTO_NEXT_TIMEOUT_S", 0)
     monkeypatch.setattr(an, "AUTO_NEXT_TIMEOUT_S", 0)
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: None  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: None  # type: ignore[method-assign]
     s.auto_next_handler._scan_text = lambda img=None: None  # type: ignore[method-assign]
     ok = s._auto_next_game()
     assert ok is False, "超时应中止"
@@ -182,7 +186,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
     board_b[6][2] = None
     capture_gen = itertools.cycle([_stable_frame(board_a), _stable_frame(board_b)])
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: next(capture_gen)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: next(capture_gen)  # type: ignore[method-assign]
     hit_queue = [
         ("下一关", 712, 2198, True),
         None,
@@ -236,7 +240,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(_full_start_board()),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("下一关", 712, 2198, True),
         ("下一关", 712, 2198, True),
@@ -273,7 +277,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
     collector.clear()
     status_seen: list[str] = []
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: None  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: None  # type: ignore[method-assign]
 
     def fake_scan() -> Any:
         status_seen.append(s._status())
@@ -336,7 +340,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(_full_start_board()),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("领取", 540, 1000, False),
         ("再来一局", 542, 2237, True),
@@ -386,7 +390,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(_full_start_board()),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("铜钱", 477, 1175, False),
         ("再来一局", 542, 2237, True),
@@ -414,7 +418,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(_full_start_board()),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("铜钱", 477, 1175, False),
         ("领取", 540, 1000, False),
@@ -463,7 +467,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(_full_start_board()),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("再来一局", 542, 2237, True),
         ("领取", 540, 1000, False),
@@ -493,7 +497,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(setup_board),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0) if capture_queue else None  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0) if capture_queue else None  # type: ignore[method-assign]
     hit_queue: list[tuple[str, int, int, bool] | None] = [
         ("再来一局", 542, 2237, True),
         None,
@@ -518,7 +522,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(_full_start_board()),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("下一关", 712, 2198, True),
         None,
@@ -540,7 +544,7 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
         _stable_frame(one_move_board),
     ]
     s, dev = _make_session(collector)
-    s.capture.grab = lambda: capture_queue.pop(0)  # type: ignore[method-assign]
+    s.capture.grab = lambda img=None, text=None: capture_queue.pop(0)  # type: ignore[method-assign]
     hit_queue = [
         ("下一关", 712, 2198, True),
         None,
@@ -551,3 +555,26 @@ def test_auto_next_game(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
     ok = s._auto_next_game()
     assert ok is True, collector.logs
     assert any("下一局开始" in m for m in collector.logs), collector.logs
+
+
+def test_scan_shares_text_frame(monkeypatch: pytest.MonkeyPatch, collector: LogCollector) -> None:
+    """结算扫描每轮只截一张图：结算文字与和棋弹窗共用同一个 TextFrame，矫正也用这张图"""
+    s, _dev = _make_session(collector)
+    s.state.game_over = False  # 和棋弹窗检测只在对局进行中生效
+    shots: list[np.ndarray] = []
+
+    def screenshot() -> np.ndarray:
+        shots.append(np.zeros((2400, 1080, 3), np.uint8))
+        return shots[-1]
+
+    seen: list[vision.TextFrame] = []
+    monkeypatch.setattr(vision, "find_gameover_text", lambda img, w=0, h=0: seen.append(img) or [])
+    monkeypatch.setattr(vision, "find_draw_dialog", lambda img, w=0, h=0: seen.append(img) or [])
+    monkeypatch.setattr(real_time, "sleep", lambda sec: None)
+    s.capture.screenshot = screenshot  # type: ignore[method-assign]
+    corrected: list[np.ndarray] = []
+    s.capture._correct = lambda img: corrected.append(img) or _stable_frame(_full_start_board())  # type: ignore[method-assign]
+    assert s.auto_next_handler.scan_and_wait() is not None
+    assert len(shots) == 1 and corrected == shots, "只截一张图并用于矫正"
+    assert len(seen) == 2 and seen[0] is seen[1], "两种文字识别应共享同一 TextFrame"
+    assert seen[0].img is shots[0]
@@ -71,15 +71,15 @@ def test_enemy_moved_n2(collector: LogCollector, monkeypatch: pytest.MonkeyPatch
     _patch_sleep(monkeypatch)
 
     after = [row[:] for row in b]
-    after[7][7] = None
-    after[7][4] = "b_c"
-    updates = [(7, 7, "b_c", None), (7, 4, None, "b_c")]
+    after[2][7] = None
+    after[2][4] = "b_c"
+    updates = [(2, 7, "b_c", None), (2, 4, None, "b_c")]
     _queue_frames(monkeypatch, s, [(after, updates)])
 
     s._wait_for_enemy_move()
 
-    assert s.state.board[7][7] is None
-    assert s.state.board[7][4] == "b_c"
+    assert s.state.board[2][7] is None
+    assert s.state.board[2][4] == "b_c"
     assert s.state.turn == Side.RED
     assert not any("敌方提起" in line for line in collector.logs)
 
@@ -91,13 +91,13 @@ def test_enemy_lifted_n1(collector: LogCollector, monkeypatch: pytest.MonkeyPatc
     _patch_sleep(monkeypatch)
 
     lifted = [row[:] for row in b]
-    lifted[7][7] = None
-    lifted_updates = [(7, 7, "b_c", None)]
+    lifted[2][7] = None
+    lifted_updates = [(2, 7, "b_c", None)]
     same = [row[:] for row in b]
     after = [row[:] for row in b]
-    after[7][7] = None
-    after[7][4] = "b_c"
-    moved_updates = [(7, 7, "b_c", None), (7, 4, None, "b_c")]
+    after[2][7] = None
+    after[2][4] = "b_c"
+    moved_updates = [(2, 7, "b_c", None), (2, 4, None, "b_c")]
     _queue_frames(
         monkeypatch,
         s,
@@ -112,7 +112,7 @@ def test_enemy_lifted_n1(collector: LogCollector, monkeypatch: pytest.MonkeyPatc
 
     lift_logs = [line for line in collector.logs if "敌方提起" in line]
     assert len(lift_logs) == 1, f"应只提示一次提起，实际 {len(lift_logs)} 次"
-    assert s.state.board[7][4] == "b_c"
+    assert s.state.board[2][4] == "b_c"
     assert s.state.turn == Side.RED
 
 
@@ -124,15 +124,15 @@ def test_n0_continues(collector: LogCollector, monkeypatch: pytest.MonkeyPatch)
 
     same = [row[:] for row in b]
     after = [row[:] for row in b]
-    after[7][7] = None
-    after[7][4] = "b_c"
+    after[2][7] = None
+    after[2][4] = "b_c"
     _queue_frames(
         monkeypatch,
         s,
         [
             (same, []),
             (same, []),
-            (after, [(7, 7, "b_c", None), (7, 4, None, "b_c")]),
+            (after, [(2, 7, "b_c", None), (2, 4, None, "b_c")]),
         ],
     )
 
@@ -199,9 +199,9 @@ def test_resign_transient_not_triggered(
     none_updates = [(5, 5, "r_P", None)]
 
     after = [row[:] for row in b]
-    after[7][7] = None
-    after[7][4] = "b_c"
-    moved_updates = [(7, 7, "b_c", None), (7, 4, None, "b_c")]
+    after[2][7] = None
+    after[2][4] = "b_c"
+    moved_updates = [(2, 7, "b_c", None), (2, 4, None, "b_c")]
 
     _queue_frames(
         monkeypatch,
@@ -1,9 +1,12 @@
-"""绝杀探测测试：_checkmate_probe。
+"""绝杀判定测试：_checkmate_probe / _poll_mate_probe。
 
 覆盖场景：
-- is_mate=True → game_over=True
-- is_mate=False → game_over=False
-- 引擎抛异常 → 降级为未绝杀
+- 主搜索 score mate 1 → 直接 game_over，不再调引擎
+- 主搜索非一步杀 → 继续对局，不调引擎
+- 主搜索无结论 → 按走子规则判定（绝杀 / 有应着），不调引擎
+- 棋盘识别异常（规则无法判断）→ 并行 is_mate 探测，敌方检测循环取结果（True/False）
+- 并行探测抛异常 → 降级为未绝杀
+- _compute_move 按引擎分数记录是否一步杀
 """
 
 from __future__ import annotations
@@ -11,6 +14,7 @@ from __future__ import annotations
 import pytest
 
 from xiangqi_bot.board import make_empty_board
+from xiangqi_bot.engine import MATE_SCORE
 from xiangqi_bot.game import session as game
 from xiangqi_bot.game.state import Side
 
@@ -31,39 +35,93 @@ def _make_session(collector: LogCollector) -> game.GameSession:
     return s
 
 
-def test_checkmate_true(collector: LogCollector, monkeypatch: pytest.MonkeyPatch) -> None:
-    """is_mate=True → game_over=True。"""
+def _forbid_is_mate(self, fen, ms):  # type: ignore[no-untyped-def]
+    pytest.fail("主搜索已给出结论时不应再调 is_mate")
+
+
+@pytest.mark.parametrize("mated", [True, False])
+def test_checkmate_from_search(
+    collector: LogCollector, monkeypatch: pytest.MonkeyPatch, mated: bool
+) -> None:
+    """主搜索已判定（score mate 1 / 非一步杀）→ 直接得出结论，不调引擎。"""
     s = _make_session(collector)
-    engine_cls = s.engine.__class__
-    monkeypatch.setattr(engine_cls, "is_mate", lambda self, fen, ms: True)
+    monkeypatch.setattr(s.engine.__class__, "is_mate", _forbid_is_mate)
+    s._search_mated = mated
 
-    result = s._checkmate_probe()
-    assert result is True
-    assert s.state.game_over is True
+    assert s._checkmate_probe() is mated
+    assert s.state.game_over is mated
+    assert s._mate_probe is None
 
 
-def test_checkmate_false(collector: LogCollector, monkeypatch: pytest.MonkeyPatch) -> None:
-    """is_mate=False → game_over=False。"""
+@pytest.mark.parametrize("mated", [True, False])
+def test_checkmate_from_rules(
+    collector: LogCollector, monkeypatch: pytest.MonkeyPatch, mated: bool
+) -> None:
+    """主搜索无结论 → 按走子规则数黑方合法着法，不调引擎。"""
     s = _make_session(collector)
-    engine_cls = s.engine.__class__
-    monkeypatch.setattr(engine_cls, "is_mate", lambda self, fen, ms: False)
+    monkeypatch.setattr(s.engine.__class__, "is_mate", _forbid_is_mate)
+    board = s.state.board
+    board[9][4], board[9][3] = None, "r_K"
+    board[0][0] = "r_R"  # 沿底线将军
+    if mated:
+        board[1][8] = "r_R"  # 封住 5 路上一格
+    s._search_mated = None
+
+    assert s._checkmate_probe() is mated
+    assert s.state.game_over is mated
+    assert s._mate_probe is None
+
+
+@pytest.mark.parametrize("mated", [True, False])
+def test_checkmate_parallel_probe(
+    collector: LogCollector, monkeypatch: pytest.MonkeyPatch, mated: bool
+) -> None:
+    """棋盘识别异常（缺將）→ 后台并行 is_mate，走棋不阻塞；敌方检测循环取到结果后判定。"""
+    s = _make_session(collector)
+    s.state.board[0][4] = None
+    monkeypatch.setattr(s.engine.__class__, "is_mate", lambda self, fen, ms: mated)
 
-    result = s._checkmate_probe()
-    assert result is False
-    assert s.state.game_over is False
+    assert s._checkmate_probe() is False, "并行探测不阻塞，先按未绝杀继续"
+    assert s._mate_probe is not None
+    s._mate_probe.result(timeout=5)
+    assert s._poll_mate_probe() is mated
+    assert s.state.game_over is mated
+    assert s._mate_probe is None
 
 
 def test_checkmate_engine_error(collector: LogCollector, monkeypatch: pytest.MonkeyPatch) -> None:
-    """引擎抛异常 → 降级为未绝杀。"""
+    """并行探测引擎抛异常 → 降级为未绝杀。"""
     s = _make_session(collector)
-    engine_cls = s.engine.__class__
+    s.state.board[0][4] = None
 
     def raise_is_mate(self, fen, ms):
         raise RuntimeError("引擎假异常")
 
-    monkeypatch.setattr(engine_cls, "is_mate", raise_is_mate)
+    monkeypatch.setattr(s.engine.__class__, "is_mate", raise_is_mate)
 
-    result = s._checkmate_probe()
-    assert result is False
+    s._checkmate_probe()
+    assert s._mate_probe is not None
+    with pytest.raises(RuntimeError):
+        s._mate_probe.result(timeout=5)
+    assert s._poll_mate_probe() is False
     assert s.state.game_over is False
     assert any("引擎绝杀探测失败" in line for line in collector.logs)
+
+
+@pytest.mark.parametrize(("score", "mated"), [(MATE_SCORE - 1, True), (MATE_SCORE - 3, False)])
+def test_compute_move_records_mate(
+    collector: LogCollector, monkeypatch: pytest.MonkeyPatch, score: int, mated: bool
+) -> None:
+    """_compute_move：引擎报 mate 1 记为一步杀，更长的杀棋仍需对方应着。"""
+    s = _make_session(collector)
+    s.state.turn = Side.RED
+    s.state.initialized = True
+    s.book = None
+    monkeypatch.setattr(
+        s.engine.__class__,
+        "best_move",
+        lambda self, fen, ms=1000, moves=(), key=None, limits=None: ("e0e1", score),
+    )
+
+    assert s._compute_move() is not None
+    assert s._search_mated is mated
@@ -41,7 +41,7 @@ class _MockDevice:
 def _patch_adb_screencap() -> None:
     """patch adb_client.screencap 使其像真实函数一样解码设备截图"""
 
-    def mock_screencap(device: object) -> np.ndarray | None:
+    def mock_screencap(device: object, raw: bool = False) -> np.ndarray | None:
         data = device.screencap()  # type: ignore[union-attr]
         if data is None:
             return None
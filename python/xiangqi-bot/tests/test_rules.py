@@ -0,0 +1,91 @@
+"""走子规则测试：合法着法生成（perft）、特殊规则，以及敌方走法校验 / 噪声帧消歧。"""
+
+from __future__ import annotations
+
+from xiangqi_bot.board import START_SQUARES, Board, make_empty_board
+from xiangqi_bot.game import classifier, moves, rules
+from xiangqi_bot.game.state import EnemyResult, Move, Side
+
+
+def _full_board() -> Board:
+    b = make_empty_board()
+    for pid, sqs in START_SQUARES.items():
+        for r, c in sqs:
+            b[r][c] = pid
+    return b
+
+
+def _perft(board: Board, side: Side, depth: int) -> int:
+    if depth == 0:
+        return 1
+    total = 0
+    for move in rules.legal_moves(board, side, Side.RED):
+        after = [row[:] for row in board]
+        moves.apply(after, move, 0)
+        total += _perft(after, side.opponent, depth - 1)
+    return total
+
+
+def test_perft() -> None:
+    """开局局面 perft 与公认值一致；我方执黑（棋盘翻转）时着法数相同"""
+    b = _full_board()
+    assert len(rules.legal_moves(b, Side.RED, Side.RED)) == 44
+    assert _perft(b, Side.RED, 2) == 1920
+    flipped = [[b[9 - r][8 - c] for c in range(9)] for r in range(10)]
+    assert rules.well_formed(b, Side.RED) and not rules.well_formed(b, Side.BLACK)
+    assert rules.well_formed(flipped, Side.BLACK)
+    assert len(rules.legal_moves(flipped, Side.BLACK, Side.BLACK)) == 44
+
+
+def test_special_rules() -> None:
+    """炮架、蹩马腿、将帥照面、过河兵横走、被将军时只能应将"""
+    b = make_empty_board()
+    b[9][4], b[0][3] = "r_K", "b_k"
+    b[9][0] = "r_C"
+    b[5][0] = "b_p"  # 炮架
+    b[2][0] = "b_r"
+    b[8][1] = "r_N"
+    b[8][2] = "r_P"  # 未过河兵不能横走；同时是 (8,1) 马跳 (7,3) 的马腿
+    b[3][6] = "r_P"  # 过河兵
+    red = {(m.src, m.dst) for m in rules.legal_moves(b, Side.RED, Side.RED)}
+    assert ((9, 0), (2, 0)) in red, "炮隔一子打车"
+    assert ((9, 0), (5, 0)) not in red, "炮不能直接吃炮架"
+    assert ((8, 1), (7, 3)) not in red, "蹩马腿"
+    assert ((8, 1), (6, 0)) in red
+    assert ((3, 6), (3, 5)) in red and ((3, 6), (3, 7)) in red, "过河兵可横走"
+    assert ((8, 2), (8, 3)) not in red
+    assert ((9, 4), (9, 3)) not in red, "帥走到 3 路与將照面"
+
+    b[4][4] = "b_r"  # 将军
+    red = rules.legal_moves(b, Side.RED, Side.RED)
+    assert rules.in_check(b, Side.RED, Side.RED)
+    assert [(m.piece, m.dst) for m in red] == [("r_K", (9, 5))], "只能走帥应将（3 路照面）"
+    b[4][4] = None
+    b[9][5] = "r_A"
+    assert rules.is_legal(b, Move((9, 5), (8, 4), "r_A", None), Side.RED)
+    assert not rules.is_legal(b, Move((9, 5), (8, 6), "r_A", None), Side.RED), "仕出九宫"
+
+
+def test_enemy_frame_rules() -> None:
+    """敌方帧：不合法的 2 格推断作噪声；含噪声的 1/3/4 格变动唯一相符时取合法走法"""
+    b = _full_board()
+    me = Side.RED
+    # 2 格：車隔子直走（不合法）
+    illegal = [(0, 0, "b_r", None), (5, 0, None, "b_r")]
+    assert classifier.classify_enemy_frame(illegal, me, b) == EnemyResult.NOISY
+    assert isinstance(classifier.classify_enemy_frame(illegal, me), Move), "无棋盘时不校验"
+
+    # 3 格：炮平中 + 一格我方棋子闪动
+    move = [(2, 7, "b_c", None), (2, 4, None, "b_c")]
+    result = classifier.classify_enemy_frame([*move, (9, 0, "r_R", None)], me, b)
+    assert result == Move((2, 7), (2, 4), "b_c", None)
+    # 4 格：再多一格噪声
+    noisy = [*move, (9, 0, "r_R", None), (6, 0, "r_P", None)]
+    assert classifier.classify_enemy_frame(noisy, me, b) == Move((2, 7), (2, 4), "b_c", None)
+
+    # 1 格：落点已出现、起点识别滞后；马跳边只有一种走法，炮到 (2,4) 两门炮都可以
+    arrived = [(2, 0, None, "b_n")]
+    assert classifier.classify_enemy_frame(arrived, me, b) == Move((0, 1), (2, 0), "b_n", None)
+    ambiguous = [(2, 4, None, "b_c")]
+    assert classifier.classify_enemy_frame(ambiguous, me, b) == EnemyResult.NOISY
+    assert classifier.classify_enemy_frame(move[:1], me, b) == EnemyResult.LIFTED
@@ -0,0 +1,83 @@
+"""原始帧缓冲截图：头部解析、像素格式转换、不支持时回退 PNG。"""
+
+from __future__ import annotations
+
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from xiangqi_bot import adb_client
+
+from .conftest import raw_shot
+
+# test_prompt 会全局替换 adb_client.screencap，这里保留真实实现
+REAL_SCREENCAP = adb_client.screencap
+
+
+def _raw(img: np.ndarray, fmt: int, header: int) -> bytes:
+    """按 screencap 原始输出格式打包 BGR 图像"""
+    h, w = img.shape[:2]
+    code = cv2.COLOR_BGR2BGRA if fmt == 5 else cv2.COLOR_BGR2RGBA
+    head = struct.pack("<3I", w, h, fmt) + b"\0" * (header - 12)
+    return head + cv2.cvtColor(img, code).tobytes()
+
+
+@pytest.mark.parametrize(("fmt", "header"), [(1, 16), (1, 12), (2, 16), (5, 16)])
+def test_decode_raw(fmt: int, header: int) -> None:
+    img = raw_shot("木_红_1080x2400.png")
+    decoded = adb_client.decode_raw(bytearray(_raw(img, fmt, header)))
+    assert decoded is not None and np.array_equal(decoded, img)
+
+
+def test_decode_raw_rejects_bad_frames() -> None:
+    img = raw_shot("木_红_1080x2400.png")[:100, :100]
+    assert adb_client.decode_raw(_raw(img, 1, 16)[:-1]) is None  # 数据不完整
+    assert adb_client.decode_raw(_raw(img, 4, 16)) is None  # RGB_565 不支持
+    assert adb_client.decode_raw(b"") is None
+
+
+class _Conn:
+    def __init__(self, data: bytes) -> None:
+        self.sent: list[str] = []
+        self.socket = self
+        self._chunks = [data[i : i + 4096] for i in range(0, len(data), 4096)]
+
+    def __enter__(self) -> _Conn:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def send(self, cmd: str) -> None:
+        self.sent.append(cmd)
+
+    def recv(self, _size: int) -> bytes:
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+class _RawDevice:
+    def __init__(self, raw: bytes, png: bytes) -> None:
+        self.raw = raw
+        self.png = png
+        self.conn: _Conn | None = None
+
+    def create_connection(self) -> _Conn:
+        self.conn = _Conn(self.raw)
+        return self.conn
+
+    def screencap(self) -> bytes:
+        return self.png
+
+
+def test_screencap_raw_and_png_fallback() -> None:
+    img = raw_shot("木_红_1080x2400.png")[:200, :300]
+    png = cv2.imencode(".png", img)[1].tobytes()
+
+    dev = _RawDevice(_raw(img, 1, 16), b"")
+    assert np.array_equal(REAL_SCREENCAP(dev, raw=True), img)  # type: ignore[arg-type]
+    assert dev.conn is not None and dev.conn.sent == ["exec:screencap"]
+
+    dev = _RawDevice(_raw(img, 4, 16), png)  # 不支持的格式 -> PNG
+    assert np.array_equal(REAL_SCREENCAP(dev, raw=True), img)  # type: ignore[arg-type]
@@ -0,0 +1,320 @@
+"""批量模板匹配与 int8 棋盘编码：与逐格 cv2.matchTemplate / 列表棋盘结果一致。"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from xiangqi_bot import config, template_cache, vision
+from xiangqi_bot.board import (
+    COLS,
+    RED_MIN_CODE,
+    ROWS,
+    corrected_center,
+    decode,
+    encode,
+    fen_of_board,
+    piece_id,
+)
+from xiangqi_bot.game import recognition
+from xiangqi_bot.game import session as game
+
+from .conftest import LogCollector, MockDevice, full_board, move_piece, raw_shot
+
+# conftest 自动把 analyze_codes / tap_xy / 文字识别换成 mock，这里保留真实实现供测试直接调用
+REAL_ANALYZE_CODES = vision.analyze_codes
+REAL_TAP_XY = vision.tap_xy
+REAL_FIND_GAMEOVER_TEXT = vision.find_gameover_text
+REAL_FIND_DRAW_DIALOG = vision.find_draw_dialog
+REAL_SELECT_SKIN = vision.select_skin
+REAL_CONFIDENCE = vision.confidence
+
+SHOTS = ("木_红_1080x2400.png", "石_红_1440x3200.jpg", "和棋_1080x2400.png")
+
+
+@pytest.mark.parametrize("name", SHOTS)
+def test_batched_scores_match_per_cell(name: str) -> None:
+    """批量引擎每格每模板最大分 ≈ 逐格 matchTemplate，识别布局完全一致。"""
+    corrected = vision.correct_board(raw_shot(name))
+    templates = vision.load_templates()
+    ids = tuple(templates)
+    scores = vision.match_scores(corrected, templates)
+    assert scores.shape == (ROWS * COLS, len(ids))
+
+    half = config.MATCH_SEARCH_HALF + config.TEMPLATE_SIZE // 2
+    expected = np.zeros_like(scores)
+    for r in range(ROWS):
+        for c in range(COLS):
+            x, y = corrected_center(r, c)
+            px, py = round(x), round(y)
+            window = corrected[py - half : py + half, px - half : px + half]
+            for t, pid in enumerate(ids):
+                result = cv2.matchTemplate(window, templates[pid], cv2.TM_CCOEFF_NORMED)
+                expected[r * COLS + c, t] = cv2.minMaxLoc(result)[1]
+    assert np.abs(scores - expected).max() < 1e-3
+
+    codes = vision.pick_codes(scores, vision.template_bank(templates))
+    labels = [piece_id(int(v)) for v in codes]
+    per_cell = [
+        vision.analyze_cell(corrected, r, c, templates) for r in range(ROWS) for c in range(COLS)
+    ]
+    assert labels == per_cell
+
+
+@pytest.mark.parametrize("name", SHOTS)
+def test_ncc_backend_matches_fft(name: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    """ncc 后端（滑窗展开 + 矩阵乘）与 fft 后端最大分一致，整盘识别结果相同。"""
+    corrected = vision.correct_board(raw_shot(name))
+    templates = vision.load_templates()
+    fft = vision.match_scores(corrected, templates)
+    codes = REAL_ANALYZE_CODES(corrected, templates)
+    monkeypatch.setattr(config, "MATCH_BACKEND", "ncc")
+    np.testing.assert_allclose(vision.match_scores(corrected, templates), fft, atol=1e-3)
+    assert np.array_equal(REAL_ANALYZE_CODES(corrected, templates), codes)
+
+
+def test_codes_diff_and_fen() -> None:
+    """int8 编码：变动由 np.nonzero 得出，FEN 与翻转方向一致。"""
+    before = full_board("red")
+    after = [row[:] for row in before]
+    move_piece(after, 7, 7, 7, 4)
+    prev, cur = encode(before), encode(after)
+    assert decode(cur) == after
+    assert recognition.diff(prev, cur) == [(7, 4, None, "r_C"), (7, 7, "r_C", None)]
+    assert recognition.diff(None, cur) == []
+    assert fen_of_board(cur, "red").startswith("rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/9/")
+    flipped = full_board("black")
+    assert fen_of_board(flipped, "black", "red") == fen_of_board(before, "red")
+
+
+def test_incremental_recognizer(monkeypatch: pytest.MonkeyPatch) -> None:
+    """增量识别只重匹配变化格，结果与整盘识别一致；满 full_interval 帧整盘复核。"""
+    monkeypatch.setattr(vision, "analyze_codes", REAL_ANALYZE_CODES)
+    templates = vision.load_templates()
+    start = vision.correct_board(raw_shot("木_红_1080x2400.png"))
+    moved = start.copy()
+    moved[700:800, 400:500] = start[700:800, 700:800]  # 炮 h2 -> e2
+    moved[700:800, 700:800] = start[700:800, 500:600]
+
+    rec = recognition.Recognizer(full_interval=2)
+    board, changes = rec.analyze(start, templates, None)
+    assert rec.last_matched == ROWS * COLS and changes == []
+    prev = encode(board)
+
+    board2, changes = rec.analyze(moved, templates, prev)
+    assert rec.last_matched == 2
+    assert changes == [(7, 4, None, "r_C"), (7, 7, "r_C", None)]
+    assert board2 == recognition.analyze(moved, templates, prev)[0]
+    assert vision.diff_cells(start, moved) == {(7, 4), (7, 7)}
+
+    rec.analyze(moved, templates, prev)
+    assert rec.last_matched == 0
+    rec.analyze(moved, templates, prev)
+    assert rec.last_matched == ROWS * COLS, "满 full_interval 帧应整盘复核"
+
+
+@pytest.mark.parametrize("name", ["木_红_1080x2400.png", "石_红_1440x3200.jpg"])
+def test_remap_calibration(name: str) -> None:
+    """remap 定点表矫正：只矫正格窗口与整盘矫正的识别区域一致；点击坐标查表与逆透视一致。"""
+    img = raw_shot(name)
+    h, w = img.shape[:2]
+    full = vision.correct_board(img)
+    cells = vision.correct_board(img, cells_only=True)
+    assert np.array_equal(vision.cell_windows(full), vision.cell_windows(cells))
+    warped = cv2.warpPerspective(img, vision.homography(w, h), (config.CORRECT_W, config.CORRECT_H))
+    assert np.abs(full.astype(np.int16) - warped).max() <= 8
+
+    h_matrix = vision.homography(w, h)
+    inverse = np.linalg.inv(h_matrix)
+    for r in range(ROWS):
+        for c in range(COLS):
+            src = cv2.perspectiveTransform(
+                np.array([[corrected_center(r, c)]], np.float64), inverse
+            )
+            x, y = REAL_TAP_XY(h_matrix, r, c)
+            assert abs(x - src[0, 0, 0]) <= 0.5 + 1e-6 and abs(y - src[0, 0, 1]) <= 0.5 + 1e-6
+
+
+def test_template_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """模板磁盘缓存：首次解码落盘，再次加载 mmap 零拷贝且内容一致；PNG 改动后重建。"""
+    src = tmp_path / "png"
+    src.mkdir()
+    for path in config.GAMEOVER_TEXT_DIR.glob("*.png"):
+        (src / path.name).write_bytes(path.read_bytes())
+    monkeypatch.setattr(config, "TEMPLATE_CACHE_DIR", tmp_path / "cache")
+
+    def derive(images: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        return {"means": np.array([img.mean() for img in images.values()])}
+
+    built, derived = template_cache.load_group("test", src, cv2.IMREAD_GRAYSCALE, derive)
+    assert (tmp_path / "cache" / "test.json").exists()
+    assert template_cache.load_group("test", src, cv2.IMREAD_GRAYSCALE, derive)[0] is built
+
+    template_cache.clear()
+    cached, cached_derived = template_cache.load_group("test", src, cv2.IMREAD_GRAYSCALE, derive)
+    assert cached.keys() == built.keys()
+    for name, img in cached.items():
+        assert isinstance(img.base, np.memmap) and not img.flags.writeable
+        assert np.array_equal(img, built[name])
+    assert np.array_equal(cached_derived["means"], derived["means"])
+
+    # 替换一张 PNG（内容变了）：不得返回旧模板
+    name = next(iter(built))
+    flipped = cv2.flip(built[name], 1)
+    cv2.imencode(".png", flipped)[1].tofile(str(src / f"{name}.png"))
+    template_cache.clear()
+    rebuilt, _ = template_cache.load_group("test", src, cv2.IMREAD_GRAYSCALE, derive)
+    assert np.array_equal(rebuilt[name], flipped)
+
+    # 核对间隔内不再 glob / stat PNG（逐帧调用只剩字典查找）；间隔过后发现改动即重建
+    cv2.imencode(".png", built[name])[1].tofile(str(src / f"{name}.png"))
+    assert template_cache.load_group("test", src, cv2.IMREAD_GRAYSCALE, derive)[0] is rebuilt
+    monkeypatch.setattr(template_cache, "_RECHECK_S", 0.0)
+    restored, _ = template_cache.load_group("test", src, cv2.IMREAD_GRAYSCALE, derive)
+    assert restored is not rebuilt and np.array_equal(restored[name], built[name])
+    template_cache.clear()
+
+
+def test_cached_piece_bank_matches_fresh() -> None:
+    """磁盘缓存预置的 TemplateBank 与现场计算一致"""
+    templates = vision.load_templates()
+    cached = vision.template_bank(templates)
+    fresh = vision._make_bank(templates, vision._bank_arrays(templates))
+    assert cached.ids == fresh.ids
+    assert np.allclose(cached.spectra, fresh.spectra) and np.allclose(cached.norms, fresh.norms)
+
+    # ncc 模板矩阵按需由频谱还原，与直接展平零均值模板一致
+    assert "matrix" not in vars(fresh)
+    stack = np.stack(list(templates.values())).astype(np.float64)
+    zero_mean = stack - stack.mean(axis=(1, 2), keepdims=True)
+    expected = zero_mean.transpose(0, 3, 1, 2).reshape(len(templates), -1).T
+    np.testing.assert_allclose(fresh.matrix, expected, atol=1e-3)
+    red = fresh.by_color[vision.CELL_RED]
+    np.testing.assert_allclose(red.matrix, fresh.matrix[:, fresh.codes >= RED_MIN_CODE], atol=1e-3)
+
+
+@pytest.mark.parametrize("size", [(1080, 2400), (1440, 3200)])
+def test_text_frame_roi_and_pregate(size: tuple[int, int]) -> None:
+    """共享 TextFrame：ROI 条带匹配坐标与整帧一致；无弹窗帧被预筛拦下，结算文字照常识别。"""
+    w, h = size
+    draw = cv2.resize(raw_shot("和棋_1080x2400.png"), size, interpolation=cv2.INTER_LINEAR)
+    hits = {m[0]: m for m in reversed(REAL_FIND_DRAW_DIALOG(vision.TextFrame(draw)))}
+    assert hits.keys() == {"和棋_同意", "和棋_拒绝"}  # 按分降序，reversed 后保留最高分
+    for word, (x, y) in {"和棋_拒绝": (360, 1312), "和棋_同意": (720, 1312)}.items():
+        sx, sy = x * w / 1080, y * h / 2400
+        assert abs(hits[word][1] - sx) <= 3 and abs(hits[word][2] - sy) <= 3
+
+    board = cv2.resize(raw_shot("木_红_1080x2400.png"), size, interpolation=cv2.INTER_AREA)
+    frame = vision.TextFrame(board)
+    templates = vision.load_draw_text_templates()
+    band, _top = frame.band(config.TEXT_ROI["和棋_同意"])
+    assert not vision._pregate("draw-test", band, templates)
+    assert REAL_FIND_DRAW_DIALOG(frame) == []
+    assert REAL_FIND_GAMEOVER_TEXT(frame) == []
+
+    gameover = cv2.resize(raw_shot("再来一局_铜钱_1080x2400.png"), size)
+    words = {m[0] for m in REAL_FIND_GAMEOVER_TEXT(vision.TextFrame(gameover))}
+    assert {"铜钱", "再来一局"} <= words
+
+
+@pytest.mark.parametrize(
+    ("name", "side"), [("木_红_1080x2400.png", "red"), ("石_黑_1080x2400.png", "black")]
+)
+def test_template_pruning(name: str, side: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    """候选模板按位置裁剪：识别结果不变，逐格少试约一半模板；不可能的棋子不会被选中；调试可关。"""
+    corrected = vision.correct_board(raw_shot(name))
+    templates = vision.load_templates()
+    pruned = REAL_ANALYZE_CODES(corrected, templates, my_side=side)
+    assert np.array_equal(pruned, REAL_ANALYZE_CODES(corrected, templates))
+    assert decode(pruned) == [
+        [vision.analyze_cell(corrected, r, c, templates, side) for c in range(COLS)]
+        for r in range(ROWS)
+    ]
+    allowed = vision.candidates(side)
+    assert allowed is not None
+    assert (allowed.sum(axis=2) - 1).mean() < len(templates) * 0.6
+
+    # 某格士的模板分最高，但该格不在九宫：屏蔽后取次高的車
+    bank = vision.template_bank(templates)
+    scores = np.full((1, len(bank.ids)), 0.5)
+    scores[0, bank.ids.index("r_A")] = 0.95
+    scores[0, bank.ids.index("r_R")] = 0.9
+    assert piece_id(int(vision.pick_codes(scores, bank)[0])) == "r_A"
+    cell = allowed[4, 0][None]
+    assert piece_id(int(vision.pick_codes(scores, bank, allowed=cell)[0])) == "r_R"
+
+    monkeypatch.setattr(config, "TEMPLATE_PRUNE", False)
+    assert vision.candidates(side) is None
+
+
+@pytest.mark.parametrize("name", [*SHOTS, "石_黑_1080x2400.png", "晋级赛_1080x2400.png"])
+def test_color_preclassify(name: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    """颜色预分类：棋子从不判为空格、颜色与识别结果一致；只匹配同色模板后识别结果不变。"""
+    corrected = vision.correct_board(raw_shot(name))
+    templates = vision.load_templates()
+    monkeypatch.setattr(config, "COLOR_PRECLASSIFY", False)
+    full = REAL_ANALYZE_CODES(corrected, templates).reshape(-1)
+    monkeypatch.setattr(config, "COLOR_PRECLASSIFY", True)
+    assert np.array_equal(REAL_ANALYZE_CODES(corrected, templates).reshape(-1), full)
+
+    labels = vision.classify_cells(vision.cell_windows(corrected))
+    assert not (labels[full != 0] == vision.CELL_EMPTY).any()
+    red, black = full >= RED_MIN_CODE, (full != 0) & (full < RED_MIN_CODE)
+    assert not (labels[red] == vision.CELL_BLACK).any()
+    assert not (labels[black] == vision.CELL_RED).any()
+    bank = vision.template_bank(templates)
+    assert len(bank.by_color[vision.CELL_RED].ids) == len(bank.by_color[vision.CELL_BLACK].ids) == 7
+
+
+@pytest.mark.parametrize(
+    ("name", "skin"),
+    [("木_红_1080x2400.png", "木"), ("石_红_1080x2400.png", "石"), ("石_红_1440x3200.jpg", "石")],
+)
+def test_skin_selection(
+    name: str, skin: str, monkeypatch: pytest.MonkeyPatch, collector: LogCollector
+) -> None:
+    """按画面挑出对应皮肤的模板包（两包识别结果相同、贴合包分数更高）；会话只换用这一包。"""
+    monkeypatch.setattr(vision, "confidence", REAL_CONFIDENCE)
+    corrected = vision.correct_board(raw_shot(name))
+    assert set(vision.skins()) >= {"木", "石"}
+    picked, score = REAL_SELECT_SKIN(corrected)
+    assert picked == skin and score >= config.SKIN_MIN_SCORE
+    packs = {s: vision.load_templates(s) for s in ("木", "石")}
+    assert all(len(t) == 14 for t in packs.values())
+    codes = [REAL_ANALYZE_CODES(corrected, t) for t in packs.values()]
+    assert np.array_equal(*codes)
+
+    s = game.GameSession(MockDevice(), collector.log, collector.on_state, None)
+    assert s.skin == config.DEFAULT_SKIN
+    monkeypatch.setattr(vision, "select_skin", REAL_SELECT_SKIN)
+    s._select_skin(corrected)
+    assert s.skin == skin
+    assert s.templates is packs[skin] and s.capture.templates is packs[skin]
+    # 无棋盘画面（各包分数都低）不换包
+    monkeypatch.setattr(vision, "select_skin", lambda img: ("木" if skin == "石" else "石", 0.2))
+    s._select_skin(corrected)
+    assert s.skin == skin
+
+
+def test_skin_recheck_switches_wrong_pack(
+    monkeypatch: pytest.MonkeyPatch, collector: LogCollector
+) -> None:
+    """载入了不贴合的模板包（另一包分数仍在 0.94 左右）时，SKIN_CHECK_INTERVAL 帧内复查换包"""
+    monkeypatch.setattr(vision, "confidence", REAL_CONFIDENCE)
+    monkeypatch.setattr(vision, "select_skin", REAL_SELECT_SKIN)
+    corrected = vision.correct_board(raw_shot("石_红_1080x2400.png"))
+    s = game.GameSession(MockDevice(), collector.log, collector.on_state, None)
+    assert s.skin == "木"
+    assert REAL_CONFIDENCE(corrected, s.templates) > config.SKIN_MIN_SCORE, "错包分数也高于换包下限"
+    for _ in range(config.SKIN_CHECK_INTERVAL):
+        s._check_skin(corrected)
+    assert s.skin == "石" and s.templates is vision.load_templates("石")
+    assert s._skin_score is not None and s._skin_score > config.SKIN_RECHECK_SCORE
+
+    # 之后贴合的包分数不再低于挑选时的基准，不会反复重新挑选
+    monkeypatch.setattr(vision, "select_skin", lambda img: pytest.fail("不应重新挑选"))
+    for _ in range(config.SKIN_CHECK_INTERVAL):
+        s._check_skin(corrected)